@@ -0,0 +1,7 @@
+"""
+dictquerier 性能基准测试
+
+用法:
+    python -m benchmarks run --sizes small,medium -o result.json
+    python -m benchmarks compare base.json head.json
+"""
@@ -0,0 +1,84 @@
+"""
+基准测试命令行入口
+"""
+import argparse
+import sys
+
+from benchmarks import runner
+from benchmarks.documents import SIZES
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="dictquerier 性能基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="执行基准测试")
+    run_parser.add_argument("-s", "--sizes", default="small,medium", help=f"文档规模，逗号分隔，可选: {','.join(SIZES)}")
+    run_parser.add_argument("-r", "--repeat", type=int, default=20, help="每个阶段重复次数")
+    run_parser.add_argument("--seed", type=int, default=0, help="文档随机种子")
+    run_parser.add_argument("--cases", help="只执行指定用例，逗号分隔")
+    run_parser.add_argument("-o", "--output", help="结果输出JSON文件路径")
+
+    json_parser = subparsers.add_parser("json", help="测试各JSON后端的解析和输出耗时")
+    json_parser.add_argument("-s", "--sizes", default="small,medium", help=f"文档规模，逗号分隔，可选: {','.join(SIZES)}")
+    json_parser.add_argument("-r", "--repeat", type=int, default=20, help="每个阶段重复次数")
+    json_parser.add_argument("--seed", type=int, default=0, help="文档随机种子")
+    json_parser.add_argument("--backends", help="只测试指定的后端，逗号分隔，默认测试所有已安装的后端")
+    json_parser.add_argument("-o", "--output", help="结果输出JSON文件路径")
+
+    parse_parser = subparsers.add_parser("parse", help="测试机器生成的大型表达式的解析、执行耗时和调用栈深度")
+    parse_parser.add_argument("-n", "--terms", default="100,1000,10000", help="表达式规模（项数），逗号分隔")
+    parse_parser.add_argument("-r", "--repeat", type=int, default=5, help="重复次数")
+    parse_parser.add_argument("--cases", help="只测试指定用例，逗号分隔")
+    parse_parser.add_argument("-o", "--output", help="结果输出JSON文件路径")
+
+    compare_parser = subparsers.add_parser("compare", help="比较两次测试结果")
+    compare_parser.add_argument("base", help="基准结果JSON文件")
+    compare_parser.add_argument("head", help="对比结果JSON文件")
+    compare_parser.add_argument("-t", "--threshold", type=float, default=0.1, help="判定为回退的相对变慢比例")
+    compare_parser.add_argument("--fail-on-regression", action="store_true", help="存在回退时以非零状态码退出")
+
+    return parser.parse_args()
+
+
+def main():
+    """主入口函数"""
+    args = parse_args()
+
+    if args.command in ("run", "json"):
+        sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+        unknown = [size for size in sizes if size not in SIZES]
+        if unknown:
+            print(f"错误: 未知的文档规模 {', '.join(unknown)}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.command == "parse":
+        terms = [int(count) for count in args.terms.split(",") if count.strip()]
+        cases = args.cases.split(",") if args.cases else None
+        report = runner.bench_parse(terms, args.repeat, cases)
+        print(runner.format_parse_report(report))
+        if args.output:
+            runner.save(report, args.output)
+    elif args.command == "json":
+        backends = args.backends.split(",") if args.backends else None
+        report = runner.bench_json(sizes, args.repeat, args.seed, backends)
+        print(runner.format_json_report(report))
+        if args.output:
+            runner.save(report, args.output)
+    elif args.command == "run":
+        cases = args.cases.split(",") if args.cases else None
+        report = runner.run(sizes, args.repeat, args.seed, cases,
+                            progress=lambda name: print(f"运行 {name}", file=sys.stderr))
+        print(runner.format_report(report))
+        if args.output:
+            runner.save(report, args.output)
+    else:
+        rows = runner.compare(runner.load(args.base), runner.load(args.head), args.threshold)
+        print(runner.format_comparison(rows))
+        if args.fail_on_regression and any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+代表性查询路径语料
+
+覆盖键访问、索引、通配符、切片、条件过滤、算术运算、脚本调用、变量引用、集合成员、正则匹配、内置聚合、排序和连接
+"""
+from typing import List, Tuple
+
+from dictquerier.script.manager import script_manager
+
+# (用例名称, 查询路径)
+CORPUS: List[Tuple[str, str]] = [
+    ('key', 'config.server.port'),
+    ('leading_dot', '.config.server.host'),
+    ('bracket_key', "config['server']['workers'][3]['id']"),
+    ('index', 'users[10].name'),
+    ('wildcard', 'users[*].score'),
+    ('nested_projection', 'users[*].profile.address.city'),
+    ('slice', 'users[10:1000:3].id'),
+    ('reverse_slice', 'matrix[0][::-1]'),
+    ('filter_eq', "users['group'=='A'].id"),
+    ('filter_and_or', "users[('group'=='A' || 'group'=='B') && 'score'>50].name"),
+    ('filter_arithmetic', "orders['amount' * 2 > 1500].id"),
+    ('filter_chain', "orders['status'=='paid'].amount"),
+    ('script_call', '@bench_total(*.users[*].score)'),
+    ('script_filter', "users[@bench_double('score') > 150].id"),
+    ('variable', "users['score' > $bench_threshold].id"),
+    ('aggregate_sum', '@sum(users[*].score)'),
+    ('aggregate_filter', "@count(users['group'=='A'])"),
+    ('aggregate_distinct', '@distinct(users[*].group)'),
+    ('top_k', "@order_by(users['group'=='A'], 'score', 'desc', 10).id"),
+    ('order_by', "@order_by(users['group'=='A'], 'score').id"),
+    ('hash_join', "@join(orders['status'=='paid'], users, 'user_id', 'id').right.name"),
+    ('filter_or_chain', "users['group'=='A' || 'group'=='C' || 'group'=='E' || 'group'=='G' || 'group'=='I' || 'group'=='K'].id"),
+    ('filter_in', "users['group' in ['A', 'C', 'E', 'G', 'I', 'K']].id"),
+    ('filter_regex', "users['name' =~ '7$'].id"),
+]
+
+
+def setup_scripts():
+    """注册语料中使用的脚本和变量"""
+    script_manager.register('bench_total', pure=True)(sum)
+    script_manager.register('bench_double', pure=True)(lambda value: value * 2)
+    script_manager.define('bench_threshold', 90)
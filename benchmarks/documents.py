@@ -0,0 +1,65 @@
+"""
+合成测试文档生成器
+
+使用固定随机种子生成结构稳定的文档，保证多次运行之间结果可比较
+"""
+import random
+from typing import Any, Dict
+
+# 预设的文档规模（users列表长度）
+SIZES = {
+    'small': 100,
+    'medium': 10_000,
+    'large': 100_000,
+}
+
+GROUPS = ['A', 'B', 'C', 'D', 'E']
+CITIES = ['北京', '上海', '广州', '深圳', '杭州', '成都']
+TAGS = ['new', 'vip', 'inactive', 'trial', 'staff', 'partner']
+
+
+def generate_document(size: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    生成合成测试文档
+
+    Args:
+        size (int): users列表长度，orders列表长度为其两倍
+        seed (int, optional): 随机种子. Defaults to 0.
+    Returns:
+        dict: 测试文档
+    """
+    rng = random.Random(seed)
+    users = [
+        {
+            'id': i,
+            'name': f'user{i}',
+            'group': rng.choice(GROUPS),
+            'score': round(rng.uniform(0, 100), 2),
+            'active': rng.random() < 0.7,
+            'tags': rng.sample(TAGS, rng.randint(0, 3)),
+            'scores': [rng.randint(0, 100) for _ in range(5)],
+            'profile': {
+                'age': rng.randint(18, 80),
+                'address': {'city': rng.choice(CITIES), 'zip': f'{rng.randint(0, 99999):05d}'},
+            },
+        }
+        for i in range(size)
+    ]
+    orders = [
+        {
+            'id': i,
+            'user_id': rng.randrange(size),
+            'amount': round(rng.uniform(1, 1000), 2),
+            'status': rng.choice(['paid', 'pending', 'refunded']),
+        }
+        for i in range(size * 2)
+    ]
+    return {
+        'config': {
+            'server': {'host': 'localhost', 'port': 8080, 'workers': [{'id': i} for i in range(8)]},
+            'features': {f'flag{i}': rng.random() < 0.5 for i in range(50)},
+        },
+        'users': users,
+        'orders': orders,
+        'matrix': [[rng.randint(0, 9) for _ in range(100)] for _ in range(max(size // 100, 1))],
+    }
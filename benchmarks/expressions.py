@@ -0,0 +1,75 @@
+"""
+机器生成的大型查询表达式
+
+模拟程序拼接出的长条件链、右侧嵌套的括号、长算术表达式和很长的路径，用于测试解析耗时和调用栈深度
+表达式可以在generate_data生成的对应文档上执行，用于测试长路径求值的耗时和调用栈深度
+"""
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def and_chain(terms: int) -> str:
+    """items['k0'==0 && 'k1'==1 && ...]"""
+    return "items[" + " && ".join(f"'k{i}'=={i}" for i in range(terms)) + "]"
+
+
+def mixed_chain(terms: int) -> str:
+    """items['a'==0 || 'b'>1 && 'c'!=2 || ...]"""
+    ops = ("==", ">", "!=", "<=")
+    joins = (" || ", " && ")
+    parts = [f"'k{i % 7}'{ops[i % len(ops)]}{i}" for i in range(terms)]
+    return "items[" + "".join(part + (joins[i % 2] if i < terms - 1 else "") for i, part in enumerate(parts)) + "]"
+
+
+def right_nested(terms: int) -> str:
+    """items['k'==0 || ('k'==1 || ('k'==2 || ...)))]"""
+    inner = "".join(f"'k'=={i} || (" for i in range(terms - 1))
+    return "items[" + inner + f"'k'=={terms - 1}" + ")" * (terms - 1) + "]"
+
+
+def nested_parens(terms: int) -> str:
+    """items[((((... 'k'==1 ...))))]"""
+    return "items[" + "(" * terms + "'k'==1" + ")" * terms + "]"
+
+
+def arithmetic(terms: int) -> str:
+    """items['v' + 1 * 2 - 3 / 4 ... > 0]"""
+    ops = (" + ", " * ", " - ", " / ")
+    return "items['v'" + "".join(f"{ops[i % len(ops)]}{i + 1}" for i in range(terms)) + " > 0]"
+
+
+def long_path(terms: int) -> str:
+    """root.k0[0].k1[0]...（指针式的长路径）"""
+    return "root" + "".join(f".k{i}[0]" for i in range(terms // 2))
+
+
+# (用例名称, 生成函数)
+EXPRESSIONS: List[Tuple[str, Callable[[int], str]]] = [
+    ('and_chain', and_chain),
+    ('mixed_chain', mixed_chain),
+    ('right_nested', right_nested),
+    ('nested_parens', nested_parens),
+    ('arithmetic', arithmetic),
+    ('long_path', long_path),
+]
+
+
+def generate_expressions(terms: int) -> Dict[str, str]:
+    """生成指定规模（项数）的所有表达式"""
+    return {name: generate(terms) for name, generate in EXPRESSIONS}
+
+
+def generate_data(name: str, terms: int) -> Dict[str, Any]:
+    """
+    生成可以执行指定表达式的文档
+
+    long_path 对应逐层嵌套的 {'root': {'k0': [{'k1': [...]}]}}，路径的每一步都能取到值；
+    其余用例对应一个短的 items 列表，元素包含条件中用到的键
+    """
+    if name == 'long_path':
+        data = current = {}
+        for i in range(terms // 2):
+            child = {}
+            current[f'k{i}'] = [child]
+            current = child
+        return {'root': data}
+    return {'items': [{'k': i, 'v': i, **{f'k{j}': j for j in range(7)}} for i in range(10)]}
@@ -0,0 +1,347 @@
+"""
+基准测试执行与结果比较
+"""
+import gc
+import json
+import sys
+import time
+import platform
+import statistics
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import dictquerier
+from dictquerier.tokenizer.lexer import Lexer
+from dictquerier.syntax_tree.parser import Parser
+from dictquerier.executor.evaluator import Evaluator
+from dictquerier.serialization import available_backends, get_backend
+
+from benchmarks.corpus import CORPUS, setup_scripts
+from benchmarks.expressions import EXPRESSIONS, generate_data
+from benchmarks.documents import SIZES, generate_document
+
+STAGES = ('lex', 'parse', 'evaluate')
+JSON_STAGES = ('decode', 'encode', 'encode_indent')
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """汇总计时样本（毫秒）"""
+    return {
+        'min_ms': min(samples) * 1000,
+        'median_ms': statistics.median(samples) * 1000,
+        'mean_ms': statistics.mean(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+    }
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> Tuple[List[float], Any]:
+    """重复执行并返回每次的耗时和最后一次的结果"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def _peak_memory(func: Callable[[], Any]) -> int:
+    """测量执行过程中的内存峰值（字节），单独执行一次避免干扰计时"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_path(data: Any, path: str, repeat: int = 20, warmup: int = 2) -> Dict[str, Any]:
+    """
+    分阶段测试单条查询路径
+
+    Args:
+        data: 查询的文档
+        path (str): 查询路径
+        repeat (int, optional): 每个阶段重复次数. Defaults to 20.
+        warmup (int, optional): 预热次数. Defaults to 2.
+    Returns:
+        dict: 各阶段耗时统计和内存峰值
+    """
+    def lex():
+        return list(Lexer(path).tokenize())
+
+    tokens = lex()
+
+    def parse():
+        return Parser(tokens).parse()
+
+    ast_root = parse()
+
+    def evaluate():
+        return Evaluator(data).query(ast_root)
+
+    for _ in range(warmup):
+        evaluate()
+
+    result = {}
+    for stage, func in (('lex', lex), ('parse', parse), ('evaluate', evaluate)):
+        samples, value = _measure(func, repeat)
+        result[stage] = _summarize(samples)
+    result['result_size'] = len(value) if isinstance(value, list) else 1
+    result['peak_memory_bytes'] = _peak_memory(lambda: Evaluator(data).query(Parser(Lexer(path).tokenize()).parse()))
+    return result
+
+
+def run(sizes: Sequence[str] = ('small', 'medium'), repeat: int = 20, seed: int = 0,
+        cases: Optional[Sequence[str]] = None, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    执行基准测试
+
+    Args:
+        sizes (Sequence[str], optional): 文档规模名称，见documents.SIZES. Defaults to ('small', 'medium').
+        repeat (int, optional): 每个阶段重复次数. Defaults to 20.
+        seed (int, optional): 文档随机种子. Defaults to 0.
+        cases (Sequence[str], optional): 只执行指定名称的用例，默认全部执行
+        progress (Callable, optional): 进度回调，参数为进度描述
+    Returns:
+        dict: 可直接序列化为JSON的测试结果
+    """
+    setup_scripts()
+    results = []
+    for size_name in sizes:
+        data = generate_document(SIZES[size_name], seed)
+        for case, path in CORPUS:
+            if cases and case not in cases:
+                continue
+            if progress:
+                progress(f"{size_name}/{case}")
+            entry = {'size': size_name, 'case': case, 'path': path}
+            entry.update(bench_path(data, path, repeat))
+            results.append(entry)
+    return {
+        'meta': {
+            'dictquerier_version': dictquerier.__version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def bench_json(sizes: Sequence[str] = ('small', 'medium'), repeat: int = 20, seed: int = 0,
+               backends: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    测试各JSON后端解析和输出合成文档的耗时
+
+    Args:
+        sizes (Sequence[str], optional): 文档规模名称. Defaults to ('small', 'medium').
+        repeat (int, optional): 每个阶段重复次数. Defaults to 20.
+        seed (int, optional): 文档随机种子. Defaults to 0.
+        backends (Sequence[str], optional): 只测试指定的后端，默认测试所有已安装的后端
+    Returns:
+        dict: 可直接序列化为JSON的测试结果
+    """
+    results = []
+    for size_name in sizes:
+        data = generate_document(SIZES[size_name], seed)
+        raw = get_backend('json').dumpb(data)
+        for name in backends or available_backends():
+            backend = get_backend(name)
+            entry = {'size': size_name, 'backend': name, 'bytes': len(raw)}
+            for stage, func in (('decode', lambda: backend.loads(raw)),
+                                ('encode', lambda: backend.dumpb(data)),
+                                ('encode_indent', lambda: backend.dumpb(data, 2))):
+                func()
+                samples, _ = _measure(func, repeat)
+                entry[stage] = _summarize(samples)
+            results.append(entry)
+    return {'meta': {'python': platform.python_version(), 'seed': seed, 'repeat': repeat}, 'results': results}
+
+
+def _peak_depth(func: Callable[[], Any]) -> int:
+    """测量执行过程中相对调用处的最大Python调用栈深度，单独执行一次避免干扰计时"""
+    depth = peak = 0
+
+    def profile(frame, event, arg):
+        nonlocal depth, peak
+        if event == 'call':
+            depth += 1
+            if depth > peak:
+                peak = depth
+        elif event == 'return':
+            depth -= 1
+
+    sys.setprofile(profile)
+    try:
+        func()
+    finally:
+        sys.setprofile(None)
+    return peak
+
+
+def bench_parse(terms: Sequence[int] = (100, 1000, 10000), repeat: int = 5,
+                cases: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    测试机器生成的大型表达式的解析、执行耗时和调用栈深度
+
+    Args:
+        terms (Sequence[int], optional): 表达式规模（项数）. Defaults to (100, 1000, 10000).
+        repeat (int, optional): 重复次数. Defaults to 5.
+        cases (Sequence[str], optional): 只测试指定的用例，默认测试所有用例
+    Returns:
+        dict: 可直接序列化为JSON的测试结果，超出递归深度限制的用例记录错误而不是耗时
+    """
+    results = []
+    for count in terms:
+        for name, generate in EXPRESSIONS:
+            if cases and name not in cases:
+                continue
+            path = generate(count)
+            tokens = list(Lexer(path).tokenize())
+            parse = lambda: Parser(tokens).parse()
+            entry = {'terms': count, 'case': name, 'tokens': len(tokens)}
+            try:
+                ast_root = parse()
+            except RecursionError:
+                entry['error'] = 'RecursionError'
+                results.append(entry)
+                continue
+            samples, _ = _measure(parse, repeat)
+            entry['parse'] = _summarize(samples)
+            entry['peak_depth'] = _peak_depth(parse)
+            
+            data = generate_data(name, count)
+            query = lambda: Evaluator(data).query(ast_root)
+            try:
+                query()
+            except RecursionError:
+                entry['query_error'] = 'RecursionError'
+            else:
+                samples, _ = _measure(query, repeat)
+                entry['query'] = _summarize(samples)
+                entry['query_depth'] = _peak_depth(query)
+            results.append(entry)
+    return {
+        'meta': {'python': platform.python_version(), 'recursion_limit': sys.getrecursionlimit(), 'repeat': repeat},
+        'results': results,
+    }
+
+
+def save(report: Dict[str, Any], output: str):
+    """将测试结果保存为JSON文件"""
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load(path: str) -> Dict[str, Any]:
+    """读取JSON格式的测试结果"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    比较两次测试结果的各阶段中位数耗时
+
+    Args:
+        base (dict): 基准结果
+        head (dict): 对比结果
+        threshold (float, optional): 判定为性能回退的相对变慢比例. Defaults to 0.1.
+    Returns:
+        list: 每个用例每个阶段的比较结果，ratio为 head / base
+    """
+    base_index = {(entry['size'], entry['case']): entry for entry in base['results']}
+    rows = []
+    for entry in head['results']:
+        origin = base_index.get((entry['size'], entry['case']))
+        if origin is None:
+            continue
+        for stage in STAGES:
+            before = origin[stage]['median_ms']
+            after = entry[stage]['median_ms']
+            ratio = after / before if before else float('inf')
+            rows.append({
+                'size': entry['size'],
+                'case': entry['case'],
+                'stage': stage,
+                'base_ms': before,
+                'head_ms': after,
+                'ratio': ratio,
+                'regression': ratio > 1 + threshold,
+            })
+        rows.append({
+            'size': entry['size'],
+            'case': entry['case'],
+            'stage': 'peak_memory',
+            'base_ms': None,
+            'head_ms': None,
+            'base_bytes': origin['peak_memory_bytes'],
+            'head_bytes': entry['peak_memory_bytes'],
+            'ratio': entry['peak_memory_bytes'] / origin['peak_memory_bytes'] if origin['peak_memory_bytes'] else float('inf'),
+            'regression': False,
+        })
+    return rows
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """将测试结果格式化为文本表格"""
+    lines = [f"{'size':<8}{'case':<20}{'lex(ms)':>10}{'parse(ms)':>11}{'eval(ms)':>12}{'peak(KiB)':>12}"]
+    for entry in report['results']:
+        lines.append(
+            f"{entry['size']:<8}{entry['case']:<20}"
+            f"{entry['lex']['median_ms']:>10.4f}{entry['parse']['median_ms']:>11.4f}"
+            f"{entry['evaluate']['median_ms']:>12.4f}{entry['peak_memory_bytes'] / 1024:>12.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def format_json_report(report: Dict[str, Any]) -> str:
+    """将JSON后端测试结果格式化为文本表格，括号中为相对标准库的加速比"""
+    baseline = {entry['size']: entry for entry in report['results'] if entry['backend'] == 'json'}
+    lines = [f"{'size':<8}{'backend':<10}{'MiB':>8}" + ''.join(f"{stage + '(ms)':>24}" for stage in JSON_STAGES)]
+    for entry in report['results']:
+        line = f"{entry['size']:<8}{entry['backend']:<10}{entry['bytes'] / 1024 / 1024:>8.2f}"
+        base = baseline.get(entry['size'])
+        for stage in JSON_STAGES:
+            median = entry[stage]['median_ms']
+            speedup = f"(x{base[stage]['median_ms'] / median:.1f})" if base and median else ''
+            line += f"{median:>15.3f}{speedup:>9}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def format_parse_report(report: Dict[str, Any]) -> str:
+    """将解析测试结果格式化为文本表格"""
+    lines = [f"{'terms':>7}  {'case':<16}{'tokens':>9}{'parse(ms)':>12}{'depth':>8}{'query(ms)':>12}{'depth':>8}"]
+    for entry in report['results']:
+        if 'error' in entry:
+            timing = f"{entry['error']:>20}"
+        else:
+            timing = f"{entry['parse']['median_ms']:>12.3f}{entry['peak_depth']:>8}"
+            if 'query_error' in entry:
+                timing += f"{entry['query_error']:>20}"
+            elif 'query' in entry:
+                timing += f"{entry['query']['median_ms']:>12.3f}{entry['query_depth']:>8}"
+        lines.append(f"{entry['terms']:>7}  {entry['case']:<16}{entry['tokens']:>9}{timing}")
+    return '\n'.join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """将比较结果格式化为文本表格"""
+    lines = [f"{'size':<8}{'case':<20}{'stage':<13}{'base':>12}{'head':>12}{'ratio':>8}"]
+    for row in rows:
+        if row['stage'] == 'peak_memory':
+            before = f"{row['base_bytes'] / 1024:.1f}K"
+            after = f"{row['head_bytes'] / 1024:.1f}K"
+        else:
+            before = f"{row['base_ms']:.4f}"
+            after = f"{row['head_ms']:.4f}"
+        flag = '  回退' if row['regression'] else ''
+        lines.append(f"{row['size']:<8}{row['case']:<20}{row['stage']:<13}{before:>12}{after:>12}{row['ratio']:>8.2f}{flag}")
+    return '\n'.join(lines)
@@ -6,18 +6,39 @@ dictquerier - 基于路径的Json数据查询工具
 
 __version__ = "0.1.0"
 
-from .exceptions import PathError
+from .exceptions import PathError, ParameterError
 from .tokenizer.enum import Operator
-from .core import query_json, flatten_list
+from .core import query_json, query_status, query_stream, explain, compile_query, CompiledQuery, flatten_list
+from .executor.status import QueryResult
 
 from .script.manager import script_manager
+from .executor.index import KeyIndex
+from .document import Document, TrackedDocument, SharedDocument
+from .serialization.lazy import loads_lazy
+from .serialization.messagepack import loads_msgpack
+from .instrumentation import instrumentation, LatencyAggregator
 
 
 
 __all__ = [
     'PathError', 
+    'ParameterError',
     'Operator', 
     'query_json', 
+    'query_status',
+    'QueryResult',
+    'query_stream',
+    'explain',
+    'compile_query',
+    'CompiledQuery',
+    'Document',
+    'TrackedDocument',
+    'SharedDocument',
+    'loads_lazy',
+    'loads_msgpack',
     'flatten_list',
-    'script_manager'
+    'KeyIndex',
+    'script_manager',
+    'instrumentation',
+    'LatencyAggregator',
 ] 
\ No newline at end of file
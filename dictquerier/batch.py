@@ -0,0 +1,150 @@
+"""
+批量查询
+
+一次读取、多个路径：文件只加载一次，所有路径在同一份数据上执行（按需解码的文档中已解析的部分被后续路径复用）。
+多个文件由进程池并行处理，同时在途的文件数量有上限，结果按文件顺序逐个产出，内存占用与文件总数无关。
+"""
+import glob
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from dictquerier.core import compile_query
+from dictquerier.serialization import AUTO, get_backend, loads_lazy, loads_msgpack, to_python
+
+JSON, MSGPACK = 'json', 'msgpack'
+INPUT_FORMATS = (JSON, MSGPACK)
+
+_MAGIC = re.compile(r'[*?[]')
+
+
+def is_pattern(path: str) -> bool:
+    """是否为通配符模式或目录，需要展开为多个文件"""
+    return bool(_MAGIC.search(path)) or os.path.isdir(path)
+
+
+def expand_files(patterns: Iterable[str], input_format: str = JSON) -> List[str]:
+    """
+    展开文件参数
+
+    目录展开为其中（包括子目录）对应格式扩展名的文件，通配符按glob展开（支持 **），
+    其余参数原样保留。结果按参数顺序排列，同一参数展开的文件按路径排序，重复的文件只保留第一次出现。
+
+    Args:
+        patterns (Iterable[str]): 文件路径、目录或通配符模式
+        input_format (str, optional): 文件格式，决定展开目录时的扩展名. Defaults to 'json'.
+    Returns:
+        List[str]: 文件路径
+    """
+    extension = '.msgpack' if input_format == MSGPACK else '.json'
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matched = sorted(glob.glob(os.path.join(glob.escape(pattern), '**', '*' + extension), recursive=True))
+        elif _MAGIC.search(pattern):
+            matched = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        else:
+            matched = [pattern]
+        for path in matched:
+            if path not in seen:
+                seen.add(path)
+                files.append(path)
+    return files
+
+
+def get_loader(input_format: str = JSON, lazy: bool = False, backend: str = AUTO) -> Callable[[bytes], Any]:
+    """
+    返回解码文件内容的函数
+
+    Args:
+        input_format (str, optional): 'json' 或 'msgpack'. Defaults to 'json'.
+        lazy (bool, optional): JSON是否按需解码. Defaults to False.
+        backend (str, optional): 完整解码JSON使用的后端. Defaults to 'auto'.
+    Returns:
+        Callable: 解码函数，格式错误时抛出ValueError
+    """
+    if input_format == MSGPACK:
+        return loads_msgpack
+    if lazy:
+        return loads_lazy
+    return get_backend(backend).loads
+
+
+def query_paths(data: Any, paths: List[str], convert: bool = True) -> Any:
+    """
+    在同一份数据上执行多个路径
+
+    Args:
+        data (Any): 数据
+        paths (List[str]): 查询路径
+        convert (bool, optional): 是否将结果中的视图完整转换为列表和字典，数据按需解码或为MessagePack时需要. Defaults to True.
+    Returns:
+        Any: 只有一个路径时为该路径的结果，否则为以路径为键的字典
+    """
+    finish = to_python if convert else _identity
+    if len(paths) == 1:
+        return finish(compile_query(paths[0])(data))
+    return {path: finish(compile_query(path)(data)) for path in paths}
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def query_file(file: str, paths: List[str], input_format: str = JSON, lazy: bool = False, backend: str = AUTO) -> Dict[str, Any]:
+    """
+    加载文件并执行所有路径，在工作进程中执行
+
+    Returns:
+        dict: 成功时为 {'file': 文件, 'result': 结果}，失败时为 {'file': 文件, 'error': {'type': 异常类型, 'message': 异常信息}}
+    """
+    try:
+        with open(file, 'rb') as f:
+            data = get_loader(input_format, lazy, backend)(f.read())
+        return {'file': file, 'result': query_paths(data, paths, convert=lazy or input_format == MSGPACK)}
+    except Exception as e:
+        return {'file': file, 'error': {'type': type(e).__name__, 'message': str(e)}}
+
+
+def run_batch(files: List[str], paths: List[str], workers: Optional[int] = None, window: Optional[int] = None,
+              input_format: str = JSON, lazy: bool = False, backend: str = AUTO) -> Iterator[Dict[str, Any]]:
+    """
+    并行查询多个文件，按文件顺序产出结果
+
+    Args:
+        files (List[str]): 文件路径
+        paths (List[str]): 查询路径
+        workers (int, optional): 工作进程数量，为1时在当前进程中依次处理. Defaults to CPU数量.
+        window (int, optional): 同时在途（已提交但结果尚未产出）的文件数量上限. Defaults to 工作进程数量的2倍.
+        input_format (str, optional): 文件格式. Defaults to 'json'.
+        lazy (bool, optional): JSON是否按需解码. Defaults to False.
+        backend (str, optional): 完整解码JSON使用的后端. Defaults to 'auto'.
+    Yields:
+        dict: 每个文件的结果，格式同query_file
+    """
+    # 提前编译，语法错误在启动工作进程之前抛出
+    for path in paths:
+        compile_query(path)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(files)) or 1
+    if workers == 1:
+        for file in files:
+            yield query_file(file, paths, input_format, lazy, backend)
+        return
+
+    window = max(window or workers * 2, workers)
+    remaining = iter(files)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(
+            pool.submit(query_file, file, paths, input_format, lazy, backend)
+            for file in islice(remaining, window)
+        )
+        while pending:
+            outcome = pending.popleft().result()
+            for file in islice(remaining, 1):
+                pending.append(pool.submit(query_file, file, paths, input_format, lazy, backend))
+            yield outcome
@@ -2,62 +2,152 @@
 命令行接口模块
 """
 import argparse
-import json
+import signal
 import sys
-from typing import Any, Dict, List
+from json import JSONDecodeError
+from typing import Any, Dict, List, Optional
 
-from .core import query_json
-from .exceptions import PathError
+from .core import explain, query_stream
+from .executor.streaming import ResultStream
+from .exceptions import PathError, RemoteQueryError
+from .serialization import AUTO, JsonBackend, MsgpackFormatError, available_backends, available_formats, get_backend, get_writer, to_python
+from .serialization.writers import ARROW, CSV
+from .batch import INPUT_FORMATS, JSON, MSGPACK, expand_files, get_loader, is_pattern, query_paths, run_batch
+from .server import QueryService, QueryClient, create_server
+from .server.transport import DEFAULT_HOST, DEFAULT_PORT
+from .server.client import DEFAULT_URL
 
-def parse_args():
+# 子命令，第一个参数不是子命令时按单次查询处理
+SUBCOMMANDS = ('serve', 'client')
+
+def parse_args(argv=None):
     """解析命令行参数"""
-    parser = argparse.ArgumentParser(description="dictquerier - 一个灵活的JSON路径查询工具")
-    parser.add_argument("-f", "--file", help="要查询的JSON文件路径")
-    parser.add_argument("-p", "--path", required=True, help="查询路径表达式")
+    parser = argparse.ArgumentParser(description="dictquerier - 一个灵活的JSON路径查询工具",
+                                     epilog="子命令: dictquerier serve 启动常驻查询服务，dictquerier client 向查询服务发送查询")
+    parser.add_argument("-f", "--file", action="append", metavar="FILE",
+                        help="要查询的JSON文件路径，可重复指定；目录或通配符（如 'data/*.json'）展开为多个文件，"
+                             "多个文件并行查询，每个文件输出一行 {\"file\": ..., \"result\": ...}")
+    parser.add_argument("-p", "--path", action="append", required=True,
+                        help="查询路径表达式，可重复指定，多个路径时输出以路径为键的对象")
     parser.add_argument("-i", "--input", help="直接输入的JSON字符串，与-f互斥")
     parser.add_argument("-o", "--output", help="输出文件路径，默认为标准输出")
     parser.add_argument("-c", "--compact", action="store_true", help="输出紧凑的JSON格式")
+    parser.add_argument("--explain", action="store_true", help="输出每个语法树节点的调用次数、耗时和扫描数量到标准错误")
+    parser.add_argument("--lazy", action="store_true", help="按需解码JSON，只解析查询访问到的部分，适合只查询大文档中一小部分的情况")
+    parser.add_argument("--workers", type=int, help="查询多个文件时的工作进程数量，默认为CPU数量，为1时不启动进程池")
+    parser.add_argument("--format", "--output-format", dest="output_format", choices=available_formats(), default=JSON,
+                        help="输出格式，--output-format为同义参数：json为JSON数组，jsonl为每行一个元素，csv以第一个对象的键为表头，"
+                             "arrow为Arrow IPC文件（需要安装pyarrow）；结果为列表时逐个元素求值并写出。"
+                             "查询多个文件时总是每个文件一行JSON，不支持csv和arrow")
+    parser.add_argument("--columns", type=_split_columns,
+                        help="csv和arrow输出的列，以逗号分隔，如 'id,name'，默认为第一个对象的键")
+    parser.add_argument("--input-format", choices=list(INPUT_FORMATS), default=JSON,
+                        help="-f文件的格式，msgpack直接在编码上查询，只解码访问到的值；结果总是输出为JSON")
+    _add_json_backend(parser)
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
+def parse_serve_args(argv):
+    """解析serve子命令的参数"""
+    parser = argparse.ArgumentParser(prog="dictquerier serve", description="启动常驻查询服务，预先加载文档并缓存编译后的查询")
+    parser.add_argument("-d", "--document", action="append", default=[], metavar="[NAME=]FILE",
+                        help="加载的JSON文件，可重复指定，名称默认为不带扩展名的文件名")
+    parser.add_argument("--socket", help="监听的Unix套接字路径，未指定时使用本机HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"HTTP监听地址，默认 {DEFAULT_HOST}")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"HTTP监听端口，默认 {DEFAULT_PORT}")
+    parser.add_argument("--load-on-demand", action="store_true", help="允许客户端按文件路径加载未预先加载的文档")
+    parser.add_argument("--index", action="store_true", help="为文档维护键位置索引，加速递归下降查询")
+    _add_json_backend(parser, "加载文档和编解码请求使用的JSON库，默认自动选择已安装的最快的库")
+    return parser.parse_args(argv)
+
+def parse_client_args(argv):
+    """解析client子命令的参数"""
+    parser = argparse.ArgumentParser(prog="dictquerier client", description="向查询服务发送查询，输出格式与单次查询相同")
+    parser.add_argument("-p", "--path", required=True, help="查询路径表达式")
+    parser.add_argument("-d", "--document", help="服务端的文档名称")
+    parser.add_argument("-f", "--file", help="服务端的文档文件路径，未指定-d时使用")
+    parser.add_argument("-o", "--output", help="输出文件路径，默认为标准输出")
+    parser.add_argument("-c", "--compact", action="store_true", help="输出紧凑的JSON格式")
+    parser.add_argument("--socket", help="查询服务的Unix套接字路径，未指定时使用HTTP")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"查询服务的HTTP地址，默认 {DEFAULT_URL}")
+    _add_json_backend(parser)
+    return parser.parse_args(argv)
 
-def main():
+def _split_columns(value: str) -> List[str]:
+    return [column.strip() for column in value.split(",") if column.strip()]
+
+def _add_json_backend(parser: argparse.ArgumentParser,
+                      help: str = "JSON解析和输出使用的库，未指定时解析使用已安装的最快的库，输出使用标准库json，保持输出格式不变"):
+    parser.add_argument("--json-backend", choices=[AUTO] + available_backends(), help=help)
+
+def _output_backend(name: Optional[str]) -> JsonBackend:
+    """获取输出使用的JSON后端，未通过--json-backend指定时使用标准库，第三方库的紧凑输出不含空格"""
+    return get_backend(name if name is not None else JsonBackend.name)
+
+def main(argv=None):
     """主入口函数"""
-    args = parse_args()
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'serve':
+        return serve_main(argv[1:])
+    if argv and argv[0] == 'client':
+        return client_main(argv[1:])
+
+    args = parse_args(argv)
+    backend = _output_backend(args.json_backend)
+    files = args.file or []
+    if len(files) > 1 or any(is_pattern(file) for file in files):
+        return batch_main(args, backend)
+    if args.explain and len(args.path) > 1:
+        print("错误: --explain 只能用于单个查询路径", file=sys.stderr)
+        sys.exit(1)
+
+    convert = args.lazy or args.input_format == MSGPACK
+    loads = get_loader(args.input_format, args.lazy, args.json_backend)
     
-    # 获取输入数据
+    # 获取输入数据，解码错误（包括非UTF-8编码）都是ValueError
     data = None
-    if args.file:
+    if files:
         try:
-            with open(args.file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(files[0], "rb") as f:
+                data = loads(f.read())
         except FileNotFoundError:
-            print(f"错误: 找不到文件 '{args.file}'", file=sys.stderr)
+            print(f"错误: 找不到文件 '{files[0]}'", file=sys.stderr)
             sys.exit(1)
-        except json.JSONDecodeError:
-            print(f"错误: 文件 '{args.file}' 不是有效的JSON格式", file=sys.stderr)
+        except ValueError:
+            print(f"错误: 文件 '{files[0]}' 不是有效的{_format_name(args)}格式", file=sys.stderr)
             sys.exit(1)
+    elif args.input_format == MSGPACK:
+        print("错误: MessagePack数据只能通过-f参数读取", file=sys.stderr)
+        sys.exit(1)
     elif args.input:
         try:
-            data = json.loads(args.input)
-        except json.JSONDecodeError:
+            data = loads(args.input)
+        except ValueError:
             print("错误: 输入的字符串不是有效的JSON格式", file=sys.stderr)
             sys.exit(1)
     else:
         print("错误: 必须提供JSON数据（通过-f或-i参数）", file=sys.stderr)
         sys.exit(1)
     
-    # 执行查询
+    # 执行查询，多个路径时输出以路径为键的对象
     try:
-        result = query_json(data, args.path)
-        
-        # 输出结果
-        indent = None if args.compact else 2
-        if args.output:
-            with open(args.output, "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=indent)
+        if args.explain:
+            plan = explain(data, args.path[0])
+            print(plan.render(), file=sys.stderr)
+            result = plan.result
+        elif len(args.path) == 1:
+            # 结果为列表时在写出的过程中逐个元素求值，不构造完整的结果列表
+            result = query_stream(data, args.path[0])
         else:
-            print(json.dumps(result, ensure_ascii=False, indent=indent))
+            result = query_paths(data, args.path, convert=False)
+        
+        _write_stream(result, args, backend, to_python if convert else None)
             
+    except (JSONDecodeError, MsgpackFormatError) as e:
+        # 按需解码时，查询访问到的部分才会被解析
+        print(f"错误: {_format_name(args)}数据格式错误: {e}", file=sys.stderr)
+        sys.exit(1)
     except PathError as e:
         print(f"查询路径错误: {e}", file=sys.stderr)
         sys.exit(1)
@@ -68,5 +158,126 @@ def main():
         print(f"发生错误: {e}", file=sys.stderr)
         sys.exit(1)
 
+def batch_main(args: argparse.Namespace, backend):
+    """查询多个文件，每个文件输出一行JSON，顺序与文件顺序一致"""
+    if args.explain:
+        print("错误: --explain 只能用于单个文件", file=sys.stderr)
+        sys.exit(1)
+    if args.output_format in (CSV, ARROW):
+        print(f"错误: 查询多个文件时不支持{args.output_format}输出", file=sys.stderr)
+        sys.exit(1)
+    files = expand_files(args.file, args.input_format)
+    if not files:
+        print("错误: 没有匹配的文件", file=sys.stderr)
+        sys.exit(1)
+
+    failed = 0
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        outcomes = run_batch(files, args.path, args.workers, input_format=args.input_format,
+                             lazy=args.lazy, backend=args.json_backend)
+        for outcome in outcomes:
+            if 'error' in outcome:
+                failed += 1
+            out.write(backend.dumpb(outcome) + b"\n")
+            # 逐行输出，下游可以在全部文件处理完之前开始读取
+            out.flush()
+    except PathError as e:
+        print(f"查询路径错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    except SyntaxError as e:
+        print(f"查询语法错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.output:
+            out.close()
+    if failed:
+        print(f"错误: {failed}/{len(files)} 个文件查询失败", file=sys.stderr)
+        sys.exit(1)
+
+def _format_name(args: argparse.Namespace) -> str:
+    return "MessagePack" if args.input_format == MSGPACK else "JSON"
+
+def _write_stream(result: Any, args: argparse.Namespace, backend, convert=None):
+    """按-o、-c和--format参数逐个元素写出查询结果"""
+    indent = None if args.compact else 2
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        writer = get_writer(args.output_format, out, backend, indent, convert, args.columns)
+        if isinstance(result, ResultStream):
+            writer.write_stream(result)
+        else:
+            writer.write(result)
+        if args.output_format == JSON and not args.output:
+            out.write(b"\n")
+    finally:
+        if args.output:
+            out.close()
+        else:
+            out.flush()
+
+def _write_result(result: Any, args: argparse.Namespace, backend):
+    """按-o和-c参数输出查询结果"""
+    indent = None if args.compact else 2
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(backend.dumpb(result, indent))
+    else:
+        print(backend.dumps(result, indent))
+
+def serve_main(argv: List[str]):
+    """serve子命令入口"""
+    args = parse_serve_args(argv)
+    service = QueryService(args.json_backend, load_on_demand=args.load_on_demand, index=args.index)
+    for spec in args.document:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            name, path = None, spec
+        try:
+            served = service.add(path, name)
+        except FileNotFoundError:
+            print(f"错误: 找不到文件 '{path}'", file=sys.stderr)
+            sys.exit(1)
+        except ValueError:
+            print(f"错误: 文件 '{path}' 不是有效的JSON格式", file=sys.stderr)
+            sys.exit(1)
+        print(f"已加载文档 {served.name}: {served.path}", file=sys.stderr)
+
+    try:
+        server = create_server(service, args.socket, args.host, args.port)
+    except OSError as e:
+        print(f"错误: 无法启动查询服务: {e}", file=sys.stderr)
+        sys.exit(1)
+    address = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"查询服务已启动: {address}", file=sys.stderr)
+    # 收到终止信号时同样关闭服务器，删除Unix套接字文件
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def client_main(argv: List[str]):
+    """client子命令入口"""
+    args = parse_client_args(argv)
+    backend = _output_backend(args.json_backend)
+    try:
+        with QueryClient(args.socket, args.url, args.json_backend) as client:
+            result = client.query(args.path, document=args.document, file=args.file)
+    except RemoteQueryError as e:
+        if e.error_type == PathError.__name__:
+            print(f"查询路径错误: {e}", file=sys.stderr)
+        elif e.error_type == SyntaxError.__name__:
+            print(f"查询语法错误: {e}", file=sys.stderr)
+        else:
+            print(f"发生错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"错误: 无法连接查询服务: {e}", file=sys.stderr)
+        sys.exit(1)
+    _write_result(result, args, backend)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
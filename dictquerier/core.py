@@ -1,15 +1,33 @@
 """
 核心查询功能
 """
-from typing import Any, Union, List, Dict
+import functools
+from typing import Any, Union, List, Dict, Optional
 from dictquerier.tokenizer.lexer import Lexer
 from dictquerier.syntax_tree.parser import Parser
+from dictquerier.syntax_tree.node import ASTNode, collect_parameters
 from dictquerier.executor.evaluator import Evaluator
+from dictquerier.executor.profiler import ProfilingEvaluator, QueryPlan
+from dictquerier.executor.status import StatusEvaluator, QueryResult, ERROR
+from dictquerier.executor.streaming import StreamingEvaluator, ResultStream
+from dictquerier.executor.index import KeyIndex
+from dictquerier.optimizer.reorder import PredicateReorderer, reorder_predicates
+from dictquerier.script.manager import script_manager
+from dictquerier.instrumentation.manager import instrumentation, result_size
+from dictquerier.exceptions import ParameterError
+
+# 编译结果缓存的最大条目数
+COMPILE_CACHE_SIZE = 512
 
 def query_json(
     data: Union[Dict, List], 
     path: str, 
     no_path_exception: bool = False,
+    optimize: bool = False,
+    adaptive: bool = False,
+    key_index: Optional[KeyIndex] = None,
+    views: bool = False,
+    params: Optional[Dict[str, Any]] = None,
 ) -> Any:
     r"""查询json数据
 
@@ -17,29 +35,290 @@ def query_json(
         data (Union[Dict, List]): 需要查询的json结构
         path (str): 查询路径语句
         no_path_exception (bool, optional): 关闭报错，该项设置为True时，查询出错不会产生报错，而是返回空列表[]. Defaults to False.
+        optimize (bool, optional): 按估算代价和选择率重排过滤条件中的 && / || 操作数，只交换不会抛出异常的操作数，不改变结果和异常. Defaults to False.
+        adaptive (bool, optional): 在optimize的基础上，执行时根据观测到的选择率动态调整操作数顺序. Defaults to False.
+        key_index (KeyIndex, optional): 由data构建的键位置索引，递归下降(..key)查询会使用索引避免遍历整棵树. Defaults to None.
+        views (bool, optional): 切片和列表投影返回引用原始数据的只读视图而不复制，视图可通过materialize()转换为列表. Defaults to False.
+        params (Dict[str, Any], optional): 绑定参数的值，{参数名: 值}，对应路径中的 :参数名. Defaults to None.
 
     Returns:
         Any: 查询结果
     """
-    try:
-        # 词法分析
+    if no_path_exception:
+        # 使用结果状态模式执行，执行中的错误不经过异常处理
+        status = query_status(data, path, optimize, adaptive, key_index, views, params)
+        return status.value if status.ok else []
+
+    with instrumentation.span('query', path) as event:
+        ast_root = _build_ast(path, optimize, adaptive)
+        result = _evaluate(ast_root, data, path, key_index, views, params)
+        
+        if event:
+            event.result_size = result_size(result)
+        return result
+
+def query_status(
+    data: Union[Dict, List], 
+    path: str, 
+    optimize: bool = False,
+    adaptive: bool = False,
+    key_index: Optional[KeyIndex] = None,
+    views: bool = False,
+    params: Optional[Dict[str, Any]] = None,
+) -> QueryResult:
+    r"""以结果状态模式查询json数据，查询出错时不抛出异常，而是返回带错误类型和位置的结果
+
+    路径缺失和过滤条件中的类型不匹配在执行时按类型判断，不会触发Python异常，
+    适合对大量字段稀疏的文档批量执行查询。参数同query_json。
+
+    Returns:
+        QueryResult: 查询结果，status为 'ok'、'missing'（结果为None）或错误类型，
+            可通过 raise_for_status() 按抛出异常模式处理
+    """
+    with instrumentation.span('query', path) as event:
+        try:
+            ast_root = _build_ast(path, optimize, adaptive)
+        except Exception as e:
+            status = QueryResult(status=ERROR, message=str(e), error=e)
+        else:
+            status = _evaluate_status(ast_root, data, path, key_index, views, params)
+        
+        if event:
+            _record_status(event, status)
+        return status
+
+def query_stream(
+    data: Union[Dict, List], 
+    path: str, 
+    optimize: bool = False,
+    adaptive: bool = False,
+    key_index: Optional[KeyIndex] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> ResultStream:
+    r"""以流的方式查询json数据，结果为列表时在迭代时逐个求值元素
+
+    查询在迭代结果的过程中执行，执行中的错误在迭代时抛出。参数同query_json。
+
+    Returns:
+        ResultStream: 流式结果，结果为列表时items为元素迭代器，否则value为结果；
+            迭代器没有产出元素时，empty_value()为列表方式下的结果（[]或None）
+    """
+    ast_root = _build_ast(path, optimize, adaptive)
+    return StreamingEvaluator(data, key_index, params=params).query_stream(ast_root)
+
+def explain(
+    data: Union[Dict, List], 
+    path: str, 
+    optimize: bool = False,
+    adaptive: bool = False,
+    key_index: Optional[KeyIndex] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> QueryPlan:
+    r"""执行查询并统计每个AST节点的执行情况
+
+    Args:
+        data (Union[Dict, List]): 需要查询的json结构
+        path (str): 查询路径语句
+        optimize (bool, optional): 是否重排过滤条件，同query_json. Defaults to False.
+        adaptive (bool, optional): 是否自适应重排过滤条件，同query_json. Defaults to False.
+        key_index (KeyIndex, optional): 键位置索引，同query_json. Defaults to None.
+        params (Dict[str, Any], optional): 绑定参数的值，同query_json. Defaults to None.
+
+    Returns:
+        QueryPlan: 查询计划分析结果，包含查询结果和每个节点的调用次数、耗时、扫描和匹配数量
+    """
+    ast_root = _build_ast(path, optimize, adaptive)
+    evaluator = ProfilingEvaluator(data, key_index, params)
+    result = evaluator.query(ast_root)
+    return QueryPlan(ast_root, result, evaluator.stats)
+
+class CompiledQuery:
+    """
+    预编译的查询，词法和语法分析只在编译时执行一次
+
+    Attributes:
+        path (str): 查询路径语句
+        ast (ASTNode): 抽象语法树根节点
+        optimize (bool): 是否重排了过滤条件
+        adaptive (bool): 是否使用自适应重排
+        parameters (FrozenSet[str]): 查询中绑定参数的名称
+    """
+    def __init__(self, path: str, ast: ASTNode, optimize: bool = False, adaptive: bool = False):
+        self.path = path
+        self.ast = ast
+        self.optimize = optimize
+        self.adaptive = adaptive
+        self.parameters = collect_parameters(ast)
+        # (脚本版本, 是否确定)，纯函数标记只会随脚本版本变化，避免每次查询都遍历AST
+        self._deterministic = (-1, False)
+
+    @property
+    def key(self):
+        """查询的唯一标识，用于缓存"""
+        return (self.path, self.optimize, self.adaptive)
+
+    def is_deterministic(self) -> bool:
+        """
+        检查查询结果是否只取决于文档、变量和脚本注册状态
+
+        查询中的所有脚本调用都被标记为纯函数（script_manager.register(pure=True)或mark_pure）时返回True。
+        结果按脚本版本缓存，脚本注册状态不变时不会重复遍历AST
+        """
+        version, deterministic = self._deterministic
+        if version != script_manager.version:
+            version = script_manager.version
+            deterministic = PredicateReorderer.is_pure(self.ast)
+            self._deterministic = (version, deterministic)
+        return deterministic
+
+    def bind(self, params: Optional[Dict[str, Any]] = None, **bindings: Any) -> Dict[str, Any]:
+        """
+        检查并合并绑定参数
+
+        Args:
+            params (Dict[str, Any], optional): 绑定参数的值. Defaults to None.
+            **bindings: 以关键词形式给出的绑定参数，与params中的同名参数冲突时优先
+        Returns:
+            Dict[str, Any]: 合并后的绑定参数
+        Raises:
+            ParameterError: 有参数未绑定，或绑定了查询中不存在的参数
+        """
+        values = dict(params) if params else {}
+        values.update(bindings)
+        missing = self.parameters.difference(values)
+        if missing:
+            raise ParameterError(f"查询 {self.path!r} 的参数未绑定: {', '.join(sorted(missing))}")
+        unknown = set(values).difference(self.parameters)
+        if unknown:
+            raise ParameterError(f"查询 {self.path!r} 中不存在参数: {', '.join(sorted(unknown))}")
+        return values
+
+    def __call__(
+        self,
+        data: Union[Dict, List],
+        key_index: Optional[KeyIndex] = None,
+        views: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+        **bindings: Any,
+    ) -> Any:
+        """
+        在数据上执行查询
+
+        Args:
+            data (Union[Dict, List]): 需要查询的json结构
+            key_index (KeyIndex, optional): 由data构建的键位置索引. Defaults to None.
+            views (bool, optional): 切片和列表投影返回只读视图，同query_json. Defaults to False.
+            params (Dict[str, Any], optional): 绑定参数的值，参数名与key_index等参数冲突时使用. Defaults to None.
+            **bindings: 绑定参数的值，如 compile_query("users['id'==:uid]")(data, uid=5)
+        Returns:
+            Any: 查询结果
+        """
+        values = self.bind(params, **bindings)
+        with instrumentation.span('query', self.path) as event:
+            result = _evaluate(self.ast, data, self.path, key_index, views, values)
+            if event:
+                event.result_size = result_size(result)
+            return result
+
+    def query_status(
+        self,
+        data: Union[Dict, List],
+        key_index: Optional[KeyIndex] = None,
+        views: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+        **bindings: Any,
+    ) -> QueryResult:
+        """
+        以结果状态模式在数据上执行查询，参数同__call__，查询出错时不抛出异常
+
+        Returns:
+            QueryResult: 带状态的查询结果
+        Raises:
+            ParameterError: 绑定参数与查询不一致
+        """
+        values = self.bind(params, **bindings)
+        with instrumentation.span('query', self.path) as event:
+            status = _evaluate_status(self.ast, data, self.path, key_index, views, values)
+            if event:
+                _record_status(event, status)
+            return status
+
+    def __repr__(self) -> str:
+        return f"CompiledQuery({self.path!r})"
+
+def compile_query(path: str, optimize: bool = False, adaptive: bool = False) -> CompiledQuery:
+    r"""编译查询路径语句，相同参数的编译结果会被缓存复用
+
+    Args:
+        path (str): 查询路径语句
+        optimize (bool, optional): 是否重排过滤条件，同query_json. Defaults to False.
+        adaptive (bool, optional): 是否自适应重排过滤条件，同query_json. Defaults to False.
+
+    Returns:
+        CompiledQuery: 可重复执行的查询
+    """
+    return _compile_cached(path, optimize, adaptive)
+
+@functools.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_cached(path: str, optimize: bool, adaptive: bool) -> CompiledQuery:
+    return CompiledQuery(path, _build_ast(path, optimize, adaptive), optimize, adaptive)
+
+def _evaluate(
+    ast_root: ASTNode,
+    data: Any,
+    path: str,
+    key_index: Optional[KeyIndex] = None,
+    views: bool = False,
+    params: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """执行AST并记录执行阶段埋点"""
+    with instrumentation.span('evaluate', path) as event:
+        evaluator = Evaluator(data, key_index, views, params)
+        result = evaluator.query(ast_root)
+        if event:
+            event.result_size = result_size(result)
+    return result
+
+def _evaluate_status(
+    ast_root: ASTNode,
+    data: Any,
+    path: str,
+    key_index: Optional[KeyIndex] = None,
+    views: bool = False,
+    params: Optional[Dict[str, Any]] = None,
+) -> QueryResult:
+    """以结果状态模式执行AST并记录执行阶段埋点"""
+    with instrumentation.span('evaluate', path) as event:
+        status = StatusEvaluator(data, key_index, views, params).query_status(ast_root)
+        if event:
+            _record_status(event, status)
+    return status
+
+def _record_status(event, status: QueryResult):
+    if status.ok:
+        event.result_size = result_size(status.value)
+    else:
+        event.error_type = status.error_type
+
+def _build_ast(path: str, optimize: bool = False, adaptive: bool = False) -> ASTNode:
+    """将查询路径语句解析为AST，并按需进行优化"""
+    # 词法分析
+    with instrumentation.span('lex', path) as event:
         lexer = Lexer(path)
         tokens = list(lexer.tokenize())
-        
-        # 语法分析
+        if event:
+            event.result_size = len(tokens)
+    
+    # 语法分析
+    with instrumentation.span('parse', path):
         parser = Parser(tokens)
         ast_root = parser.parse()
-        
-        # 执行查询
-        evaluator = Evaluator(data)
-        result = evaluator.query(ast_root)
-        
-        return result
     
-    except Exception as e:
-        if no_path_exception:
-            return []
-        raise e
+    # 查询优化
+    if optimize or adaptive:
+        ast_root = reorder_predicates(ast_root, adaptive=adaptive)
+    
+    return ast_root
 
 def flatten_list(nested_list):
     """
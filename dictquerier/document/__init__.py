@@ -0,0 +1,12 @@
+"""
+文档句柄模块
+
+提供了带版本号和查询结果缓存的文档句柄、支持常驻查询增量重算的文档句柄，以及供多进程查询的共享内存文档
+"""
+
+from dictquerier.document.cache import ResultCache, estimate_size
+from dictquerier.document.handle import Document
+from dictquerier.document.tracked import TrackedDocument, StandingQuery
+from dictquerier.document.shared import SharedDocument
+
+__all__ = ['Document', 'TrackedDocument', 'StandingQuery', 'SharedDocument', 'ResultCache', 'estimate_size']
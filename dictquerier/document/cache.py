@@ -0,0 +1,151 @@
+import sys
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# 表示缓存未命中的哨兵对象，缓存的结果本身可能为None
+MISSING = object()
+
+# estimate_size中元素较多的容器的抽样个数
+SAMPLE_SIZE = 64
+
+
+def estimate_size(value: Any, limit: Optional[int] = None) -> int:
+    """
+    估算对象占用的内存字节数，包含所有嵌套的字典和列表
+
+    使用显式栈迭代遍历，同一个对象只计算一次。元素超过SAMPLE_SIZE个的容器只按固定间隔抽取
+    SAMPLE_SIZE个元素遍历，再按元素个数放大，因此估算耗时只取决于结果的嵌套层数，与列表长度无关
+
+    Args:
+        value: 要估算的对象
+        limit (int, optional): 估算值超过该上限时立即返回，调用方只需要知道结果超出预算. Defaults to None.
+    Returns:
+        int: 估算的字节数
+    """
+    total = 0.0
+    seen = set()
+    # 栈中元素为(对象, 权重)，权重为抽样遍历的对象所代表的对象个数
+    stack = [(value, 1.0)]
+    while stack:
+        current, weight = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current) * weight
+        if limit is not None and total > limit:
+            break
+        if isinstance(current, dict):
+            if len(current) > SAMPLE_SIZE:
+                items = list(itertools.islice(current.items(), SAMPLE_SIZE))
+                weight *= len(current) / SAMPLE_SIZE
+            else:
+                items = current.items()
+            for key, item in items:
+                stack.append((key, weight))
+                stack.append((item, weight))
+        elif isinstance(current, (list, tuple)):
+            if len(current) > SAMPLE_SIZE:
+                items = current[::len(current) // SAMPLE_SIZE][:SAMPLE_SIZE]
+                weight *= len(current) / len(items)
+            else:
+                items = current
+            stack.extend((item, weight) for item in items)
+    return int(total)
+
+
+class ResultCache:
+    """
+    查询结果缓存，同时按条目数和字节预算进行LRU淘汰
+
+    Args:
+        max_entries (int, optional): 最大条目数. Defaults to 256.
+        max_bytes (int, optional): 所有结果估算大小之和的上限. Defaults to 64MB.
+    """
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'rejected': 0,
+        }
+
+    def get(self, key: Hashable) -> Any:
+        """
+        获取缓存结果
+
+        Returns:
+            缓存的结果，未命中时返回MISSING
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> bool:
+        """
+        写入缓存，超出预算时淘汰最久未使用的条目
+
+        Args:
+            key (Hashable): 缓存键
+            value: 查询结果
+            size (int, optional): 结果大小，未指定时自动估算
+        Returns:
+            bool: 是否写入成功，单个结果超过字节预算时不会被缓存
+        """
+        if size is None:
+            size = estimate_size(value, self.max_bytes)
+        with self._lock:
+            if size > self.max_bytes or self.max_entries <= 0:
+                self._stats['rejected'] += 1
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+            return True
+
+    def clear(self):
+        """清空缓存，统计数据保留"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 包含命中、未命中、淘汰、拒绝次数以及当前条目数和字节数的字典
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0
+        return stats
+
+    def reset_stats(self):
+        """重置统计计数器"""
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
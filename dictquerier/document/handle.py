@@ -0,0 +1,203 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from dictquerier.core import compile_query
+from dictquerier.executor.index import KeyIndex
+from dictquerier.document.cache import MISSING, ResultCache
+from dictquerier.script.manager import script_manager
+from dictquerier.exceptions import PathError
+
+
+class Document:
+    """
+    文档句柄，为同一份数据上的重复查询提供结果缓存
+
+    查询结果按 (文档版本, 脚本版本, 编译后的查询) 缓存。通过句柄的修改方法
+    (set/append/delete/replace) 或显式调用bump修改文档时版本号递增，旧的缓存随之失效；
+    直接修改data属性不会被感知，需要手动调用bump。
+
+    包含未标记为纯函数的脚本调用的查询不会被缓存。缓存的结果在多次查询之间共享，调用方不应修改返回值。
+
+    Args:
+        data (Union[Dict, List]): 文档数据
+        cache_size (int, optional): 缓存的最大条目数. Defaults to 256.
+        cache_bytes (int, optional): 缓存结果的字节预算. Defaults to 64MB.
+        index (bool, optional): 是否为递归下降查询维护键位置索引. Defaults to False.
+    """
+    def __init__(self, data: Union[Dict, List], cache_size: int = 256, cache_bytes: int = 64 * 1024 * 1024, index: bool = False):
+        self.data = data
+        self.version = 0
+        self.cache = ResultCache(cache_size, cache_bytes)
+        self.use_index = index
+        self._key_index: Optional[KeyIndex] = None
+        self._key_index_version = -1
+        self._uncacheable = 0
+        self._lock = threading.RLock()
+
+    @property
+    def key_index(self) -> Optional[KeyIndex]:
+        """当前版本文档的键位置索引，未开启索引时为None"""
+        if not self.use_index:
+            return None
+        with self._lock:
+            if self._key_index is None or self._key_index_version != self.version:
+                self._key_index = KeyIndex(self.data)
+                self._key_index_version = self.version
+            return self._key_index
+
+    def query(self, path: str, optimize: bool = False, adaptive: bool = False, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        查询文档，优先返回缓存结果
+
+        Args:
+            path (str): 查询路径语句
+            optimize (bool, optional): 是否重排过滤条件，同query_json. Defaults to False.
+            adaptive (bool, optional): 是否自适应重排过滤条件，同query_json. Defaults to False.
+            params (Dict[str, Any], optional): 绑定参数的值，同query_json. Defaults to None.
+        Returns:
+            Any: 查询结果
+        """
+        compiled = compile_query(path, optimize, adaptive)
+        params = compiled.bind(params)
+        params_key = self._params_key(params)
+        if params_key is None or not compiled.is_deterministic():
+            self._uncacheable += 1
+            return compiled(self.data, self.key_index, params=params)
+
+        version = self.version
+        cache_key = (version, script_manager.version, compiled.key, params_key)
+        result = self.cache.get(cache_key)
+        if result is not MISSING:
+            return result
+
+        result = compiled(self.data, self.key_index, params=params)
+        # 执行期间文档被修改时不写入缓存
+        if version == self.version:
+            self.cache.put(cache_key, result)
+        return result
+
+    @staticmethod
+    def _params_key(params: Dict[str, Any]) -> Optional[tuple]:
+        """绑定参数的缓存键，参数值不可哈希时返回None"""
+        # 包含值的类型，避免 1 与 True、1.0 共用缓存
+        key = tuple((name, type(value), value) for name, value in sorted(params.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def bump(self) -> int:
+        """
+        递增文档版本号并清空缓存，用于直接修改data之后
+
+        Returns:
+            int: 新的版本号
+        """
+        with self._lock:
+            self.version += 1
+            self.cache.clear()
+            return self.version
+
+    def replace(self, data: Union[Dict, List]) -> int:
+        """替换整个文档，返回新的版本号"""
+        with self._lock:
+            self.data = data
+            return self.bump()
+
+    def get(self, keys: Sequence[Union[str, int]]) -> Any:
+        """
+        按键序列获取值
+
+        Args:
+            keys (Sequence[Union[str, int]]): 从根开始的键或索引序列，如 ['users', 0, 'name']
+        Returns:
+            Any: 对应的值
+        """
+        current = self.data
+        for key in keys:
+            current = self._child(current, key, keys)
+        return current
+
+    def set(self, keys: Sequence[Union[str, int]], value: Any) -> int:
+        """
+        按键序列设置值
+
+        Args:
+            keys (Sequence[Union[str, int]]): 从根开始的键或索引序列，不能为空
+            value: 新的值
+        Returns:
+            int: 新的版本号
+        """
+        with self._lock:
+            parent, key = self._parent(keys)
+            if isinstance(parent, list) and isinstance(key, int) and key == len(parent):
+                parent.append(value)
+            else:
+                self._check_key(parent, key, keys, allow_new=isinstance(parent, dict))
+                parent[key] = value
+            return self.bump()
+
+    def append(self, keys: Sequence[Union[str, int]], value: Any) -> int:
+        """
+        向键序列指向的列表追加元素
+
+        Args:
+            keys (Sequence[Union[str, int]]): 指向列表的键或索引序列，为空时表示根节点
+            value: 追加的元素
+        Returns:
+            int: 新的版本号
+        """
+        with self._lock:
+            target = self.get(keys)
+            if not isinstance(target, list):
+                raise PathError(f"路径 {list(keys)} 指向的值不是列表")
+            target.append(value)
+            return self.bump()
+
+    def delete(self, keys: Sequence[Union[str, int]]) -> int:
+        """
+        删除键序列指向的键或元素
+
+        Args:
+            keys (Sequence[Union[str, int]]): 从根开始的键或索引序列，不能为空
+        Returns:
+            int: 新的版本号
+        """
+        with self._lock:
+            parent, key = self._parent(keys)
+            self._check_key(parent, key, keys)
+            del parent[key]
+            return self.bump()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 在ResultCache统计的基础上增加文档版本号和不可缓存的查询次数
+        """
+        stats = self.cache.get_stats()
+        stats['version'] = self.version
+        stats['uncacheable'] = self._uncacheable
+        return stats
+
+    def _parent(self, keys: Sequence[Union[str, int]]):
+        if not keys:
+            raise PathError("键序列不能为空")
+        return self.get(keys[:-1]), keys[-1]
+
+    def _child(self, current: Any, key: Union[str, int], keys: Sequence[Union[str, int]]) -> Any:
+        self._check_key(current, key, keys)
+        return current[key]
+
+    @staticmethod
+    def _check_key(container: Any, key: Union[str, int], keys: Sequence[Union[str, int]], allow_new: bool = False):
+        """检查键或索引在容器中是否存在"""
+        if isinstance(container, dict):
+            if allow_new or key in container:
+                return
+        elif isinstance(container, list):
+            if isinstance(key, int) and -len(container) <= key < len(container):
+                return
+        raise PathError(f"路径 {list(keys)} 中的 {key!r} 不存在")
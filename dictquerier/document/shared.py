@@ -0,0 +1,127 @@
+"""
+共享内存文档
+
+文档以紧凑二进制编码（见 dictquerier.serialization.packed）发布到 multiprocessing.shared_memory，
+多个工作进程直接在共享内存上查询，只解码查询访问到的节点，不需要每个进程各自持有一份文档。
+
+SharedDocument 可以直接作为参数传给进程池：序列化时只传递共享内存的名称，工作进程在反序列化时连接，
+同一进程中对同一文档只连接一次。
+"""
+import sys
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Union
+
+from dictquerier.core import compile_query
+from dictquerier.executor.views import to_python
+from dictquerier.serialization.packed import pack, root
+
+# 当前进程已连接的共享内存文档，按名称复用
+_attached: Dict[str, 'SharedDocument'] = {}
+
+
+class SharedDocument:
+    """
+    共享内存中的只读文档
+
+    通过publish创建（发布者负责在不再使用时调用unlink释放共享内存），通过attach或反序列化连接。
+
+    Attributes:
+        name (str): 共享内存名称
+        root (Any): 文档根节点，容器为按需解码的只读视图
+        owner (bool): 是否为发布者
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self._shm = shm
+        self._buf = shm.buf
+        self.name = shm.name
+        self.owner = owner
+        self.root = root(self._buf)
+
+    @classmethod
+    def publish(cls, data: Union[Dict, List], name: Optional[str] = None) -> 'SharedDocument':
+        """
+        编码文档并发布到共享内存
+
+        Args:
+            data (Union[Dict, List]): 文档数据
+            name (str, optional): 共享内存名称，默认随机生成. Defaults to None.
+        Returns:
+            SharedDocument: 发布者持有的文档
+        """
+        payload = pack(data)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(payload))
+        try:
+            shm.buf[:len(payload)] = payload
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        document = cls(shm, owner=True)
+        _attached[document.name] = document
+        return document
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedDocument':
+        """
+        连接已发布的文档，同一进程中重复连接时返回同一个对象
+
+        Args:
+            name (str): 共享内存名称
+        Returns:
+            SharedDocument: 文档
+        """
+        document = _attached.get(name)
+        if document is None:
+            if sys.version_info >= (3, 13):
+                # 连接者不应在退出时释放发布者的共享内存
+                shm = shared_memory.SharedMemory(name=name, track=False)
+            else:
+                shm = shared_memory.SharedMemory(name=name)
+            document = _attached[name] = cls(shm)
+        return document
+
+    @property
+    def size(self) -> int:
+        """共享内存的字节数"""
+        return self._shm.size
+
+    def query(self, path: str, optimize: bool = False, adaptive: bool = False, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        查询文档
+
+        Args:
+            path (str): 查询路径语句
+            optimize (bool, optional): 是否重排过滤条件，同query_json. Defaults to False.
+            adaptive (bool, optional): 是否自适应重排过滤条件，同query_json. Defaults to False.
+            params (Dict[str, Any], optional): 绑定参数的值，同query_json. Defaults to None.
+        Returns:
+            Any: 查询结果，已完整解码为普通的列表和字典，不引用共享内存
+        """
+        return to_python(compile_query(path, optimize, adaptive)(self.root, params=params))
+
+    def close(self):
+        """断开当前进程与共享内存的连接，之后不能再查询"""
+        if _attached.get(self.name) is self:
+            del _attached[self.name]
+        self.root = None
+        self._buf.release()
+        self._shm.close()
+
+    def unlink(self):
+        """释放共享内存，只应由发布者在所有工作进程结束后调用"""
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def __reduce__(self):
+        # 传给其他进程时只传递名称
+        return (SharedDocument.attach, (self.name,))
+
+    def __repr__(self) -> str:
+        return f"SharedDocument({self.name!r}, size={self.size})"
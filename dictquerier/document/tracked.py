@@ -0,0 +1,184 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from dictquerier.core import CompiledQuery, compile_query
+from dictquerier.document.handle import Document
+from dictquerier.executor.tracking import Dependencies, TrackingEvaluator
+from dictquerier.exceptions import PathError
+
+
+class StandingQuery:
+    """
+    常驻查询
+
+    Attributes:
+        query (CompiledQuery): 编译后的查询
+        result: 最近一次的查询结果
+        error (Exception): 最近一次查询抛出的异常，没有异常时为None
+        evaluations (int): 执行次数
+        callback (Callable): 查询被重新执行后的回调，参数为StandingQuery
+        params (Dict[str, Any]): 绑定参数的值，每次执行都使用相同的参数
+    """
+    def __init__(
+        self,
+        query: CompiledQuery,
+        callback: Optional[Callable[['StandingQuery'], None]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ):
+        self.query = query
+        self.callback = callback
+        self.params: Dict[str, Any] = params or {}
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.evaluations = 0
+        self._dependencies: Optional[Dependencies] = None
+
+    @property
+    def path(self) -> str:
+        return self.query.path
+
+    def __repr__(self) -> str:
+        return f"StandingQuery({self.path!r}, evaluations={self.evaluations})"
+
+
+class TrackedDocument(Document):
+    """
+    带常驻查询的文档句柄
+
+    每个常驻查询执行时记录其读取过的容器和键。通过set/append/delete修改文档时，
+    只重新执行依赖被修改位置的查询，其余查询复用之前的结果，使每次更新的开销与修改的规模而不是文档的规模成正比。
+
+    包含未标记为纯函数的脚本调用的查询在每次修改后都会重新执行。直接修改data或变量之后，需要调用refresh重新执行所有查询。
+    """
+    def __init__(self, data: Union[Dict, List], **kwargs):
+        super().__init__(data, **kwargs)
+        self.standing: Dict[str, StandingQuery] = {}
+        self.last_affected: List[StandingQuery] = []
+
+    def watch(
+        self,
+        path: str,
+        callback: Optional[Callable[[StandingQuery], None]] = None,
+        optimize: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+        **bindings: Any,
+    ) -> StandingQuery:
+        """
+        添加常驻查询并立即执行一次
+
+        Args:
+            path (str): 查询路径语句
+            callback (Callable, optional): 查询被重新执行后的回调，参数为StandingQuery
+            optimize (bool, optional): 是否重排过滤条件，同query_json. Defaults to False.
+            params (Dict[str, Any], optional): 绑定参数的值，参数名与callback等参数冲突时使用. Defaults to None.
+            **bindings: 绑定参数的值，如 doc.watch("users['id'==:uid].name", uid=5)
+        Returns:
+            StandingQuery: 常驻查询
+        Raises:
+            ParameterError: 有参数未绑定，或绑定了查询中不存在的参数
+        """
+        compiled = compile_query(path, optimize)
+        standing = StandingQuery(compiled, callback, compiled.bind(params, **bindings))
+        self.standing[path] = standing
+        self._evaluate(standing)
+        return standing
+
+    def unwatch(self, path: str) -> bool:
+        """移除常驻查询，返回是否移除成功"""
+        return self.standing.pop(path, None) is not None
+
+    def results(self) -> Dict[str, Any]:
+        """所有常驻查询的最新结果，{查询路径: 结果}"""
+        return {path: standing.result for path, standing in self.standing.items()}
+
+    def refresh(self) -> List[StandingQuery]:
+        """重新执行所有常驻查询"""
+        self.bump()
+        return self._reevaluate(list(self.standing.values()))
+
+    def set(self, keys: Sequence[Union[str, int]], value: Any) -> int:
+        with self._lock:
+            chain, key = self._chain(keys)
+            parent = chain[-1]
+            if isinstance(parent, list) and isinstance(key, int) and key == len(parent):
+                affected = self._affected(chain, key, shift_from=key)
+            else:
+                affected = self._affected(chain, self._normalize(parent, key))
+            version = super().set(keys, value)
+            self._reevaluate(affected)
+            return version
+
+    def append(self, keys: Sequence[Union[str, int]], value: Any) -> int:
+        with self._lock:
+            target = self.get(keys)
+            if not isinstance(target, list):
+                raise PathError(f"路径 {list(keys)} 指向的值不是列表")
+            chain = self._containers(keys) + [target]
+            affected = self._affected(chain, len(target), shift_from=len(target))
+            version = super().append(keys, value)
+            self._reevaluate(affected)
+            return version
+
+    def delete(self, keys: Sequence[Union[str, int]]) -> int:
+        with self._lock:
+            chain, key = self._chain(keys)
+            parent = chain[-1]
+            key = self._normalize(parent, key)
+            # 删除列表元素会使其后所有元素的索引改变
+            shift_from = key if isinstance(parent, list) else None
+            affected = self._affected(chain, key, shift_from)
+            version = super().delete(keys)
+            self._reevaluate(affected)
+            return version
+
+    def _evaluate(self, standing: StandingQuery):
+        evaluator = TrackingEvaluator(self.data, self.key_index, standing.params)
+        standing.evaluations += 1
+        try:
+            standing.result = evaluator.query(standing.query.ast)
+            standing.error = None
+            standing._dependencies = evaluator.dependencies
+        except Exception as e:
+            # 出错时依赖记录不完整，之后的任何修改都会触发重新执行
+            standing.result = None
+            standing.error = e
+            standing._dependencies = None
+
+    def _reevaluate(self, affected: List[StandingQuery]) -> List[StandingQuery]:
+        for standing in affected:
+            self._evaluate(standing)
+        self.last_affected = affected
+        for standing in affected:
+            if standing.callback:
+                standing.callback(standing)
+        return affected
+
+    def _affected(self, chain: List[Any], key: Union[str, int], shift_from: int = None) -> List[StandingQuery]:
+        """找出受修改影响的常驻查询"""
+        affected = []
+        for standing in self.standing.values():
+            if (standing._dependencies is None
+                    or not standing.query.is_deterministic()
+                    or standing._dependencies.affected_by(chain, key, shift_from)):
+                affected.append(standing)
+        return affected
+
+    def _containers(self, keys: Sequence[Union[str, int]]) -> List[Any]:
+        """从根开始沿键序列经过的所有容器，不包含最后一个键指向的值"""
+        chain = [self.data]
+        current = self.data
+        for key in keys[:-1] if keys else []:
+            current = self._child(current, key, keys)
+            chain.append(current)
+        return chain
+
+    def _chain(self, keys: Sequence[Union[str, int]]):
+        if not keys:
+            raise PathError("键序列不能为空")
+        return self._containers(keys), keys[-1]
+
+    @staticmethod
+    def _normalize(parent: Any, key: Union[str, int]) -> Union[str, int]:
+        """将列表的负数索引转换为正数索引"""
+        if isinstance(parent, list) and isinstance(key, int) and key < 0:
+            return key + len(parent)
+        return key
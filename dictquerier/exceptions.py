@@ -17,6 +17,17 @@ class UnknowScript(Exception):
     def __init__(self, message: str):
         super().__init__(message) 
         
+class ParameterError(Exception):
+    """绑定参数错误，如参数未绑定或绑定了查询中不存在的参数"""
+    def __init__(self, message: str):
+        super().__init__(message) 
+
+class RemoteQueryError(Exception):
+    """查询服务返回的错误，error_type为服务端异常的类型名称"""
+    def __init__(self, error_type: str, message: str):
+        super().__init__(message)
+        self.error_type = error_type
+
 class UnknownOperator(Exception):
     """未知的操作符"""
     def __init__(self, message: str):
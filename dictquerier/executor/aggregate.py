@@ -0,0 +1,73 @@
+"""
+内置流式聚合函数
+
+聚合函数以迭代器为输入，单次遍历完成计算，除 distinct 需要一个哈希集合外只占用常数内存。
+执行器在调用脚本时优先识别这些函数，跳过脚本查找流程，并把投影、过滤等路径直接作为流传入，
+不会构造中间列表。
+"""
+from typing import Any, Callable, Dict, Iterable, List
+
+
+def agg_sum(values: Iterable) -> Any:
+    """求和，空输入返回0"""
+    return sum(values)
+
+
+def agg_count(values: Iterable) -> int:
+    """计数"""
+    count = 0
+    for _ in values:
+        count += 1
+    return count
+
+
+def agg_min(values: Iterable) -> Any:
+    """最小值，与内置min一致，空输入抛出ValueError"""
+    return min(values)
+
+
+def agg_max(values: Iterable) -> Any:
+    """最大值，与内置max一致，空输入抛出ValueError"""
+    return max(values)
+
+
+def agg_avg(values: Iterable) -> Any:
+    """平均值，空输入返回None"""
+    total = 0
+    count = 0
+    for value in values:
+        total += value
+        count += 1
+    if count == 0:
+        return None
+    return total / count
+
+
+def agg_distinct(values: Iterable) -> List:
+    """去重，按首次出现的顺序返回"""
+    seen = set()
+    # 字典、列表等不可哈希的值退化为线性比较
+    unhashable = []
+    result = []
+    for value in values:
+        try:
+            if value in seen:
+                continue
+            seen.add(value)
+        except TypeError:
+            if value in unhashable:
+                continue
+            unhashable.append(value)
+        result.append(value)
+    return result
+
+
+AGGREGATIONS: Dict[str, Callable[[Iterable], Any]] = {
+    'sum': agg_sum,
+    'count': agg_count,
+    'min': agg_min,
+    'max': agg_max,
+    'avg': agg_avg,
+    'distinct': agg_distinct,
+}
+
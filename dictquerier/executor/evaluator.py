@@ -1,15 +1,44 @@
+import time
+from itertools import islice
+
 from dictquerier.executor.visitor import ASTVisitor
 from dictquerier.script.manager import script_manager
 from dictquerier.tokenizer.enum import Operator
 from dictquerier.syntax_tree.node import *
-from dictquerier.exceptions import UnknownOperator
+from dictquerier.executor.index import KeyIndex, find_recursive
+from dictquerier.executor.native import NativeFunction, native_function
+from dictquerier.executor.patterns import regex_match
+from dictquerier.executor.views import LIST_TYPES, DICT_TYPES, SequenceView, SliceView, ProjectionView, materialize
+from dictquerier.exceptions import UnknownOperator, ParameterError
 
 class Evaluator(ASTVisitor):
     """
     执行器，用于执行AST节点
     """
-    def __init__(self, data):
+    # 内置函数的第一个参数是否以流的方式求值，需要完整记录每个节点结果的子类可以关闭
+    stream_arguments = True
+    # 路径链是否按展开的步骤序列循环求值，左深的二元运算链是否沿左侧循环求值，
+    # 需要路径和运算链上每个节点都经过visit的子类可以关闭
+    flat_chains = True
+    
+    # 流式求值时记录每个投影产出的元素数量，用于还原列表方式下空投影的结果，为None时不记录
+    _projections = None
+    
+    # 路径上每一步对应的求值方法
+    _accessors = {
+        KeyNode: '_access_key',
+        IndexNode: '_access_index',
+        SliceNode: '_access_slice',
+        RecursiveKeyNode: '_access_recursive',
+    }
+
+    def __init__(self, data, key_index: KeyIndex = None, views: bool = False, params: dict = None):
         self.data = data
+        self.key_index = key_index
+        # 切片和列表投影返回零拷贝的只读视图，而不是新列表
+        self.views = views
+        # 绑定参数的值，{参数名: 值}
+        self.params = params or {}
         self.context = {}
 
     def query(self, ast_root: ASTNode):
@@ -36,7 +65,7 @@ class Evaluator(ASTVisitor):
                 return self.data
                 
             # 从数据中获取对应的值
-            if isinstance(self.data, dict) and name in self.data:
+            if isinstance(self.data, DICT_TYPES) and name in self.data:
                 return self.data[name]
             return None
         
@@ -60,7 +89,7 @@ class Evaluator(ASTVisitor):
         if 'current_item' in self.context:
             current_item = self.context['current_item']
             # 如果当前项是字典且包含该键
-            if isinstance(current_item, dict) and value in current_item:
+            if isinstance(current_item, DICT_TYPES) and value in current_item:
                 return current_item[value]
         
         # 普通字符串
@@ -82,29 +111,304 @@ class Evaluator(ASTVisitor):
         return var
 
     def visit_ScriptCallNode(self, node: ScriptCallNode):
+        # 内置函数不经过脚本查找
+        native = native_function(node)
+        if native is not None:
+            return self._call_native(native, node)
+
         # 直接获取脚本名字面量
         self.context['get_literal'] = True
         func_name = self.visit(node.name)
         module_path = ".".join([self.visit(module) for module in node.module])
             
-        # 求值所有参数
-        args = [self.visit(arg) for arg in node.args]
-        kwargs = {self.visit(key): self.visit(value) for key, value in node.kwargs.items()}
+        # 求值所有参数，脚本接收的视图参数会被转换为列表
+        args = [materialize(self.visit(arg)) for arg in node.args]
+        kwargs = {self.visit(key): materialize(self.visit(value)) for key, value in node.kwargs.items()}
+
+        return self._run_script(func_name, module_path, args, kwargs)
+
+    def _run_script(self, name: str, path: str, args: list, kwargs: dict):
+        """调用脚本"""
+        return script_manager.run(name=name, path=path, args=args, kwargs=kwargs)
+
+    def _call_native(self, native: NativeFunction, node: ScriptCallNode):
+        """
+        执行内置函数
+
+        数据源参数为列表时传入其元素，为None时按空输入处理，其他值视为只有一个元素；
+        其余参数为选项，字符串和数字按字面量处理
+        """
+        source = node.args[0]
+        options = [self._option(arg) for arg in node.args[native.sources:]]
+        
+        # @limit(@order_by(...), k) 合并为一次堆选择
+        if native.name == 'limit' and self.stream_arguments and isinstance(source, ScriptCallNode):
+            inner = native_function(source)
+            if inner is not None and inner.name == 'order_by' and len(source.args) < inner.max_args:
+                inner_options = [self._option(arg) for arg in source.args[1:]]
+                inner_options += ['*', 'asc'][len(inner_options):]
+                return inner.func(self._items(source.args[0]), *inner_options, *options)
+        
+        if native.builtin is not None:
+            return self._call_builtin(native, source)
+        
+        sources = [self._items(source)]
+        for extra in node.args[1:native.sources]:
+            sources.append(self._root_items(extra))
+        return native.func(*sources, *options)
+
+    def _call_builtin(self, native: NativeFunction, node: ASTNode):
+        """
+        执行与Python内置函数同名的内置函数（如sum、min、max），结果与调用内置函数一致
+
+        数据源为列表时以流的方式传入元素，列表方式下结果为None的空投影同样抛出TypeError；
+        数据源不是列表时原样传给内置函数
+        """
+        if self.stream_arguments:
+            old_projections = self._projections
+            self._projections = []
+            try:
+                items, value = self.stream(node)
+                projections = self._projections
+            finally:
+                self._projections = old_projections
+            if items is not None:
+                return native.builtin(self._list_items(items, projections))
+        else:
+            value = self.visit(node)
+        return native.builtin(materialize(value))
+
+    @staticmethod
+    def _list_items(items, projections):
+        """逐个产出元素，没有元素且路径上有空投影时，列表方式下的结果为None"""
+        empty = True
+        for item in items:
+            empty = False
+            yield item
+        if empty and any(projection.count == 0 for projection in projections):
+            # 与内置函数接收None时抛出相同的TypeError
+            iter(None)
+
+    def _option(self, node: ASTNode):
+        if isinstance(node, (StringNode, NumberNode)):
+            return node.value
+        return self.visit(node)
+
+    def _root_items(self, node: ASTNode):
+        """
+        求值第二个及之后的数据源参数
+
+        查询中只有第一个名称从文档根部取值，这里为每个数据源重新标记根查询，
+        使 @join(orders, users, ...) 的两侧都从文档根部取值；过滤条件中的数据源仍相对于当前元素
+        """
+        old_root = self.context.get('is_root_query', False)
+        if 'current_item' not in self.context:
+            self.context['is_root_query'] = True
+        try:
+            return self._items(node)
+        finally:
+            self.context['is_root_query'] = old_root
+
+    def _items(self, node: ASTNode):
+        """求值内置函数的数据源参数，返回元素迭代器"""
+        if self.stream_arguments:
+            items, value = self.stream(node)
+        else:
+            value = self.visit(node)
+            items = iter(value) if isinstance(value, LIST_TYPES) else None
+        
+        if items is not None:
+            return items
+        if value is None:
+            return iter(())
+        # 元组、集合、range和生成器等按元素处理，字符串和对象视为一个元素
+        if hasattr(value, '__iter__') and not isinstance(value, (str, bytes, bytearray) + DICT_TYPES):
+            return iter(value)
+        return iter((value,))
+
+    def stream(self, node: ASTNode):
+        """
+        以流的方式求值节点
+
+        节点结果为列表时返回 (元素迭代器, None)，否则返回 (None, 结果)。
+        投影、过滤、通配符和非负切片逐个产出元素，不构造中间列表
+        """
+        method = getattr(self, 'stream_' + node.__class__.__name__, None)
+        if method is not None:
+            return method(node)
+        return self._as_stream(self.visit(node))
+
+    @staticmethod
+    def _as_stream(value):
+        if isinstance(value, LIST_TYPES):
+            return iter(value), None
+        return None, value
+
+    def stream_KeyNode(self, node: KeyNode):
+        return self.stream_path(node)
+
+    def stream_IndexNode(self, node: IndexNode):
+        return self.stream_path(node)
+
+    def stream_SliceNode(self, node: SliceNode):
+        return self.stream_path(node)
+
+    def stream_RecursiveKeyNode(self, node: RecursiveKeyNode):
+        return self.stream_path(node)
+
+    def stream_path(self, node: ASTNode):
+        """
+        以流的方式按顺序求值路径链的每一步
+
+        递归下降和切片值不是字面量或不合法的切片不能以流的方式求值，
+        最后一个这样的步骤及其之前的部分按列表方式求值，保证求值顺序和异常与列表方式一致
+        （例如空投影在列表方式下为None，不会检查切片值）
+        """
+        steps = path_steps(node)
+        first = 0
+        for position in range(len(steps) - 1, -1, -1):
+            if not self._streamable(steps[position]):
+                first = position + 1
+                break
+        
+        if first:
+            items, obj = self._as_stream(self.visit(steps[first - 1]))
+        else:
+            items, obj = self.stream(steps[0].obj)
+        for step in steps[first:]:
+            items, obj = self._stream_step(step, items, obj)
+        return items, obj
+
+    def _streamable(self, node: ASTNode) -> bool:
+        if isinstance(node, RecursiveKeyNode):
+            return False
+        if isinstance(node, SliceNode):
+            bounds = (node.start, node.end, node.step)
+            if not all(bound is None or isinstance(bound, NumberNode) for bound in bounds):
+                return False
+            try:
+                self._slice_bounds(node)
+            except ValueError:
+                return False
+        return True
+
+    def _stream_step(self, node: ASTNode, items, obj):
+        """在上一步的流式结果上执行路径的一步，返回值同stream"""
+        if items is None:
+            return self._as_stream(self._access(node, obj))
+        
+        if isinstance(node, KeyNode):
+            if node.is_wildcard:
+                return items, None
+            return self._project(items, node.key), None
+        
+        if isinstance(node, SliceNode):
+            start, end, step = self._slice_bounds(node)
+            if (start or 0) >= 0 and (end is None or end >= 0) and (step or 1) > 0:
+                return self._islice(items, start, end, step), None
+            # 负数下标需要知道长度，只能先收集
+            return iter(list(items)[start:end:step]), None
+        
+        if isinstance(node.index, StringNode):
+            if node.index.value == '*':
+                return items, None
+            return self._project(items, node.index.value), None
+        
+        if isinstance(node.index, (BinaryOpNode, AdaptiveLogicalNode)):
+            return self._filter(items, node.index), None
+        
+        if not isinstance(node.index, NumberNode):
+            # 索引表达式需在整个列表求值之后求值
+            return self._as_stream(self._access_index(node, list(items)))
+        
+        # 只保留目标位置的元素，其余元素仍被消费，使过滤条件的求值与列表方式一致
+        index = node.index.value
+        element = None
+        if isinstance(index, int) and index >= 0:
+            for position, item in enumerate(items):
+                if position == index:
+                    element = item
+        else:
+            self._drain(items)
+        return self._as_stream(element)
 
-        # 调用脚本
-        return script_manager.run(name=func_name, path=module_path, args=args, kwargs=kwargs)
+    @staticmethod
+    def _drain(items):
+        for _ in items:
+            pass
+
+    @classmethod
+    def _islice(cls, items, start, end, step):
+        """逐个产出切片中的元素，切片之后的元素仍被消费"""
+        yield from islice(items, start, end, step)
+        cls._drain(items)
+
+    def _project(self, items, key):
+        projection = self._project_items(items, key)
+        if self._projections is None:
+            return projection
+        projection = _Counted(projection)
+        self._projections.append(projection)
+        return projection
+
+    @staticmethod
+    def _project_items(items, key):
+        """逐个产出元素中的同名键，语义同列表投影"""
+        for item in items:
+            if isinstance(item, DICT_TYPES) and key in item:
+                yield item[key]
+            elif hasattr(item, key):
+                yield getattr(item, key)
+
+    def _filter(self, items, condition: ASTNode):
+        """逐个产出满足条件的元素，语义同列表过滤"""
+        for item in items:
+            old_context = self.context.copy()
+            self.context['current_item'] = item
+            try:
+                passed = self.visit(condition)
+            finally:
+                self.context = old_context
+            if passed:
+                yield item
+
+    def visit_ParamNode(self, node: ParamNode):
+        # 绑定参数的值总是按字面量使用，在条件过滤中也不会作为当前元素的键
+        if node.name not in self.params:
+            raise ParameterError(f"参数 ':{node.name}' 未绑定，位于 {node.line} 行 {node.column} 列")
+        return self.params[node.name]
+
+    def visit_SetNode(self, node: SetNode):
+        return node.values
+
+    def visit_PatternNode(self, node: PatternNode):
+        return node.compiled
 
     def visit_BinaryOpNode(self, node: BinaryOpNode):
         """
         处理二元操作符节点
         支持:
-        1. 条件过滤 (>, <, ==, !=, >=, <=)
+        1. 条件过滤 (>, <, ==, !=, >=, <=, in, =~)
         2. 逻辑运算 (&&, ||)
         3. 四则运算 (+, -, *, /)
         """
-        # 对于短路操作符，先评估左操作数
-        left = self.visit(node.left)
+        if not self.flat_chains:
+            return self.visit_operation(node, self.visit(node.left))
+        
+        # 左深的运算链（如 a && b && c 或 a + b - c）沿左侧展开，从最内层开始循环求值，
+        # 运算链再长也不增加调用深度
+        chain = [node]
+        while isinstance(chain[-1].left, BinaryOpNode):
+            chain.append(chain[-1].left)
         
+        # 对于短路操作符，先评估左操作数
+        left = self.visit(chain[-1].left)
+        for current in reversed(chain):
+            left = self.visit_operation(current, left)
+        return left
+
+    def visit_operation(self, node: BinaryOpNode, left):
+        """在已求值的左操作数上完成一次二元运算，子类可以在这里记录运算链上每个节点的结果"""
         # 短路求值
         if node.op == Operator.LOGICAL_AND and not left:
             return False
@@ -114,6 +418,16 @@ class Evaluator(ASTVisitor):
         # 对于非短路操作符或需要继续计算的短路操作符，计算右操作数
         right = self.visit(node.right)
         
+        return self._binary_op(node, left, right)
+
+    def _binary_op(self, node: BinaryOpNode, left, right):
+        """在已求值的操作数上执行二元运算"""
+        # 视图不支持列表的算术运算，参与运算前转换为列表
+        if isinstance(left, SequenceView):
+            left = left.materialize()
+        if isinstance(right, SequenceView):
+            right = right.materialize()
+        
         # 逻辑操作符
         if node.op == Operator.LOGICAL_AND:
             return left and right
@@ -134,6 +448,16 @@ class Evaluator(ASTVisitor):
         elif node.op == Operator.LESS_EQUAL:
             return left <= right
         
+        # 集合成员和正则匹配
+        elif node.op == Operator.IN:
+            try:
+                return left in right
+            except TypeError:
+                # 不可哈希的值不在集合中，右侧不是容器时同样视为不在其中
+                return False
+        elif node.op == Operator.MATCH:
+            return regex_match(left, right)
+        
         # 算术操作符
         elif node.op == Operator.PLUS:
             return left + right
@@ -151,8 +475,63 @@ class Evaluator(ASTVisitor):
         else:
             raise UnknownOperator(f"不支持的操作符: {node.op}")
 
+    def visit_AdaptiveLogicalNode(self, node: AdaptiveLogicalNode):
+        """
+        处理优化器生成的自适应逻辑节点
+        按照节点当前的操作数顺序短路求值，并记录每个操作数的选择率和耗时
+        """
+        is_and = node.op == Operator.LOGICAL_AND
+        result = is_and
+        for index in node._order:
+            start = time.perf_counter()
+            passed = bool(self.visit(node.operands[index]))
+            node.record(index, passed, time.perf_counter() - start)
+            
+            # 短路求值
+            if passed != is_and:
+                result = passed
+                break
+        
+        node.finish()
+        return result
+
     def visit_KeyNode(self, node: KeyNode):
-        obj = self.visit(node.obj)
+        return self.visit_path(node)
+
+    def visit_IndexNode(self, node: IndexNode):
+        return self.visit_path(node)
+
+    def visit_SliceNode(self, node: SliceNode):
+        return self.visit_path(node)
+
+    def visit_RecursiveKeyNode(self, node: RecursiveKeyNode):
+        return self.visit_path(node)
+
+    def visit_path(self, node: ASTNode):
+        """
+        求值路径链
+
+        先求值路径的起点，再按顺序对上一步的结果执行解析时展开的每一步，
+        路径上每一步只是一次循环，不会随路径长度增加调用深度
+        """
+        if not self.flat_chains:
+            return self.visit_step(node, self.visit(node.obj))
+        
+        steps = path_steps(node)
+        obj = self.visit(steps[0].obj)
+        for step in steps:
+            obj = self.visit_step(step, obj)
+        return obj
+
+    def visit_step(self, node: ASTNode, obj):
+        """在上一步的结果上执行路径的一步，子类可以在这里记录每一步的结果"""
+        return self._access(node, obj)
+
+    def _access(self, node: ASTNode, obj):
+        return getattr(self, self._accessors[node.__class__])(node, obj)
+
+    def _access_key(self, node: KeyNode, obj):
+        """在已求值的对象上执行键访问"""
         key = node.key
         
         if obj is None:
@@ -161,27 +540,29 @@ class Evaluator(ASTVisitor):
         # 处理通配符 obj.*
         if node.is_wildcard:
             # 列表对象
-            if isinstance(obj, list):
+            if isinstance(obj, LIST_TYPES):
                 return obj
             
             # 字典
-            if isinstance(obj, dict):
+            if isinstance(obj, DICT_TYPES):
                 return obj
                 
             return None
             
         # 对列表中的每个元素获取同名键
-        if isinstance(obj, list):
+        if isinstance(obj, LIST_TYPES):
+            if self.views:
+                return ProjectionView.of(obj, key)
             result = []
             for item in obj:
-                if isinstance(item, dict) and key in item:
+                if isinstance(item, DICT_TYPES) and key in item:
                     result.append(item[key])
                 elif hasattr(item, key):
                     result.append(getattr(item, key))
             return result if result else None
             
         # 处理字典
-        if isinstance(obj, dict):
+        if isinstance(obj, DICT_TYPES):
             return obj.get(key)
             
         # 处理对象属性
@@ -190,24 +571,33 @@ class Evaluator(ASTVisitor):
             
         return None
     
-    def visit_IndexNode(self, node: IndexNode):
-        obj = self.visit(node.obj)
+    def _access_recursive(self, node: RecursiveKeyNode, obj):
+        """在已求值的对象上执行递归下降"""
+        if obj is None:
+            return None
+        
+        if isinstance(obj, SequenceView):
+            obj = obj.materialize()
         
+        return find_recursive(obj, node.key, node.is_wildcard, self.key_index)
+    
+    def _access_index(self, node: IndexNode, obj):
+        """在已求值的对象上执行索引访问、条件过滤或字符串键访问"""
         if obj is None:
             return None
         
         # 检查是否是通配符索引 (index 是 StringNode 且值为 *)
         if isinstance(node.index, StringNode) and node.index.value == '*':
             # 列表
-            if isinstance(obj, list):
+            if isinstance(obj, LIST_TYPES):
                 return obj
             # 字典
-            elif isinstance(obj, dict):
+            elif isinstance(obj, DICT_TYPES):
                 return obj
             return None
         
-        # 检查是否是条件过滤 (index 是 BinaryOpNode)
-        if isinstance(obj, list) and isinstance(node.index, BinaryOpNode):
+        # 检查是否是条件过滤 (index 是 BinaryOpNode 或优化器生成的 AdaptiveLogicalNode)
+        if isinstance(obj, LIST_TYPES) and isinstance(node.index, (BinaryOpNode, AdaptiveLogicalNode)):
             result = []
             
             # 对列表中的每个元素应用条件
@@ -235,13 +625,15 @@ class Evaluator(ASTVisitor):
         if isinstance(node.index, StringNode):
             key = node.index.value
             # 对于字典，直接按键访问
-            if isinstance(obj, dict):
+            if isinstance(obj, DICT_TYPES):
                 return obj.get(key)
             # 对于列表中的字典元素，获取指定键
-            elif isinstance(obj, list):
+            elif isinstance(obj, LIST_TYPES):
+                if self.views:
+                    return ProjectionView.of(obj, key)
                 result = []
                 for item in obj:
-                    if isinstance(item, dict) and key in item:
+                    if isinstance(item, DICT_TYPES) and key in item:
                         result.append(item[key])
                     elif hasattr(item, key):
                         result.append(getattr(item, key))
@@ -255,23 +647,32 @@ class Evaluator(ASTVisitor):
         index = self.visit(node.index)
         
         # 处理列表或元组
-        if isinstance(obj, (list, tuple)):
+        if isinstance(obj, (list, tuple, SequenceView)):
             if isinstance(index, int) and 0 <= index < len(obj):
                 return obj[index]
             return None
         
         # 处理字典
-        if isinstance(obj, dict):
+        if isinstance(obj, DICT_TYPES):
             return obj.get(index)
         
         return None
     
-    def visit_SliceNode(self, node: SliceNode):
-        obj = self.visit(node.obj)
-        
+    def _access_slice(self, node: SliceNode, obj):
+        """在已求值的对象上执行切片"""
         if obj is None:
             return None
         
+        start, end, step = self._slice_bounds(node)
+        
+        if self.views and isinstance(obj, LIST_TYPES):
+            return SliceView.of(obj, start, end, step)
+        
+        # 暂定，后续可能增加一些特殊切片处理，比如numpy中的多维切片
+        return obj[start:end:step]
+
+    def _slice_bounds(self, node: SliceNode):
+        """求值并检查切片的起始值、结束值和步长"""
         # 检查切片值是否合法
         start = self.visit(node.start) if node.start else None
         end = self.visit(node.end) if node.end else None
@@ -286,6 +687,22 @@ class Evaluator(ASTVisitor):
         if step == 0:
             raise ValueError("切片步长不能为0")
         
-        # 暂定，后续可能增加一些特殊切片处理，比如numpy中的多维切片
-        return obj[start:end:step]
-    
\ No newline at end of file
+        return start, end, step
+    
+
+
+class _Counted:
+    """记录产出元素数量的迭代器"""
+    __slots__ = ('_items', 'count')
+
+    def __init__(self, items):
+        self._items = items
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._items)
+        self.count += 1
+        return item
@@ -0,0 +1,167 @@
+"""
+递归下降查询与键位置倒排索引
+"""
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+from dictquerier.executor.views import DICT_TYPES, LIST_TYPES
+
+_SCALAR, _DICT, _LIST = 1, 2, 3
+# 按类型缓存容器种类：视图类型是抽象基类的子类，对每个标量执行isinstance检查开销较大
+_kinds = {dict: _DICT, list: _LIST}
+
+
+def _kind(cls: type) -> int:
+    kind = _kinds.get(cls)
+    if kind is None:
+        kind = _kinds[cls] = _DICT if issubclass(cls, DICT_TYPES) else _LIST if issubclass(cls, LIST_TYPES) else _SCALAR
+    return kind
+
+
+def walk_recursive(obj: Any, key: str, is_wildcard: bool = False) -> List[Any]:
+    """
+    遍历对象及其所有后代，按文档顺序收集指定键的值
+
+    使用显式栈迭代遍历，避免深层嵌套文档触发递归深度限制
+
+    Args:
+        obj: 起始对象
+        key (str): 键名
+        is_wildcard (bool, optional): 是否收集所有后代值. Defaults to False.
+    Returns:
+        list: 匹配的值
+    """
+    result = []
+    stack = [obj]
+    kinds = _kinds
+    while stack:
+        current = stack.pop()
+        kind = _kind(type(current))
+        if kind == _DICT:
+            if is_wildcard:
+                result.extend(current.values())
+            elif key in current:
+                result.append(current[key])
+            children = current.values()
+        elif kind == _LIST:
+            if is_wildcard:
+                result.extend(current)
+            children = current
+        else:
+            continue
+        stack.extend(reversed([child for child in children if (kinds.get(type(child)) or _kind(type(child))) != _SCALAR]))
+    return result
+
+
+class KeyIndex:
+    """
+    文档级键位置倒排索引
+
+    以先序遍历为每个容器（字典或列表）编号，记录每个容器子树的编号区间，
+    并为每个键记录所在字典的编号和对应的值。对任意已索引的容器执行递归下降查询时，
+    只需在该键的编号列表上二分查找子树区间，无需遍历整棵树。
+
+    索引通过对象id定位容器，文档被修改后需要调用rebuild重建索引。
+    """
+    def __init__(self, data: Any):
+        self.data = data
+        self._intervals: Dict[int, Tuple[int, int]] = {}
+        self._positions: Dict[str, List[int]] = {}
+        self._values: Dict[str, List[Any]] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """重新遍历文档构建索引"""
+        intervals = {}
+        positions = {}
+        values = {}
+        counter = 0
+        # 栈中元素为(容器, 是否为退出标记)，退出时记录子树编号区间的结束位置
+        stack = [(self.data, False)]
+        while stack:
+            current, exiting = stack.pop()
+            if exiting:
+                start = intervals[id(current)][0]
+                intervals[id(current)] = (start, counter)
+                continue
+            if not isinstance(current, (dict, list)):
+                continue
+            
+            number = counter
+            counter += 1
+            # 同一个容器对象被多处引用时，只记录第一次出现的位置
+            first_visit = id(current) not in intervals
+            if first_visit:
+                intervals[id(current)] = (number, number)
+            
+            if isinstance(current, dict):
+                for key, value in current.items():
+                    positions.setdefault(key, []).append(number)
+                    values.setdefault(key, []).append(value)
+                children = current.values()
+            else:
+                children = current
+            
+            if first_visit:
+                stack.append((current, True))
+            stack.extend(reversed([(child, False) for child in children if isinstance(child, (dict, list))]))
+        
+        self._intervals = intervals
+        self._positions = positions
+        self._values = values
+
+    def __contains__(self, obj: Any) -> bool:
+        return id(obj) in self._intervals
+
+    def keys(self) -> List[str]:
+        """文档中出现过的所有键"""
+        return list(self._positions)
+
+    def lookup(self, obj: Any, key: str) -> Optional[List[Any]]:
+        """
+        查找已索引容器及其后代中指定键的值
+
+        Args:
+            obj: 起始容器
+            key (str): 键名
+        Returns:
+            list: 按文档顺序排列的值，obj未被索引时返回None
+        """
+        interval = self._intervals.get(id(obj))
+        if interval is None:
+            return None
+        positions = self._positions.get(key)
+        if not positions:
+            return []
+        start, end = interval
+        left = bisect.bisect_left(positions, start)
+        right = bisect.bisect_left(positions, end)
+        return self._values[key][left:right]
+
+
+def find_recursive(obj: Any, key: str, is_wildcard: bool = False, index: Optional[KeyIndex] = None) -> List[Any]:
+    """
+    递归下降查询，优先使用索引
+
+    Args:
+        obj: 起始对象
+        key (str): 键名
+        is_wildcard (bool, optional): 是否收集所有后代值. Defaults to False.
+        index (KeyIndex, optional): 文档的键位置索引
+    Returns:
+        list: 按文档顺序排列的匹配值
+    """
+    if index is None or is_wildcard:
+        return walk_recursive(obj, key, is_wildcard)
+    
+    found = index.lookup(obj, key)
+    if found is not None:
+        return found
+    
+    # 投影或过滤产生的临时列表不在索引中，逐个元素查找
+    if isinstance(obj, list):
+        result = []
+        for item in obj:
+            result.extend(find_recursive(item, key, is_wildcard, index))
+        return result
+    return walk_recursive(obj, key, is_wildcard)
@@ -0,0 +1,106 @@
+"""
+内置哈希连接
+
+在较小的一侧按连接键建立哈希表，流式遍历较大的一侧进行探测，时间和比较次数与两侧元素数量之和成线性关系。
+结果顺序与嵌套循环一致：按左侧元素的顺序排列，同一左侧元素匹配的右侧元素保持原有顺序。
+"""
+from operator import length_hint
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional
+
+from dictquerier.executor.ordering import key_value
+
+INNER = 'inner'
+LEFT = 'left'
+
+# 连接结果中左右两侧元素的键名
+LEFT_KEY = 'left'
+RIGHT_KEY = 'right'
+
+
+def _join_key(item: Any, key: str) -> Optional[Hashable]:
+    """获取元素的连接键，缺失或为None时返回None，表示不参与匹配"""
+    value = key_value(item, key)
+    if value is not None and not isinstance(value, Hashable):
+        raise TypeError(f"连接键的值必须可哈希，但得到了 {type(value).__name__}")
+    return value
+
+
+def _pair(left: Any, right: Any) -> Dict[str, Any]:
+    return {LEFT_KEY: left, RIGHT_KEY: right}
+
+
+def hash_join(left: Iterator, right: Iterator, left_key: str, right_key: Optional[str] = None, how: str = INNER) -> List[Dict[str, Any]]:
+    """
+    按键连接两侧元素
+
+    连接键缺失或为None的元素不与任何元素匹配。能预知长度的一侧（文档中的列表）优先作为建表侧，
+    两侧长度都已知时选择较小的一侧，都未知时在右侧建表。
+
+    Args:
+        left (Iterator): 左侧元素
+        right (Iterator): 右侧元素
+        left_key (str): 左侧元素的连接键
+        right_key (str, optional): 右侧元素的连接键，为None时与左侧相同. Defaults to None.
+        how (str, optional): 'inner' 只保留匹配的元素，'left' 同时保留未匹配的左侧元素（右侧为None）. Defaults to 'inner'.
+    Returns:
+        List[Dict[str, Any]]: 连接结果，每项为 {'left': 左侧元素, 'right': 右侧元素}
+    """
+    if right_key is None:
+        right_key = left_key
+    if not isinstance(left_key, str) or not isinstance(right_key, str):
+        raise ValueError(f"连接键必须为字符串，但得到了 {left_key!r}, {right_key!r}")
+    if how not in (INNER, LEFT):
+        raise ValueError(f"连接方式必须为 '{INNER}' 或 '{LEFT}'，但得到了 {how!r}")
+
+    # 迭代器无法预知长度时为-1
+    left_size = length_hint(left, -1)
+    right_size = length_hint(right, -1)
+    if left_size >= 0 and (right_size < 0 or left_size < right_size):
+        return _build_left(left, right, left_key, right_key, how)
+    return _build_right(left, right, left_key, right_key, how)
+
+
+def _build_right(left: Iterable, right: Iterable, left_key: str, right_key: str, how: str) -> List[Dict[str, Any]]:
+    """在右侧建表，流式探测左侧"""
+    table: Dict[Hashable, List[Any]] = {}
+    for item in right:
+        key = _join_key(item, right_key)
+        if key is not None:
+            table.setdefault(key, []).append(item)
+
+    result = []
+    for item in left:
+        key = _join_key(item, left_key)
+        matches = table.get(key) if key is not None else None
+        if matches:
+            for match in matches:
+                result.append(_pair(item, match))
+        elif how == LEFT:
+            result.append(_pair(item, None))
+    return result
+
+
+def _build_left(left: Iterable, right: Iterable, left_key: str, right_key: str, how: str) -> List[Dict[str, Any]]:
+    """在左侧建表，流式探测右侧，匹配结果按左侧元素分组以保持结果顺序"""
+    items = list(left)
+    table: Dict[Hashable, List[int]] = {}
+    for position, item in enumerate(items):
+        key = _join_key(item, left_key)
+        if key is not None:
+            table.setdefault(key, []).append(position)
+
+    matches: List[List[Any]] = [[] for _ in items]
+    for item in right:
+        key = _join_key(item, right_key)
+        if key is None:
+            continue
+        for position in table.get(key, ()):
+            matches[position].append(item)
+
+    result = []
+    for item, matched in zip(items, matches):
+        for match in matched:
+            result.append(_pair(item, match))
+        if not matched and how == LEFT:
+            result.append(_pair(item, None))
+    return result
@@ -0,0 +1,66 @@
+"""
+执行器内置函数
+
+内置函数以脚本调用的形式书写（如 @sum(users[*].score)），但由执行器直接执行，不经过脚本查找。
+前几个参数（数据源）以流的方式求值，其余参数为字面量选项。
+"""
+from typing import Any, Callable, Dict, Optional
+
+from dictquerier.script.manager import script_manager
+from dictquerier.executor.aggregate import AGGREGATIONS
+from dictquerier.executor import ordering
+from dictquerier.executor.join import hash_join
+
+
+class NativeFunction:
+    """
+    内置函数
+
+    Attributes:
+        name (str): 函数名
+        func (Callable): 实现，前sources个参数为元素迭代器
+        min_args (int): 最少参数数量（含数据源）
+        max_args (int): 最多参数数量（含数据源）
+        sources (int): 数据源参数的数量
+        builtin (Callable, optional): 同名的Python内置函数，此前通过脚本查找调用，结果需要与其保持一致
+    """
+    def __init__(self, name: str, func: Callable[..., Any], min_args: int = 1, max_args: int = 1, sources: int = 1,
+                 builtin: Optional[Callable[..., Any]] = None):
+        self.name = name
+        self.func = func
+        self.min_args = min_args
+        self.max_args = max_args
+        self.sources = sources
+        self.builtin = builtin
+
+    def __repr__(self) -> str:
+        return f"NativeFunction({self.name!r})"
+
+
+# 与Python内置函数同名的聚合
+_BUILTINS = {'sum': sum, 'min': min, 'max': max}
+
+NATIVE_FUNCTIONS: Dict[str, NativeFunction] = {
+    name: NativeFunction(name, func, builtin=_BUILTINS.get(name)) for name, func in AGGREGATIONS.items()
+}
+NATIVE_FUNCTIONS['order_by'] = NativeFunction('order_by', ordering.order_by, 1, 4)
+NATIVE_FUNCTIONS['limit'] = NativeFunction('limit', ordering.limit, 2, 2)
+NATIVE_FUNCTIONS['join'] = NativeFunction('join', hash_join, 3, 5, sources=2)
+
+
+def native_function(node) -> Optional[NativeFunction]:
+    """
+    判断脚本调用节点是否为内置函数，是则返回内置函数，否则返回None
+
+    只有无模块路径、没有关键词参数、参数数量合法且没有注册同名脚本时才视为内置函数，
+    用户注册的同名脚本优先
+    """
+    if node.module or node.kwargs:
+        return None
+    name = getattr(node.name, 'name', None)
+    native = NATIVE_FUNCTIONS.get(name)
+    if native is None or name in script_manager.scripts:
+        return None
+    if not native.min_args <= len(node.args) <= native.max_args:
+        return None
+    return native
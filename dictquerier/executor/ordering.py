@@ -0,0 +1,89 @@
+"""
+内置排序和截取函数
+
+带数量限制的排序使用 heapq 在扫描过程中只保留前k个元素，内存为O(k)，时间为O(n log k)；
+不带数量限制时退化为完整排序。
+"""
+import heapq
+from itertools import islice
+from typing import Any, Iterable, List, Optional
+
+from dictquerier.executor.views import DICT_TYPES
+
+ASCENDING = 'asc'
+DESCENDING = 'desc'
+# 按元素本身排序
+SELF_KEY = '*'
+
+
+def key_value(item: Any, key: str) -> Any:
+    """获取元素的键值，语义同键访问，缺失时返回None"""
+    if key == SELF_KEY:
+        return item
+    if isinstance(item, DICT_TYPES):
+        return item.get(key)
+    return getattr(item, key, None)
+
+
+def _drain(items: Iterable):
+    for _ in items:
+        pass
+
+
+def _check_limit(limit: Any) -> Optional[int]:
+    if limit is None:
+        return None
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+        raise ValueError(f"数量必须为非负整数，但得到了 {limit!r}")
+    return limit
+
+
+def order_by(items: Iterable, key: str = SELF_KEY, direction: str = ASCENDING, limit: Optional[int] = None) -> List:
+    """
+    按键排序，可选只保留前limit个元素
+
+    排序值缺失或为None的元素无论升降序都排在最后，相同排序值的元素保持原有顺序
+
+    Args:
+        items (Iterable): 需要排序的元素
+        key (str, optional): 排序键，'*' 表示按元素本身排序. Defaults to '*'.
+        direction (str, optional): 'asc' 升序或 'desc' 降序. Defaults to 'asc'.
+        limit (int, optional): 保留的元素数量，为None时返回全部元素. Defaults to None.
+    Returns:
+        List: 排序后的元素列表
+    """
+    if not isinstance(key, str):
+        raise ValueError(f"排序键必须为字符串，但得到了 {key!r}")
+    if direction not in (ASCENDING, DESCENDING):
+        raise ValueError(f"排序方向必须为 '{ASCENDING}' 或 '{DESCENDING}'，但得到了 {direction!r}")
+    limit = _check_limit(limit)
+    descending = direction == DESCENDING
+
+    # 排序值缺失的元素用首位标记区分，避免与其他值比较
+    if descending:
+        def sort_key(item):
+            value = key_value(item, key)
+            return (0, 0) if value is None else (1, value)
+    else:
+        def sort_key(item):
+            value = key_value(item, key)
+            return (1, 0) if value is None else (0, value)
+
+    if limit is None:
+        return sorted(items, key=sort_key, reverse=descending)
+    if limit == 0:
+        # heapq 在数量为0时不会消费输入，这里仍消费剩余元素，使过滤条件的求值与列表方式一致
+        _drain(items)
+        return []
+    if descending:
+        return heapq.nlargest(limit, items, key=sort_key)
+    return heapq.nsmallest(limit, items, key=sort_key)
+
+
+def limit(items: Iterable, count: int) -> List:
+    """保留前count个元素"""
+    count = _check_limit(count)
+    result = list(islice(items, count))
+    # 剩余元素仍被消费，使过滤条件的求值与列表方式一致
+    _drain(items)
+    return result
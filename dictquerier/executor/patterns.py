@@ -0,0 +1,37 @@
+"""
+正则表达式编译缓存
+
+=~ 操作符的字符串字面量在解析时编译，非字面量的模式在执行时编译。
+所有查询共享一个有界的LRU缓存，同一模式只编译一次。
+"""
+import functools
+import re
+from typing import Any, Pattern, Union
+
+# 共享缓存中最多保存的已编译模式数量
+PATTERN_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str) -> Pattern:
+    """编译正则表达式，结果在所有查询间共享"""
+    return re.compile(pattern)
+
+
+def regex_match(value: Any, pattern: Union[str, Pattern]) -> bool:
+    """
+    检查值是否包含匹配正则表达式的子串
+
+    Args:
+        value (Any): 被匹配的值，非字符串总是不匹配
+        pattern (Union[str, Pattern]): 正则表达式或已编译的模式
+    Returns:
+        bool: 是否匹配
+    """
+    if isinstance(pattern, str):
+        pattern = compile_pattern(pattern)
+    elif not isinstance(pattern, re.Pattern):
+        raise TypeError(f"正则表达式必须为字符串，但得到了 {type(pattern).__name__}")
+    if not isinstance(value, str):
+        return False
+    return pattern.search(value) is not None
@@ -0,0 +1,262 @@
+"""
+查询计划分析
+
+在执行查询的同时统计每个AST节点的调用次数、耗时、扫描和匹配的元素数量，
+并以带注释的树形结构输出。
+"""
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from dictquerier.executor.evaluator import Evaluator
+from dictquerier.executor.native import native_function
+from dictquerier.syntax_tree.node import (
+    ASTNode, NameNode, NumberNode, StringNode, VarRefNode, ScriptCallNode,
+    BinaryOpNode, KeyNode, IndexNode, SliceNode, RecursiveKeyNode, AdaptiveLogicalNode, ParamNode, SetNode, PatternNode,
+    iter_child_nodes, path_steps
+)
+
+
+class NodeStats:
+    """单个AST节点的执行统计"""
+    def __init__(self):
+        self.calls: int = 0
+        self.elapsed: float = 0.0
+        self.scanned: int = 0
+        self.matched: int = 0
+        self.errors: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'elapsed': self.elapsed,
+            'scanned': self.scanned,
+            'matched': self.matched,
+            'errors': self.errors,
+        }
+
+
+class ProfilingEvaluator(Evaluator):
+    """
+    带性能统计的执行器，执行过程和结果与Evaluator一致
+
+    路径链和运算链按展开的序列循环求值，链上的中间节点不经过visit，在循环中记录统计：
+    中间节点的耗时为从链的起点开始求值到该节点完成的时间，与递归求值时包含子节点的耗时相同。
+    以流的方式求值的内置函数参数中，各步骤逐个元素交替执行，只统计调用、扫描和匹配数量，耗时计入内置函数节点
+    """
+    def __init__(self, data, key_index=None, params=None):
+        super().__init__(data, key_index, params=params)
+        self.stats: Dict[ASTNode, NodeStats] = {}
+
+    def _node_stats(self, node: ASTNode) -> NodeStats:
+        stats = self.stats.get(node)
+        if stats is None:
+            stats = self.stats[node] = NodeStats()
+        return stats
+
+    def visit(self, node):
+        stats = self._node_stats(node)
+        start = time.perf_counter()
+        try:
+            result = node.accept(self)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.calls += 1
+            stats.elapsed += time.perf_counter() - start
+        return result
+
+    def visit_path(self, node: ASTNode):
+        steps = path_steps(node)
+        return self._profile_chain(steps, lambda: self.visit(steps[0].obj), self.visit_step)
+
+    def visit_BinaryOpNode(self, node: BinaryOpNode):
+        chain = [node]
+        while isinstance(chain[-1].left, BinaryOpNode):
+            chain.append(chain[-1].left)
+        chain.reverse()
+        return self._profile_chain(chain, lambda: self.visit(chain[0].left), self.visit_operation)
+
+    def _profile_chain(self, chain: List[ASTNode], first: Callable[[], Any], apply: Callable[[ASTNode, Any], Any]):
+        """
+        循环求值链并记录中间节点的统计，最后一个节点即正在visit的节点，由visit记录
+
+        Args:
+            chain (List[ASTNode]): 按求值顺序排列的链上的节点
+            first (Callable): 求值链的起点
+            apply (Callable): 在上一个节点的结果上求值一个节点
+        """
+        start = time.perf_counter()
+        done = 0
+        try:
+            value = first()
+            for member in chain[:-1]:
+                value = apply(member, value)
+                stats = self._node_stats(member)
+                stats.calls += 1
+                stats.elapsed += time.perf_counter() - start
+                done += 1
+        except Exception:
+            # 与递归求值一致，出错的节点和链上在它之后的节点都记录一次出错的调用
+            elapsed = time.perf_counter() - start
+            for member in chain[done:-1]:
+                stats = self._node_stats(member)
+                stats.calls += 1
+                stats.errors += 1
+                stats.elapsed += elapsed
+            raise
+        return apply(chain[-1], value)
+
+    def visit_step(self, node: ASTNode, obj):
+        # 路径节点在这里拿到上一步的结果，统计扫描数量后即可释放，不保留任何节点的中间结果
+        result = super().visit_step(node, obj)
+        stats = self._node_stats(node)
+        if isinstance(obj, list):
+            stats.scanned += len(obj)
+        if is_filter(node) and isinstance(result, list):
+            stats.matched += len(result)
+        return result
+
+    def _stream_step(self, node: ASTNode, items, obj):
+        stats = self._node_stats(node)
+        stats.calls += 1
+        if items is None:
+            if isinstance(obj, list):
+                stats.scanned += len(obj)
+        else:
+            items = _counted(items, stats, 'scanned')
+        items, value = super()._stream_step(node, items, obj)
+        if items is not None and is_filter(node):
+            items = _counted(items, stats, 'matched')
+        return items, value
+
+
+def _counted(items: Iterator[Any], stats: NodeStats, field: str) -> Iterator[Any]:
+    """逐个产出元素，同时累加统计中的数量"""
+    for item in items:
+        setattr(stats, field, getattr(stats, field) + 1)
+        yield item
+
+
+def is_filter(node: ASTNode) -> bool:
+    """检查节点是否是条件过滤节点"""
+    return isinstance(node, IndexNode) and isinstance(node.index, (BinaryOpNode, AdaptiveLogicalNode))
+
+
+class QueryPlan:
+    """
+    查询计划分析结果
+
+    Attributes:
+        root (ASTNode): 执行的AST根节点
+        result (Any): 查询结果
+        stats (Dict[ASTNode, NodeStats]): 每个节点的执行统计
+    """
+    def __init__(self, root: ASTNode, result: Any, stats: Dict[ASTNode, NodeStats]):
+        self.root = root
+        self.result = result
+        self.stats = stats
+
+    @property
+    def total_time(self) -> float:
+        """查询总耗时（秒）"""
+        return self.node_stats(self.root).elapsed
+
+    @property
+    def script_calls(self) -> int:
+        """脚本调用总次数，不含内置函数"""
+        return sum(stats.calls for node, stats in self.stats.items()
+                   if isinstance(node, ScriptCallNode) and native_function(node) is None)
+
+    def node_stats(self, node: ASTNode) -> NodeStats:
+        """获取节点的执行统计，未执行过的节点返回空统计"""
+        return self.stats.get(node) or NodeStats()
+
+    def to_dict(self, node: Optional[ASTNode] = None) -> Dict[str, Any]:
+        """将查询计划转换为嵌套字典"""
+        node = node or self.root
+        result = self._node_dict(node)
+        # 显式栈代替递归，很深的路径和运算链也不会超出递归深度
+        stack = [(node, result)]
+        while stack:
+            node, entry = stack.pop()
+            children = list(iter_child_nodes(node))
+            if children:
+                entry['children'] = [self._node_dict(child) for child in children]
+                stack.extend(zip(children, entry['children']))
+        return result
+
+    def _node_dict(self, node: ASTNode) -> Dict[str, Any]:
+        result = {'node': node.__class__.__name__, 'label': describe_node(node)}
+        result.update(self.node_stats(node).to_dict())
+        return result
+
+    def render(self) -> str:
+        """将查询计划渲染为带注释的树形文本"""
+        lines = [f"总耗时: {self.total_time * 1000:.3f}ms，脚本调用: {self.script_calls} 次"]
+        # 显式栈按先序遍历，子节点逆序入栈以保持输出顺序
+        stack = [(self.root, '', '')]
+        while stack:
+            node, prefix, child_prefix = stack.pop()
+            children = list(iter_child_nodes(node))
+            lines.append(prefix + self._render_node(node, children))
+            for i in range(len(children) - 1, -1, -1):
+                last = i == len(children) - 1
+                stack.append((
+                    children[i],
+                    child_prefix + ('└─ ' if last else '├─ '),
+                    child_prefix + ('   ' if last else '│  '),
+                ))
+        return '\n'.join(lines)
+
+    def _render_node(self, node: ASTNode, children: List[ASTNode]) -> str:
+        stats = self.node_stats(node)
+        self_time = stats.elapsed - sum(self.node_stats(child).elapsed for child in children)
+        
+        parts = [
+            f"{node.__class__.__name__} {describe_node(node)}".rstrip(),
+            f"calls={stats.calls}",
+            f"time={stats.elapsed * 1000:.3f}ms",
+            f"self={max(self_time, 0) * 1000:.3f}ms",
+        ]
+        if isinstance(node, (KeyNode, IndexNode, SliceNode, RecursiveKeyNode)):
+            parts.append(f"scanned={stats.scanned}")
+        if is_filter(node):
+            parts.append(f"matched={stats.matched}")
+        if stats.errors:
+            parts.append(f"errors={stats.errors}")
+        return '  '.join(parts)
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+def describe_node(node: ASTNode) -> str:
+    """生成节点的简短描述"""
+    if isinstance(node, NameNode):
+        return repr(node.name)
+    if isinstance(node, (NumberNode, StringNode)):
+        return repr(node.value)
+    if isinstance(node, ParamNode):
+        return f":{node.name}"
+    if isinstance(node, SetNode):
+        return f"{{{len(node.values)} values}}"
+    if isinstance(node, PatternNode):
+        return f"/{node.pattern}/"
+    if isinstance(node, VarRefNode):
+        return f"${node.name.name}"
+    if isinstance(node, ScriptCallNode):
+        if native_function(node) is not None:
+            return f"@{node.name.name} (native)"
+        return "@" + ".".join([module.name for module in node.module] + [node.name.name])
+    if isinstance(node, (BinaryOpNode, AdaptiveLogicalNode)):
+        return str(node.op)
+    if isinstance(node, KeyNode):
+        return f".{node.key}"
+    if isinstance(node, RecursiveKeyNode):
+        return f"..{node.key}"
+    if isinstance(node, IndexNode):
+        return "[filter]" if is_filter(node) else "[]"
+    if isinstance(node, SliceNode):
+        return "[:]"
+    return ""
@@ -0,0 +1,263 @@
+"""
+结果状态模式
+
+查询的错误不以异常的形式抛出，而是作为结果状态返回。路径缺失本身不会产生异常；
+过滤条件中最常见的错误（键缺失时字符串与数字比较、None参与运算等类型不匹配）在运算前按类型判断，
+不会触发Python异常。对稀疏数据批量执行查询时，大量文档缺少被查询字段也不会带来异常处理的开销。
+
+第一个错误发生后，执行器不再求值剩余节点，结果状态记录错误类型和位置，与抛出异常模式下抛出的异常一致。
+"""
+import re
+from typing import Any, Optional
+
+from dictquerier.executor.evaluator import Evaluator
+from dictquerier.executor.views import SequenceView
+from dictquerier.syntax_tree.node import ASTNode, NameNode, BinaryOpNode, RecursiveKeyNode
+from dictquerier.tokenizer.enum import Operator
+
+# 结果状态
+OK = 'ok'
+# 查询成功但路径不存在，结果为None
+MISSING = 'missing'
+# 比较或运算的操作数类型不匹配，抛出异常模式下为TypeError
+TYPE_MISMATCH = 'type_mismatch'
+# 过滤条件中使用了未定义的名称，抛出异常模式下为NameError
+UNDEFINED_NAME = 'undefined_name'
+# 除数为零，抛出异常模式下为ZeroDivisionError
+ZERO_DIVISION = 'zero_division'
+# 其他错误，如脚本调用失败、切片参数非法，原始异常保存在error中
+ERROR = 'error'
+
+_EXCEPTIONS = {
+    TYPE_MISMATCH: TypeError,
+    UNDEFINED_NAME: NameError,
+    ZERO_DIVISION: ZeroDivisionError,
+}
+
+# 内置类型在比较和运算中的类别，类别为None的类型不支持大小比较
+_KINDS = {
+    bool: 'number',
+    int: 'number',
+    float: 'number',
+    str: 'str',
+    list: 'list',
+    tuple: 'tuple',
+    dict: None,
+    type(None): None,
+}
+
+_ORDERING = (Operator.GREATER_THAN, Operator.LESS_THAN, Operator.GREATER_EQUAL, Operator.LESS_EQUAL)
+_SEQUENCES = ('str', 'list', 'tuple')
+
+
+class QueryResult:
+    """
+    结果状态模式下的查询结果
+
+    Attributes:
+        value (Any): 查询结果，出错时为None
+        status (str): 结果状态，OK、MISSING、TYPE_MISMATCH、UNDEFINED_NAME、ZERO_DIVISION 或 ERROR
+        message (str): 错误信息，成功时为None
+        line (int): 出错节点所在的行，未知时为None
+        column (int): 出错节点所在的列，未知时为None
+        error (Exception): 状态为ERROR时的原始异常
+    """
+    __slots__ = ('value', 'status', 'message', 'line', 'column', 'error')
+
+    def __init__(self, value: Any = None, status: str = OK, message: Optional[str] = None,
+                 line: Optional[int] = None, column: Optional[int] = None, error: Optional[Exception] = None):
+        self.value = value
+        self.status = status
+        self.message = message
+        self.line = line
+        self.column = column
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """查询是否执行成功，路径缺失也视为成功"""
+        return self.status in (OK, MISSING)
+
+    @property
+    def error_type(self) -> Optional[str]:
+        """抛出异常模式下对应的异常类型名称，成功时为None"""
+        if self.ok:
+            return None
+        if self.error is not None:
+            return type(self.error).__name__
+        return _EXCEPTIONS[self.status].__name__
+
+    def raise_for_status(self) -> Any:
+        """
+        按抛出异常模式的行为处理结果：出错时抛出对应的异常，否则返回查询结果
+        """
+        if self.ok:
+            return self.value
+        if self.error is not None:
+            raise self.error
+        raise _EXCEPTIONS[self.status](self.message)
+
+    def __repr__(self) -> str:
+        if self.status == OK:
+            return f"QueryResult({self.status}, {self.value!r})"
+        if self.status == MISSING:
+            return f"QueryResult({self.status}, line={self.line}, column={self.column})"
+        return f"QueryResult({self.status}, {self.message!r}, line={self.line}, column={self.column})"
+
+
+class StatusEvaluator(Evaluator):
+    """
+    不抛出异常的执行器，通过query_status获取带状态的查询结果
+    """
+    def __init__(self, data, key_index=None, views: bool = False, params=None):
+        super().__init__(data, key_index, views, params)
+        # 第一个错误，(状态, 信息, 节点, 原始异常)
+        self.fault = None
+        # 第一个使路径缺失的节点
+        self.missing: Optional[ASTNode] = None
+
+    def query_status(self, ast_root: ASTNode) -> QueryResult:
+        """执行查询，返回带状态的查询结果"""
+        try:
+            value = self.query(ast_root)
+        except Exception as e:
+            # 类型判断无法覆盖的错误（如脚本内部的异常）仍以异常的形式出现，只在这里捕获一次
+            if self.fault is None:
+                self._fail(ERROR, str(e), None, e)
+            value = None
+
+        if self.fault is not None:
+            status, message, node, error = self.fault
+            return QueryResult(None, status, message, getattr(node, 'line', None), getattr(node, 'column', None), error)
+        if value is None:
+            node = self.missing
+            return QueryResult(None, MISSING, None, getattr(node, 'line', None), getattr(node, 'column', None))
+        return QueryResult(value)
+
+    def _fail(self, status: str, message: str, node: Optional[ASTNode], error: Optional[Exception] = None):
+        if self.fault is None:
+            self.fault = (status, message, node, error)
+
+    def _miss(self, node: ASTNode):
+        # 条件过滤中当前元素缺少键是正常情况，只记录路径上的缺失
+        if self.missing is None and 'current_item' not in self.context:
+            self.missing = node
+
+    def visit(self, node):
+        # 出错后不再求值剩余节点
+        if self.fault is not None:
+            return None
+        return node.accept(self)
+
+    def visit_NameNode(self, node: NameNode):
+        context = self.context
+        if 'current_item' in context and not context.get('get_literal') and not context.get('is_root_query'):
+            self._fail(UNDEFINED_NAME, f"名称 '{node.name}' 未定义，位于 {node.line} 行 {node.column} 列", node)
+            return None
+        is_root = context.get('is_root_query', False) and not context.get('get_literal', False)
+        result = super().visit_NameNode(node)
+        if is_root and result is None:
+            self._miss(node)
+        return result
+
+    def visit_step(self, node: ASTNode, obj):
+        result = super().visit_step(node, obj)
+        # 键和索引访问在对象存在时才算缺失，递归下降没有找到结果即为缺失
+        if result is None and (obj is not None or isinstance(node, RecursiveKeyNode)):
+            self._miss(node)
+        return result
+
+    def _run_script(self, name: str, path: str, args: list, kwargs: dict):
+        # 参数求值出错时不调用脚本，与抛出异常模式一致
+        if self.fault is not None:
+            return None
+        return super()._run_script(name, path, args, kwargs)
+
+    def _binary_op(self, node: BinaryOpNode, left, right):
+        if self.fault is not None:
+            return None
+        if isinstance(left, SequenceView):
+            left = left.materialize()
+        if isinstance(right, SequenceView):
+            right = right.materialize()
+
+        op = node.op
+        if op == Operator.DIVIDE and right == 0:
+            self._fail(ZERO_DIVISION, "除数不能为零", node)
+            return None
+        if op in _ORDERING:
+            valid = self._orderable(left, right)
+        elif op == Operator.PLUS:
+            valid = self._addable(left, right)
+        elif op in (Operator.MINUS, Operator.DIVIDE):
+            valid = self._numeric(left, right)
+        elif op == Operator.MULTIPLY:
+            valid = self._multipliable(left, right)
+        elif op == Operator.MATCH:
+            valid = isinstance(right, (str, re.Pattern))
+        else:
+            return super()._binary_op(node, left, right)
+
+        if valid is False:
+            self._fail(TYPE_MISMATCH, f"操作符 {op.value} 不支持 {type(left).__name__} 和 {type(right).__name__} 类型的操作数，位于 {node.line} 行 {node.column} 列", node)
+            return None
+        if valid is None:
+            # 无法按类型判断（如自定义对象），执行运算并捕获异常
+            try:
+                return super()._binary_op(node, left, right)
+            except Exception as e:
+                self._fail(ERROR, str(e), node, e)
+                return None
+        return super()._binary_op(node, left, right)
+
+    # 以下方法返回True表示运算合法，False表示类型不匹配，None表示无法按类型判断
+    @staticmethod
+    def _kinds(left, right):
+        left_type = type(left)
+        right_type = type(right)
+        if left_type not in _KINDS or right_type not in _KINDS:
+            return None
+        return _KINDS[left_type], _KINDS[right_type]
+
+    @classmethod
+    def _orderable(cls, left, right) -> Optional[bool]:
+        kinds = cls._kinds(left, right)
+        if kinds is None:
+            return None
+        left_kind, right_kind = kinds
+        if left_kind is None or left_kind != right_kind:
+            return False
+        if left_kind in ('number', 'str'):
+            return True
+        # 列表和元组逐个比较元素，元素的类型无法预先判断
+        return None
+
+    @classmethod
+    def _addable(cls, left, right) -> Optional[bool]:
+        kinds = cls._kinds(left, right)
+        if kinds is None:
+            return None
+        left_kind, right_kind = kinds
+        return left_kind is not None and left_kind == right_kind
+
+    @classmethod
+    def _numeric(cls, left, right) -> Optional[bool]:
+        kinds = cls._kinds(left, right)
+        if kinds is None:
+            return None
+        return kinds == ('number', 'number')
+
+    @classmethod
+    def _multipliable(cls, left, right) -> Optional[bool]:
+        kinds = cls._kinds(left, right)
+        if kinds is None:
+            return None
+        left_kind, right_kind = kinds
+        if left_kind == 'number' and right_kind == 'number':
+            return True
+        # 序列与整数相乘为重复
+        if left_kind in _SEQUENCES and right_kind == 'number':
+            return not isinstance(right, float)
+        if right_kind in _SEQUENCES and left_kind == 'number':
+            return not isinstance(left, float)
+        return False
@@ -0,0 +1,60 @@
+"""
+流式结果
+
+查询结果为列表时，结果以元素迭代器的形式返回：投影、过滤、通配符和非负切片在消费迭代器时逐个产出元素，
+输出时每个元素编码后即可写出，不需要同时持有完整的结果列表和它的序列化文本。
+
+列表方式中空投影的结果为None，而过滤和切片的空结果为[]，流中两者都表现为没有元素；
+执行器记录查询路径上每个投影产出的元素数量，迭代器耗尽后由ResultStream.empty_value()还原列表方式的结果。
+
+元素逐个经过路径上的各个步骤，多个过滤条件对不同元素交替求值；查询中有多处会出错时，
+最先抛出的错误可能与列表方式不同，且错误抛出之前已经产出的元素可能已被写出。
+"""
+from typing import Any, Iterator, List, Optional
+
+from dictquerier.executor.evaluator import Evaluator, _Counted
+from dictquerier.syntax_tree.node import ASTNode
+
+
+class ResultStream:
+    """
+    流式查询结果
+
+    Attributes:
+        items (Iterator, optional): 结果为列表时的元素迭代器，否则为None
+        value (Any): 结果不是列表时的值
+    """
+    def __init__(self, items: Optional[Iterator[Any]], value: Any = None, projections: Optional[List[_Counted]] = None):
+        self.items = items
+        self.value = value
+        self._projections = projections or []
+
+    @property
+    def is_list(self) -> bool:
+        return self.items is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.items) if self.items is not None else iter(())
+
+    def empty_value(self) -> Optional[list]:
+        """元素迭代器耗尽且没有产出元素时，列表方式下的查询结果：路径上有空投影时为None，否则为[]"""
+        if any(projection.count == 0 for projection in self._projections):
+            return None
+        return []
+
+
+class StreamingEvaluator(Evaluator):
+    """
+    以流的方式返回查询结果的执行器
+
+    内置函数的参数按列表方式求值，查询路径之外不会创建投影，
+    因此记录下来的投影都位于结果所在的路径上。
+    """
+    stream_arguments = False
+
+    def query_stream(self, ast_root: ASTNode) -> ResultStream:
+        """查询入口方法，返回流式结果"""
+        self.context['is_root_query'] = True
+        self._projections = []
+        items, value = self.stream(ast_root)
+        return ResultStream(items, value, self._projections)
@@ -0,0 +1,167 @@
+"""
+查询依赖追踪
+
+在执行查询的同时记录查询读取了文档中哪些容器的哪些键，
+用于在文档被修改后判断查询结果是否可能发生变化。
+"""
+from typing import Any, Dict, Hashable, List, Set, Union
+
+from dictquerier.executor.evaluator import Evaluator
+from dictquerier.syntax_tree.node import (
+    ASTNode, NameNode, StringNode, VarRefNode, ScriptCallNode, BinaryOpNode,
+    KeyNode, IndexNode, SliceNode, RecursiveKeyNode, AdaptiveLogicalNode
+)
+
+
+class Dependencies:
+    """
+    查询的依赖集合，容器通过对象id标识
+
+    Attributes:
+        points (Dict[int, Set]): 读取过的单个键或索引，{容器id: {键}}
+        iterated (Set[int]): 遍历过全部直接子元素的容器
+        subtrees (Set[int]): 依赖整棵子树的容器，例如作为结果返回或作为脚本参数
+    """
+    def __init__(self):
+        self.points: Dict[int, Set[Union[str, int]]] = {}
+        self.iterated: Set[int] = set()
+        self.subtrees: Set[int] = set()
+
+    def read(self, container: Any, key: Union[str, int]):
+        if not isinstance(container, (dict, list)):
+            return
+        if isinstance(key, Hashable):
+            self.points.setdefault(id(container), set()).add(key)
+        else:
+            # 无法记录的键按遍历整个容器处理
+            self.iterated.add(id(container))
+
+    def iterate(self, container: Any):
+        if isinstance(container, (dict, list)):
+            self.iterated.add(id(container))
+
+    def subtree(self, value: Any, with_items: bool = False):
+        if isinstance(value, (dict, list)):
+            self.subtrees.add(id(value))
+        # 切片、投影、过滤生成的新列表不在文档中，需要记录其中的元素
+        if with_items and isinstance(value, list):
+            for item in value:
+                if isinstance(item, (dict, list)):
+                    self.subtrees.add(id(item))
+
+    def affected_by(self, chain: List[Any], key: Union[str, int], shift_from: int = None) -> bool:
+        """
+        判断一次修改是否会影响依赖这些数据的查询
+
+        Args:
+            chain (List[Any]): 从根到被修改容器的容器链，最后一个元素为被修改的容器
+            key (Union[str, int]): 被修改的键或索引
+            shift_from (int, optional): 列表插入或删除元素时，从该索引开始的元素位置都会改变
+        Returns:
+            bool: 是否受影响
+        """
+        if any(id(container) in self.subtrees for container in chain):
+            return True
+        parent_id = id(chain[-1])
+        if parent_id in self.iterated:
+            return True
+        keys = self.points.get(parent_id)
+        if not keys:
+            return False
+        if key in keys:
+            return True
+        if shift_from is not None:
+            return any(isinstance(k, int) and k >= shift_from for k in keys)
+        return False
+
+
+class TrackingEvaluator(Evaluator):
+    """
+    记录依赖的执行器，执行结果与Evaluator一致
+
+    在每个节点求值之后，根据其子节点最近一次的求值结果记录读取了哪些容器的哪些键
+    """
+    # 流式求值会跳过中间节点，无法记录依赖
+    stream_arguments = False
+
+    def __init__(self, data, key_index=None, params=None):
+        super().__init__(data, key_index, params=params)
+        self.dependencies = Dependencies()
+        self._last_results: Dict[ASTNode, Any] = {}
+
+    def query(self, ast_root: ASTNode):
+        result = super().query(ast_root)
+        # 结果中的容器可能被调用方读取任意深度的内容
+        self.dependencies.subtree(result, with_items=True)
+        return result
+
+    def visit(self, node):
+        deps = self.dependencies
+        if isinstance(node, NameNode) and self.context.get('is_root_query', False) and not self.context.get('get_literal', False):
+            deps.read(self.data, node.name)
+        
+        result = node.accept(self)
+        self._last_results[node] = result
+        
+        if isinstance(node, StringNode):
+            current_item = self.context.get('current_item')
+            if isinstance(current_item, dict):
+                deps.read(current_item, node.value)
+        elif isinstance(node, VarRefNode):
+            if isinstance(self.data, dict):
+                deps.read(self.data, node.name.name)
+        elif isinstance(node, ScriptCallNode):
+            for arg in list(node.args) + list(node.kwargs.values()):
+                deps.subtree(self._last_results.get(arg), with_items=True)
+        elif isinstance(node, AdaptiveLogicalNode):
+            for operand in node.operands:
+                deps.subtree(self._last_results.get(operand), with_items=True)
+        return result
+
+    def visit_operation(self, node: BinaryOpNode, left: Any):
+        # 运算链上的每个节点都经过这里，内层节点不经过visit
+        result = super().visit_operation(node, left)
+        self._last_results[node] = result
+        for operand in (node.left, node.right):
+            self.dependencies.subtree(self._last_results.get(operand), with_items=True)
+        return result
+
+    def visit_step(self, node: ASTNode, obj: Any):
+        # 路径上的每一步都经过这里，中间节点不经过visit
+        result = super().visit_step(node, obj)
+        self._last_results[node] = result
+        self._record_access(node, obj)
+        return result
+
+    def _record_access(self, node: ASTNode, obj: Any):
+        deps = self.dependencies
+        if isinstance(node, RecursiveKeyNode):
+            deps.subtree(obj, with_items=True)
+            return
+        if isinstance(node, SliceNode):
+            deps.iterate(obj)
+            return
+        
+        if isinstance(node, KeyNode):
+            if node.is_wildcard:
+                return
+            key = node.key
+        elif isinstance(node.index, StringNode):
+            if node.index.value == '*':
+                return
+            key = node.index.value
+        elif isinstance(node.index, (BinaryOpNode, AdaptiveLogicalNode)) and isinstance(obj, list):
+            # 条件过滤：遍历列表，元素上的键读取由StringNode记录
+            deps.iterate(obj)
+            return
+        else:
+            deps.read(obj, self._last_results.get(node.index))
+            return
+        
+        if isinstance(obj, list):
+            # 对列表中的每个元素获取同名键
+            deps.iterate(obj)
+            for item in obj:
+                deps.read(item, key)
+        else:
+            deps.read(obj, key)
@@ -0,0 +1,163 @@
+"""
+零拷贝序列视图
+
+切片视图和投影视图直接引用原始列表，访问时才读取元素，多个视图可以相互组合而不产生中间列表。
+视图是只读的，并且总是反映底层数据在访问时的状态；需要真正的列表时调用materialize。
+字典视图是按需读取的只读字典（如共享内存中的文档），执行器按字典处理。
+"""
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, List, Optional
+
+
+class SequenceView(Sequence):
+    """只读序列视图基类"""
+    def materialize(self) -> List[Any]:
+        """将视图转换为列表"""
+        return list(self)
+
+    def to_python(self) -> List[Any]:
+        """将视图及其中嵌套的视图完整转换为列表和字典"""
+        return [to_python(item) for item in self]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, SequenceView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        items = [repr(item) for _, item in zip(range(10), self)]
+        if len(self) > 10:
+            items.append('...')
+        return f"{self.__class__.__name__}([{', '.join(items)}])"
+
+
+class DictView(Mapping):
+    """只读字典视图基类"""
+    def materialize(self) -> dict:
+        """将视图转换为字典"""
+        return dict(self.items())
+
+    def to_python(self) -> dict:
+        """将视图及其中嵌套的视图完整转换为字典和列表"""
+        return {key: to_python(item) for key, item in self.items()}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.materialize()!r})"
+
+
+# 执行器中应按列表处理的类型
+LIST_TYPES = (list, SequenceView)
+# 执行器中应按字典处理的类型
+DICT_TYPES = (dict, DictView)
+
+
+class SliceView(SequenceView):
+    """
+    切片视图，通过range记录原始序列中被选中的下标
+
+    对切片视图再次切片时直接组合range，始终只引用最底层的序列
+    """
+    def __init__(self, base: Sequence, indices: range):
+        self.base = base
+        self.indices = indices
+
+    @classmethod
+    def of(cls, obj: Sequence, start: Optional[int], end: Optional[int], step: Optional[int]) -> 'SliceView':
+        """创建obj[start:end:step]的视图"""
+        if isinstance(obj, SliceView):
+            return cls(obj.base, obj.indices[start:end:step])
+        return cls(obj, range(len(obj))[start:end:step])
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SliceView(self.base, self.indices[index])
+        return self.base[self.indices[index]]
+
+    def __iter__(self):
+        base = self.base
+        for i in self.indices:
+            yield base[i]
+
+
+# 与Evaluator.visit_KeyNode的列表投影保持一致：优先取字典键，其次取对象属性
+def _has_key(item: Any, key: str) -> bool:
+    return (isinstance(item, DICT_TYPES) and key in item) or hasattr(item, key)
+
+
+def _get_key(item: Any, key: str) -> Any:
+    return item[key] if isinstance(item, DICT_TYPES) and key in item else getattr(item, key)
+
+
+class ProjectionView(SequenceView):
+    """
+    投影视图，访问第i个元素时才读取源序列中对应元素的键
+
+    与执行器的列表投影一致，没有该键的元素会被跳过。所有元素都有该键时不需要额外内存，
+    否则记录有该键的元素下标。
+    """
+    def __init__(self, source: Sequence, key: str, positions: Optional[array] = None):
+        self.source = source
+        self.key = key
+        self.positions = positions
+
+    @classmethod
+    def of(cls, source: Sequence, key: str) -> Optional['ProjectionView']:
+        """
+        创建投影视图
+
+        Returns:
+            ProjectionView: 投影视图，没有任何元素有该键时返回None
+        """
+        if all(_has_key(item, key) for item in source):
+            return cls(source, key) if len(source) else None
+        positions = array('q', (i for i, item in enumerate(source) if _has_key(item, key)))
+        return cls(source, key, positions) if positions else None
+
+    def __len__(self) -> int:
+        return len(self.source) if self.positions is None else len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SliceView(self, range(len(self))[index])
+        if self.positions is not None:
+            index = self.positions[index]
+        return _get_key(self.source[index], self.key)
+
+    def __iter__(self):
+        key = self.key
+        for item in self.source:
+            if _has_key(item, key):
+                yield _get_key(item, key)
+
+
+def materialize(value: Any) -> Any:
+    """将视图转换为列表或字典，其他值原样返回"""
+    if isinstance(value, (SequenceView, DictView)):
+        return value.materialize()
+    return value
+
+
+def to_python(value: Any) -> Any:
+    """
+    将查询结果中的视图完整转换为列表和字典
+
+    查询结果可能是视图本身，也可能是包含视图的列表或字典（如过滤结果、连接结果），
+    转换后的结果不再引用视图的底层数据。
+    """
+    if isinstance(value, (SequenceView, DictView)):
+        return value.to_python()
+    if isinstance(value, list):
+        return [to_python(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_python(item) for key, item in value.items()}
+    return value
@@ -0,0 +1,10 @@
+"""
+埋点模块
+
+提供词法分析、语法分析、执行和脚本调用的性能埋点钩子，以及内置的延迟直方图聚合器
+"""
+
+from dictquerier.instrumentation.manager import instrumentation, InstrumentEvent
+from dictquerier.instrumentation.aggregator import LatencyAggregator, LatencyHistogram
+
+__all__ = ['instrumentation', 'InstrumentEvent', 'LatencyAggregator', 'LatencyHistogram']
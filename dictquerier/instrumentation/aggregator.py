@@ -0,0 +1,120 @@
+import json
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from dictquerier.instrumentation.manager import InstrumentEvent
+
+# 默认延迟直方图桶上界（毫秒），最后一个桶收集所有超出上界的样本
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class LatencyHistogram:
+    """
+    固定桶延迟直方图
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets: List[float] = list(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.errors: int = 0
+        self.result_items: int = 0
+
+    def observe(self, elapsed_ms: float, result_size: Optional[int] = None, error: bool = False):
+        """记录一个样本"""
+        self.counts[bisect.bisect_left(self.buckets, elapsed_ms)] += 1
+        self.count += 1
+        self.total += elapsed_ms
+        self.min = elapsed_ms if self.min is None else min(self.min, elapsed_ms)
+        self.max = elapsed_ms if self.max is None else max(self.max, elapsed_ms)
+        if error:
+            self.errors += 1
+        if result_size:
+            self.result_items += result_size
+
+    def quantile(self, q: float) -> Optional[float]:
+        """根据桶分布估算分位数，返回所在桶的上界（毫秒）"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': self.total,
+            'mean_ms': self.total / self.count if self.count else None,
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'result_items': self.result_items,
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class LatencyAggregator:
+    """
+    按查询路径和阶段聚合延迟直方图的内置埋点钩子
+
+    Example:
+        aggregator = LatencyAggregator()
+        instrumentation.register(after=aggregator)
+        ...
+        print(aggregator.to_json())
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: InstrumentEvent):
+        self.observe(event)
+
+    def observe(self, event: InstrumentEvent):
+        """记录一个埋点事件"""
+        stage = f"script:{event.name}" if event.stage == 'script' and event.name else event.stage
+        with self._lock:
+            stages = self._histograms.setdefault(event.path or '', {})
+            histogram = stages.get(stage)
+            if histogram is None:
+                histogram = stages[stage] = LatencyHistogram(self.buckets)
+            histogram.observe(event.elapsed * 1000, event.result_size, event.error_type is not None)
+
+    def get(self, path: str, stage: str = 'query') -> Optional[LatencyHistogram]:
+        """获取指定路径和阶段的直方图"""
+        return self._histograms.get(path, {}).get(stage)
+
+    def reset(self):
+        """清空所有统计数据"""
+        with self._lock:
+            self._histograms.clear()
+
+    def dump(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        导出统计数据
+
+        Returns:
+            dict: {查询路径: {阶段: 直方图统计}}
+        """
+        with self._lock:
+            return {
+                path: {stage: histogram.to_dict() for stage, histogram in stages.items()}
+                for path, stages in self._histograms.items()
+            }
+
+    def to_json(self, **kwargs) -> str:
+        """以JSON字符串导出统计数据，kwargs会传递给json.dumps"""
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(self.dump(), **kwargs)
@@ -0,0 +1,161 @@
+import time
+import itertools
+from contextvars import ContextVar
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Optional
+
+# 当前正在执行的查询路径，供脚本调用等内部阶段关联到所属查询
+_current_path: ContextVar = ContextVar('dictquerier_current_path', default=None)
+
+
+class InstrumentEvent:
+    """
+    埋点事件
+
+    Attributes:
+        stage (str): 阶段名称，可选值：'query', 'lex', 'parse', 'evaluate', 'script'
+        path (str): 查询路径语句
+        name (str): 阶段内的具体名称，例如脚本名，可选
+        start (float): 开始时间(time.perf_counter)
+        elapsed (float): 耗时（秒），仅在after钩子中有效
+        result_size (int): 结果大小，列表为元素个数，其他值为1，None为0
+        error_type (str): 异常类型名称，没有异常时为None
+    """
+    def __init__(self, stage: str, path: Optional[str] = None, name: Optional[str] = None):
+        self.stage: str = stage
+        self.path: Optional[str] = path
+        self.name: Optional[str] = name
+        self.start: float = 0.0
+        self.elapsed: float = 0.0
+        self.result_size: Optional[int] = None
+        self.error_type: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    def __repr__(self) -> str:
+        return f"InstrumentEvent({self.__dict__})"
+
+
+class _Span:
+    """埋点区间，进入时调用before钩子，退出时计算耗时并调用after钩子"""
+    def __init__(self, manager: 'InstrumentationManager', event: InstrumentEvent):
+        self.manager = manager
+        self.event = event
+        self._token = None
+
+    def __enter__(self) -> InstrumentEvent:
+        event = self.event
+        if event.stage == 'query':
+            self._token = _current_path.set(event.path)
+        for hook in self.manager._before_hooks.values():
+            hook(event)
+        event.start = time.perf_counter()
+        return event
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event = self.event
+        event.elapsed = time.perf_counter() - event.start
+        if exc_type is not None:
+            event.error_type = exc_type.__name__
+        if self._token is not None:
+            _current_path.reset(self._token)
+        for hook in self.manager._after_hooks.values():
+            hook(event)
+        return False
+
+
+class _NullSpan:
+    """未注册任何钩子时使用的空区间"""
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class InstrumentationManager:
+    """
+    埋点管理器
+
+    在词法分析、语法分析、执行和脚本调用前后调用已注册的钩子。
+    未注册任何钩子时，各阶段只需进行一次属性判断，开销可以忽略不计。
+    """
+    def __init__(self):
+        self._before_hooks: Dict[int, Callable[[InstrumentEvent], None]] = {}
+        self._after_hooks: Dict[int, Callable[[InstrumentEvent], None]] = {}
+        self._ids = itertools.count(1)
+        self.enabled: bool = False
+
+    def register(self, after: Callable[[InstrumentEvent], None] = None, before: Callable[[InstrumentEvent], None] = None) -> int:
+        """
+        注册钩子
+
+        Args:
+            after (Callable, optional): 阶段结束后调用，参数为InstrumentEvent，此时耗时、结果大小和异常类型已填充
+            before (Callable, optional): 阶段开始前调用，参数为InstrumentEvent
+        Returns:
+            int: 钩子id，用于卸载
+        """
+        hook_id = next(self._ids)
+        if after is not None:
+            self._after_hooks[hook_id] = after
+        if before is not None:
+            self._before_hooks[hook_id] = before
+        self._update_enabled()
+        return hook_id
+
+    def unregister(self, hook_id: int) -> bool:
+        """
+        卸载钩子
+
+        Args:
+            hook_id (int): register返回的钩子id
+        Returns:
+            bool: 卸载是否成功
+        """
+        found = self._after_hooks.pop(hook_id, None) is not None
+        found = (self._before_hooks.pop(hook_id, None) is not None) or found
+        self._update_enabled()
+        return found
+
+    def clear(self):
+        """卸载所有钩子"""
+        self._before_hooks.clear()
+        self._after_hooks.clear()
+        self._update_enabled()
+
+    def _update_enabled(self):
+        self.enabled = bool(self._before_hooks or self._after_hooks)
+
+    def span(self, stage: str, path: Optional[str] = None, name: Optional[str] = None):
+        """
+        创建埋点区间
+
+        Args:
+            stage (str): 阶段名称
+            path (str, optional): 查询路径，未指定时使用当前正在执行的查询路径
+            name (str, optional): 阶段内的具体名称
+        Returns:
+            上下文管理器，进入时返回InstrumentEvent；未注册钩子时返回None
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        if path is None:
+            path = _current_path.get()
+        return _Span(self, InstrumentEvent(stage, path, name))
+
+
+def result_size(value: Any) -> int:
+    """计算结果大小，列表、元组和序列视图为元素个数，None为0，其他值为1"""
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple, Sequence)) and not isinstance(value, str):
+        return len(value)
+    return 1
+
+
+instrumentation = InstrumentationManager()
@@ -0,0 +1,9 @@
+"""
+查询优化模块
+
+提供了一组在执行前改写抽象语法树的优化器
+"""
+
+from dictquerier.optimizer.reorder import PredicateReorderer, reorder_predicates
+
+__all__ = ['PredicateReorderer', 'reorder_predicates']
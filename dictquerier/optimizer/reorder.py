@@ -0,0 +1,321 @@
+"""
+过滤条件谓词重排
+
+根据估算的代价和选择率，重排过滤条件中可交换的 && / || 操作数，
+使廉价的键比较先于脚本调用执行。
+"""
+from typing import Iterable, List, Tuple
+
+from dictquerier.executor.visitor import ASTVisitor
+from dictquerier.executor.native import native_function
+from dictquerier.script.manager import script_manager
+from dictquerier.tokenizer.enum import Operator
+from dictquerier.syntax_tree.node import (
+    ASTNode, NameNode, NumberNode, StringNode, VarRefNode, ScriptCallNode,
+    BinaryOpNode, KeyNode, IndexNode, SliceNode, RecursiveKeyNode, AdaptiveLogicalNode, ParamNode, SetNode, PatternNode,
+    iter_child_nodes, path_steps
+)
+
+# 各类节点的估算代价，脚本调用远比键访问和比较昂贵
+LITERAL_COST = 1
+VARIABLE_COST = 2
+ACCESS_COST = 1
+DESCENT_COST = 20
+OPERATOR_COST = 1
+REGEX_COST = 5
+SCRIPT_CALL_COST = 50
+NATIVE_COST = 5
+
+# 各类比较操作的估算选择率（结果为真的概率）
+COMPARISON_SELECTIVITY = {
+    Operator.EQUAL: 0.1,
+    Operator.NOT_EQUAL: 0.9,
+    Operator.GREATER_THAN: 1 / 3,
+    Operator.LESS_THAN: 1 / 3,
+    Operator.GREATER_EQUAL: 1 / 3,
+    Operator.LESS_EQUAL: 1 / 3,
+    Operator.IN: 0.2,
+    Operator.MATCH: 0.2,
+}
+DEFAULT_SELECTIVITY = 0.5
+
+LOGICAL_OPERATORS = (Operator.LOGICAL_AND, Operator.LOGICAL_OR)
+# 操作数求值不抛出异常时，运算本身也不会抛出异常的操作符（in 吞掉了TypeError）
+SAFE_OPERATORS = LOGICAL_OPERATORS + (Operator.EQUAL, Operator.NOT_EQUAL, Operator.IN)
+ORDERING_OPERATORS = (Operator.GREATER_THAN, Operator.LESS_THAN, Operator.GREATER_EQUAL, Operator.LESS_EQUAL)
+
+
+class PredicateReorderer(ASTVisitor):
+    """
+    谓词重排优化器
+
+    只重排位于过滤条件（布尔上下文）中的逻辑运算，此时只关心结果的真假，
+    交换操作数不会改变过滤结果。操作数中包含未标记为纯函数的脚本调用时，
+    保持用户书写的顺序不变。
+
+    可能抛出异常的操作数（见can_raise）保持在原来的位置，只在相邻的不会抛出异常的操作数之间重排：
+    这样一段操作数是否全部为真（或为假）与顺序无关，之后的操作数是否被短路跳过也就与顺序无关，
+    重排前后的过滤结果和抛出的异常都相同。
+    """
+    def __init__(self, adaptive: bool = False, reorder_interval: int = 64):
+        """
+        Args:
+            adaptive (bool, optional): 是否生成运行时根据观测选择率自适应调整顺序的节点. Defaults to False.
+            reorder_interval (int, optional): 自适应节点每求值多少次重新排序一次. Defaults to 64.
+        """
+        self.adaptive = adaptive
+        self.reorder_interval = reorder_interval
+        self._in_condition = False
+
+    def optimize(self, node: ASTNode) -> ASTNode:
+        """优化入口方法，返回优化后的AST根节点"""
+        return self._rewrite(node, False)
+
+    def _rewrite(self, node: ASTNode, in_condition: bool) -> ASTNode:
+        """在指定上下文中重写节点"""
+        if node is None:
+            return None
+        old_in_condition = self._in_condition
+        self._in_condition = in_condition
+        try:
+            return self.visit(node)
+        finally:
+            self._in_condition = old_in_condition
+
+    def visit_NameNode(self, node: NameNode):
+        return node
+
+    def visit_NumberNode(self, node: NumberNode):
+        return node
+
+    def visit_StringNode(self, node: StringNode):
+        return node
+
+    def visit_VarRefNode(self, node: VarRefNode):
+        return node
+
+    def visit_ParamNode(self, node: ParamNode):
+        return node
+
+    def visit_SetNode(self, node: SetNode):
+        return node
+
+    def visit_PatternNode(self, node: PatternNode):
+        return node
+
+    def visit_AdaptiveLogicalNode(self, node: AdaptiveLogicalNode):
+        return node
+
+    def visit_ScriptCallNode(self, node: ScriptCallNode):
+        node.args = [self._rewrite(arg, False) for arg in node.args]
+        node.kwargs = {key: self._rewrite(value, False) for key, value in node.kwargs.items()}
+        return node
+
+    def visit_BinaryOpNode(self, node: BinaryOpNode):
+        if not (self._in_condition and node.op in LOGICAL_OPERATORS):
+            # 比较和算术运算的操作数需要具体值，不属于布尔上下文；
+            # 左深的运算链沿左侧循环重写，不逐层递归
+            chain = [node]
+            while isinstance(chain[-1].left, BinaryOpNode):
+                chain.append(chain[-1].left)
+            chain[-1].left = self._rewrite(chain[-1].left, False)
+            for current in reversed(chain):
+                current.right = self._rewrite(current.right, False)
+            return node
+        
+        # 展开连续的同类逻辑运算，逻辑运算的操作数仍处于布尔上下文中
+        operands = [self._rewrite(operand, True) for operand in self._flatten(node, node.op)]
+        
+        segments = self._segments(operands)
+        if not all(self.is_pure(operand) for operand in operands) or all(len(segment) == 1 for segment in segments):
+            # 存在副作用或没有可以交换的操作数时保持原有顺序
+            return self._build_chain(node, operands)
+        
+        segments = [self._sort_operands(node.op, segment) for segment in segments]
+        operands = [operand for segment in segments for operand in segment]
+        if self.adaptive:
+            # 运行时也只在各段之内调整顺序
+            bounds, position = [], 0
+            for segment in segments:
+                bounds.append(list(range(position, position + len(segment))))
+                position += len(segment)
+            return AdaptiveLogicalNode(node.op, operands, self.reorder_interval, node.line, node.column, bounds)
+        return self._build_chain(node, operands)
+
+    def _segments(self, operands: List[ASTNode]) -> List[List[ASTNode]]:
+        """将操作数分为可以在段内交换顺序的段：相邻的不会抛出异常的操作数为一段，可能抛出异常的操作数单独为一段"""
+        segments = []
+        for operand in operands:
+            if self.can_raise(operand) or not segments or self.can_raise(segments[-1][0]):
+                segments.append([operand])
+            else:
+                segments[-1].append(operand)
+        return segments
+
+    def visit_KeyNode(self, node: KeyNode):
+        return self._rewrite_path(node)
+
+    def visit_RecursiveKeyNode(self, node: RecursiveKeyNode):
+        return self._rewrite_path(node)
+
+    def visit_IndexNode(self, node: IndexNode):
+        return self._rewrite_path(node)
+
+    def visit_SliceNode(self, node: SliceNode):
+        return self._rewrite_path(node)
+
+    def _rewrite_path(self, node: ASTNode) -> ASTNode:
+        """从起点开始按顺序重写路径链上每一步的子表达式，不沿路径逐层递归"""
+        steps = path_steps(node)
+        steps[0].obj = self._rewrite(steps[0].obj, False)
+        for step in steps:
+            if isinstance(step, IndexNode):
+                # 条件过滤的索引表达式处于布尔上下文中
+                step.index = self._rewrite(step.index, isinstance(step.index, BinaryOpNode))
+            elif isinstance(step, SliceNode):
+                step.start = self._rewrite(step.start, False)
+                step.end = self._rewrite(step.end, False)
+                step.step = self._rewrite(step.step, False)
+        return node
+
+    @staticmethod
+    def _flatten(node: ASTNode, op: Operator) -> List[ASTNode]:
+        """将左深或右深的同类逻辑运算树按从左到右的顺序展开为操作数列表"""
+        operands = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, BinaryOpNode) and current.op == op:
+                stack.append(current.right)
+                stack.append(current.left)
+            else:
+                operands.append(current)
+        return operands
+
+    def _build_chain(self, origin: BinaryOpNode, operands: List[ASTNode]) -> BinaryOpNode:
+        """按给定顺序重新构造左深的逻辑运算树"""
+        result = operands[0]
+        for operand in operands[1:]:
+            result = BinaryOpNode(result, origin.op, operand, origin.line, origin.column)
+        return result
+
+    def _sort_operands(self, op: Operator, operands: List[ASTNode]) -> List[ASTNode]:
+        """
+        按排序权重对操作数做稳定排序
+
+        &&：权重为 代价 / (1 - 选择率)，优先执行廉价且容易为假的操作数
+        ||：权重为 代价 / 选择率，优先执行廉价且容易为真的操作数
+        """
+        def rank(operand: ASTNode) -> float:
+            cost = self.estimate_cost(operand)
+            selectivity = self.estimate_selectivity(operand)
+            if op == Operator.LOGICAL_AND:
+                return cost / max(1 - selectivity, 1e-6)
+            return cost / max(selectivity, 1e-6)
+        
+        return sorted(operands, key=rank)
+
+    @classmethod
+    def estimate_cost(cls, node: ASTNode) -> float:
+        """估算节点的求值代价，即节点及其参与求值的子节点各自的代价之和"""
+        total = 0
+        stack = [node]
+        while stack:
+            cost, children = cls._node_cost(stack.pop())
+            total += cost
+            stack.extend(children)
+        return total
+
+    @staticmethod
+    def _node_cost(node: ASTNode) -> Tuple[float, Iterable[ASTNode]]:
+        """节点自身的代价，以及代价需要计入的子节点"""
+        if isinstance(node, (NameNode, NumberNode, StringNode, SetNode, PatternNode)):
+            return LITERAL_COST, ()
+        if isinstance(node, (VarRefNode, ParamNode)):
+            return VARIABLE_COST, ()
+        if isinstance(node, ScriptCallNode):
+            if native_function(node) is not None:
+                return NATIVE_COST, node.args
+            return SCRIPT_CALL_COST, list(node.args) + list(node.kwargs.values())
+        if isinstance(node, RecursiveKeyNode):
+            return DESCENT_COST, (node.obj,)
+        if isinstance(node, (KeyNode, IndexNode, SliceNode)):
+            return ACCESS_COST, iter_child_nodes(node)
+        if isinstance(node, BinaryOpNode) and node.op == Operator.MATCH:
+            return REGEX_COST, (node.left, node.right)
+        return OPERATOR_COST, iter_child_nodes(node)
+
+    @classmethod
+    def estimate_selectivity(cls, node: ASTNode) -> float:
+        """估算条件表达式为真的概率"""
+        if isinstance(node, BinaryOpNode) and node.op not in LOGICAL_OPERATORS:
+            return COMPARISON_SELECTIVITY.get(node.op, DEFAULT_SELECTIVITY)
+        if isinstance(node, (BinaryOpNode, AdaptiveLogicalNode)):
+            # 连续的同类逻辑运算按操作数列表计算，不沿运算链逐层递归
+            operands = node.operands if isinstance(node, AdaptiveLogicalNode) else cls._flatten(node, node.op)
+            selectivities = [cls.estimate_selectivity(operand) for operand in operands]
+            result = 1.0
+            if node.op == Operator.LOGICAL_AND:
+                for selectivity in selectivities:
+                    result *= selectivity
+                return result
+            for selectivity in selectivities:
+                result *= 1 - selectivity
+            return 1 - result
+        return DEFAULT_SELECTIVITY
+
+    @staticmethod
+    def can_raise(node: ASTNode) -> bool:
+        """
+        检查条件表达式在过滤时是否可能抛出异常
+
+        字面量、绑定参数（未绑定的参数在CompiledQuery调用时即报错）、当前元素的键、
+        以常量键或下标访问的路径、相等、不等和集合成员比较、与已编译正则的匹配，
+        以及两个数字字面量之间的大小比较不会抛出异常；名称、变量、脚本调用、算术运算、
+        其他大小比较、切片和递归下降等视为可能抛出异常
+        """
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, (NumberNode, StringNode, SetNode, PatternNode, ParamNode)):
+                continue
+            if isinstance(current, KeyNode):
+                stack.append(current.obj)
+            elif isinstance(current, IndexNode) and isinstance(current.index, (StringNode, NumberNode)):
+                stack.append(current.obj)
+            elif isinstance(current, AdaptiveLogicalNode):
+                stack.extend(current.operands)
+            elif isinstance(current, BinaryOpNode) and current.op in SAFE_OPERATORS:
+                stack.extend((current.left, current.right))
+            elif isinstance(current, BinaryOpNode) and current.op == Operator.MATCH and isinstance(current.right, PatternNode):
+                stack.append(current.left)
+            elif not (isinstance(current, BinaryOpNode) and current.op in ORDERING_OPERATORS
+                      and isinstance(current.left, NumberNode) and isinstance(current.right, NumberNode)):
+                return True
+        return False
+
+    @classmethod
+    def is_pure(cls, node: ASTNode) -> bool:
+        """检查节点及其子节点中的脚本调用是否都被标记为纯函数，内置函数视为纯函数"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, ScriptCallNode) and native_function(current) is None:
+                module_path = ".".join(module.name for module in current.module)
+                if not script_manager.is_pure(current.name.name, module_path):
+                    return False
+            stack.extend(iter_child_nodes(current))
+        return True
+
+def reorder_predicates(node: ASTNode, adaptive: bool = False, reorder_interval: int = 64) -> ASTNode:
+    """
+    重排AST中过滤条件的 && / || 操作数
+
+    Args:
+        node (ASTNode): AST根节点
+        adaptive (bool, optional): 是否在运行时根据观测到的选择率自适应调整顺序. Defaults to False.
+        reorder_interval (int, optional): 自适应重排的间隔次数. Defaults to 64.
+    Returns:
+        ASTNode: 优化后的AST根节点
+    """
+    return PredicateReorderer(adaptive, reorder_interval).optimize(node)
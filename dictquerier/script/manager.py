@@ -3,12 +3,19 @@ import functools
 from typing import Any, Callable, Tuple, Optional
 
 from dictquerier.exceptions import UnknowScript
+from dictquerier.instrumentation.manager import instrumentation, result_size
 
 class ScriptManager:
     def __init__(self):
         self.scripts = {}
         self.variables = {}
         
+        # 被标记为纯函数（无副作用且结果确定）的脚本
+        self._pure_scripts = set()
+        
+        # 脚本和变量的版本号，每次注册、卸载、标记或定义变量时递增，用于使查询结果缓存失效
+        self.version = 0
+        
         # 缓存数据
         self._module_cache = {}
         self._function_cache = {}
@@ -20,17 +27,25 @@ class ScriptManager:
             'total_calls': 0,
         }
 
-    def register(self, name: str = None):
+    def register(self, name: str = None, pure: bool = False):
         """
         注册脚本
 
         Args:
             name (str, optional): 自定义脚本调用名，可选
+            pure (bool, optional): 是否为纯函数（无副作用且相同参数返回相同结果），优化器仅会对纯函数调用进行重排. Defaults to False.
         Returns:
         """
         def decorator(func):
             key = name or func.__name__
             self.scripts[key] = func
+            if pure:
+                self._pure_scripts.add(key)
+            else:
+                self._pure_scripts.discard(key)
+            self.version += 1
+            # 同名脚本重新注册时清除旧的查找缓存
+            self.clear_specific_cache(key)
             return func
         return decorator
     
@@ -46,6 +61,8 @@ class ScriptManager:
         if name in self.scripts:
             # 从scripts字典中移除
             del self.scripts[name]
+            self._pure_scripts.discard(name)
+            self.version += 1
             
             # 清除相关缓存
             self.clear_specific_cache(name)
@@ -53,6 +70,34 @@ class ScriptManager:
             return True
         return False
     
+    def mark_pure(self, name: str, path: str = None, pure: bool = True):
+        """
+        标记脚本是否为纯函数，用于未通过register注册的脚本（如内置函数或模块函数）
+        
+        Args:
+            name (str): 脚本名
+            path (str, optional): 模块路径，可选
+            pure (bool, optional): 是否为纯函数. Defaults to True.
+        """
+        cache_key = self._get_cache_key(name, path)
+        if pure:
+            self._pure_scripts.add(cache_key)
+        else:
+            self._pure_scripts.discard(cache_key)
+        self.version += 1
+
+    def is_pure(self, name: str, path: str = None) -> bool:
+        """
+        检查脚本是否被标记为纯函数
+        
+        Args:
+            name (str): 脚本名
+            path (str, optional): 模块路径，可选
+        Returns:
+            bool: 是否为纯函数
+        """
+        return self._get_cache_key(name, path) in self._pure_scripts
+    
     def _get_cache_key(self, name: str, path: str = None) -> str:
         """生成缓存键"""
         return f"{path}:{name}" if path else name
@@ -223,6 +268,12 @@ class ScriptManager:
         func, is_callable = self._get_function(name, path)
         
         if func and is_callable:
+            if instrumentation.enabled:
+                with instrumentation.span('script', name=f"{path}.{name}" if path else name) as event:
+                    result = func(*args, **kwargs)
+                    if event is not None:
+                        event.result_size = result_size(result)
+                return result
             return func(*args, **kwargs)
             
         if path:
@@ -234,6 +285,7 @@ class ScriptManager:
 
     def define(self, var_name, var_value):
         self.variables[var_name] = var_value
+        self.version += 1
         
     def get(self, var_name):
         return self.variables.get(var_name)
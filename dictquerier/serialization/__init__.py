@@ -0,0 +1,30 @@
+"""
+序列化模块
+
+提供可插拔的JSON编解码后端，自动使用已安装的更快的JSON库；按需解码的JSON文档；直接在MessagePack编码上查询；可随机访问、按需解码的紧凑二进制编码；逐个元素写出查询结果的流式输出；以及CSV和Arrow列式导出
+"""
+
+from dictquerier.serialization.backends import (
+    AUTO, JsonBackend, OrjsonBackend, UjsonBackend,
+    register_backend, available_backends, get_backend,
+)
+from dictquerier.serialization.lazy import LazyJsonDict, LazyJsonList, loads_lazy
+from dictquerier.serialization.messagepack import (
+    ExtType, MsgpackDict, MsgpackFormatError, MsgpackList, loads_msgpack, packb, unpackb,
+)
+from dictquerier.serialization.packed import PackedFormatError, pack, root
+from dictquerier.serialization.writers import (
+    OUTPUT_FORMATS, ResultWriter, JsonWriter, JsonLinesWriter, CsvWriter, ArrowWriter,
+    available_formats, get_writer, export_columns,
+)
+from dictquerier.serialization.columnar import column_chunks, to_columns, to_arrow
+from dictquerier.executor.views import to_python
+
+__all__ = [
+    'AUTO', 'JsonBackend', 'OrjsonBackend', 'UjsonBackend', 'register_backend', 'available_backends', 'get_backend',
+    'LazyJsonDict', 'LazyJsonList', 'loads_lazy',
+    'ExtType', 'MsgpackDict', 'MsgpackFormatError', 'MsgpackList', 'loads_msgpack', 'packb', 'unpackb',
+    'PackedFormatError', 'pack', 'root', 'to_python',
+    'OUTPUT_FORMATS', 'ResultWriter', 'JsonWriter', 'JsonLinesWriter', 'CsvWriter', 'ArrowWriter',
+    'available_formats', 'get_writer', 'export_columns', 'column_chunks', 'to_columns', 'to_arrow',
+]
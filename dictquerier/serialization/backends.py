@@ -0,0 +1,196 @@
+"""
+可插拔的JSON编解码后端
+
+自动检测已安装的更快的JSON库（orjson、ujson），未安装时使用标准库json。
+第三方库不支持的输入（如非UTF-8编码、超出64位的整数、NaN）会回退到标准库处理，
+因此所有后端的解码结果和错误类型与标准库一致。
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# 自动选择已安装的最快后端
+AUTO = 'auto'
+
+# 把所有数字映射为 '0' 后查找19个连续的 '0'，比正则表达式快一个数量级
+_DIGITS = bytes.maketrans(b'123456789', b'000000000')
+_LONG_DIGITS = b'0' * 19
+
+
+def _has_long_digits(data: Union[str, bytes]) -> bool:
+    """检查是否含有19位及以上的连续数字，即可能超出64位的整数"""
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return _LONG_DIGITS in bytes(data).translate(_DIGITS)
+
+
+class JsonBackend:
+    """
+    JSON编解码后端基类，默认实现使用标准库json
+
+    Attributes:
+        name (str): 后端名称，用于注册和选择后端
+        separator (str): 紧凑输出时数组元素之间的分隔符，逐个元素输出数组时使用
+    """
+    name: str = 'json'
+    separator: str = ', '
+
+    @classmethod
+    def available(cls) -> bool:
+        """后端依赖的库是否已安装"""
+        return True
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        解析JSON
+
+        Args:
+            data (Union[str, bytes]): JSON文本或UTF-8编码的字节串
+        Returns:
+            Any: 解析结果
+        Raises:
+            json.JSONDecodeError: 不是有效的JSON
+        """
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: Optional[int] = None) -> str:
+        """
+        序列化为JSON文本，非ASCII字符原样输出
+
+        Args:
+            obj (Any): 需要序列化的对象
+            indent (int, optional): 缩进空格数，为None时不换行. Defaults to None.
+        Returns:
+            str: JSON文本
+        """
+        return json.dumps(obj, ensure_ascii=False, indent=indent)
+
+    def dumpb(self, obj: Any, indent: Optional[int] = None) -> bytes:
+        """序列化为UTF-8编码的JSON字节串，参数同dumps"""
+        return self.dumps(obj, indent).encode('utf-8')
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name!r})"
+
+
+_stdlib = JsonBackend()
+
+
+class OrjsonBackend(JsonBackend):
+    """orjson后端，只支持2个空格的缩进，其他缩进使用标准库"""
+    name = 'orjson'
+    separator = ','
+
+    @classmethod
+    def available(cls) -> bool:
+        return orjson is not None
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        # orjson把超出64位的整数解析为浮点数而不报错，可能含有这样的整数时交给标准库
+        if _has_long_digits(data):
+            return _stdlib.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return _stdlib.loads(data)
+
+    def dumps(self, obj: Any, indent: Optional[int] = None) -> str:
+        return self.dumpb(obj, indent).decode('utf-8')
+
+    def dumpb(self, obj: Any, indent: Optional[int] = None) -> bytes:
+        if indent is None:
+            # 紧凑输出不含空格，标准库的分隔符为 ', ' 和 ': '
+            option = orjson.OPT_NON_STR_KEYS
+        elif indent == 2:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+        else:
+            return _stdlib.dumpb(obj, indent)
+        try:
+            return orjson.dumps(obj, option=option)
+        except orjson.JSONEncodeError:
+            return _stdlib.dumpb(obj, indent)
+
+
+class UjsonBackend(JsonBackend):
+    """ujson后端"""
+    name = 'ujson'
+    separator = ','
+
+    @classmethod
+    def available(cls) -> bool:
+        return ujson is not None
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return ujson.loads(data)
+        except (ValueError, OverflowError):
+            return _stdlib.loads(data)
+
+    def dumps(self, obj: Any, indent: Optional[int] = None) -> str:
+        try:
+            return ujson.dumps(obj, ensure_ascii=False, indent=indent or 0, escape_forward_slashes=False)
+        except (TypeError, ValueError, OverflowError):
+            return _stdlib.dumps(obj, indent)
+
+
+_backends: Dict[str, type] = {}
+_instances: Dict[str, JsonBackend] = {}
+
+
+def register_backend(backend: type) -> type:
+    """
+    注册JSON后端，同名后端会被覆盖，可用作类装饰器。自动选择时按注册顺序使用第一个已安装的后端，标准库最后
+
+    Args:
+        backend (type): JsonBackend的子类
+    Returns:
+        type: 注册的后端类
+    """
+    if not backend.name or backend.name == AUTO:
+        raise ValueError(f"后端名称不能为空或 '{AUTO}'")
+    _backends[backend.name] = backend
+    _instances.pop(backend.name, None)
+    return backend
+
+
+def available_backends() -> List[str]:
+    """获取已安装的后端名称，按自动选择的优先顺序排列"""
+    names = [name for name, backend in _backends.items() if backend.available()]
+    # 标准库始终可用，作为最后的选择
+    names.sort(key=lambda name: name == JsonBackend.name)
+    return names
+
+
+def get_backend(name: Optional[str] = AUTO) -> JsonBackend:
+    """
+    获取JSON后端
+
+    Args:
+        name (str, optional): 后端名称，'auto' 或 None 时使用已安装的最快后端. Defaults to 'auto'.
+    Returns:
+        JsonBackend: 后端实例
+    """
+    if name is None or name == AUTO:
+        name = available_backends()[0]
+    backend = _instances.get(name)
+    if backend is not None:
+        return backend
+    if name not in _backends:
+        raise ValueError(f"未知的JSON后端: {name}，可选: {', '.join([AUTO] + list(_backends))}")
+    if not _backends[name].available():
+        raise ValueError(f"JSON后端 {name} 依赖的库未安装")
+    backend = _instances[name] = _backends[name]()
+    return backend
+
+
+for _backend_class in (OrjsonBackend, UjsonBackend, JsonBackend):
+    register_backend(_backend_class)
@@ -0,0 +1,122 @@
+"""
+列式导出
+
+把查询结果中的对象列表按列收集：列表按块遍历一遍，每块中的对象按列名取值后直接组成各列，
+不为每一行构造新的字典；都是普通字典的块由 map(dict.get, ...) 在C层取值。
+对象为按需解码的视图时，只有被导出的列的值会被解码。
+CSV按块把列转置为行后写出，安装了pyarrow时，列可以转换为Arrow表并写出为Arrow IPC文件。
+"""
+from itertools import chain, islice, repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dictquerier.executor.views import DICT_TYPES
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+# 元素不是对象时，元素本身作为唯一的一列
+VALUE_COLUMN = 'value'
+
+# 每块的行数
+CHUNK_ROWS = 4096
+
+# 不需要转换的值的类型
+SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+_DICT_ONLY = frozenset((dict,))
+
+_MISSING = object()
+
+
+def column_chunks(items: Iterable[Any], columns: Optional[List[str]] = None,
+                  convert: Optional[Callable[[Any], Any]] = None,
+                  chunk_rows: int = CHUNK_ROWS) -> Tuple[List[str], Iterator[List[List[Any]]]]:
+    """
+    按块按列收集对象列表
+
+    Args:
+        items (Iterable[Any]): 元素，通常为对象（字典或字典视图）
+        columns (List[str], optional): 列名，即对象的键. Defaults to 第一个对象的键.
+        convert (Callable, optional): 对不是标量的值的转换，如将视图完整转换为列表和字典. Defaults to None.
+        chunk_rows (int, optional): 每块的行数. Defaults to 4096.
+    Returns:
+        Tuple[List[str], Iterator[List[List[Any]]]]: 列名，以及每块中各列的值；
+            对象缺少的键和不是对象的元素对应的值为None，未指定列名且第一个元素不是对象时，
+            只有一列 'value'，值为元素本身；没有元素且未指定列名时没有列
+    """
+    items = iter(items)
+    first = next(items, _MISSING)
+    if first is _MISSING:
+        return list(columns or ()), iter(())
+    scalar = columns is None and not isinstance(first, DICT_TYPES)
+    if columns is None:
+        columns = [VALUE_COLUMN] if scalar else list(first)
+    else:
+        columns = list(columns)
+    return columns, _chunks(chain((first,), items), columns, scalar, convert, chunk_rows)
+
+
+def _chunks(items: Iterator[Any], columns: List[str], scalar: bool,
+            convert: Optional[Callable[[Any], Any]], chunk_rows: int) -> Iterator[List[List[Any]]]:
+    while True:
+        chunk = list(islice(items, chunk_rows))
+        if not chunk:
+            return
+        if scalar:
+            values = [chunk]
+        elif _DICT_ONLY.issuperset(map(type, chunk)):
+            values = [list(map(dict.get, chunk, repeat(column))) for column in columns]
+        else:
+            values = [[item.get(column) if isinstance(item, DICT_TYPES) else None for item in chunk]
+                      for column in columns]
+        if convert is not None:
+            for position, column_values in enumerate(values):
+                if not SCALAR_TYPES.issuperset(map(type, column_values)):
+                    values[position] = [value if type(value) in SCALAR_TYPES else convert(value)
+                                        for value in column_values]
+        yield values
+
+
+def to_columns(items: Iterable[Any], columns: Optional[List[str]] = None,
+               convert: Optional[Callable[[Any], Any]] = None) -> Dict[str, List[Any]]:
+    """
+    按列收集对象列表，参数和取值规则同column_chunks
+
+    Returns:
+        Dict[str, List[Any]]: 列名到该列所有值的映射
+    """
+    columns, chunks = column_chunks(items, columns, convert)
+    result = [[] for _ in columns]
+    for values in chunks:
+        for column_values, chunk_values in zip(result, values):
+            column_values.extend(chunk_values)
+    return dict(zip(columns, result))
+
+
+def to_arrow(columns: Dict[str, List[Any]]):
+    """
+    将to_columns的结果转换为Arrow表，每列的类型由pyarrow按该列的全部值推断
+
+    Returns:
+        pyarrow.Table: Arrow表
+    Raises:
+        ValueError: 未安装pyarrow，或某一列的值无法转换为同一种Arrow类型
+    """
+    if pyarrow is None:
+        raise ValueError("Arrow输出依赖的库 pyarrow 未安装")
+    arrays = []
+    for name, values in columns.items():
+        try:
+            arrays.append(pyarrow.array(values))
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as e:
+            raise ValueError(f"列 '{name}' 无法转换为Arrow数组: {e}") from None
+    return pyarrow.Table.from_arrays(arrays, names=list(columns))
+
+
+def write_arrow(table, out):
+    """将Arrow表写出为Arrow IPC文件格式"""
+    with pyarrow.ipc.new_file(out, table.schema) as writer:
+        writer.write_table(table)
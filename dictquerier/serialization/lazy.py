@@ -0,0 +1,246 @@
+"""
+按需解码的JSON文档
+
+加载时只对原始JSON文本做一遍结构扫描，记录较大的对象和数组的起止位置，不创建任何Python对象。
+LazyJsonDict和LazyJsonList是这些对象和数组的只读视图：第一次访问时才解析它的直接成员，
+标量和较小的对象、数组由json的C扫描器直接完整解码，较大的对象和数组仍以视图的形式返回，解析结果缓存在视图中。
+每次查询只访问文档一小部分时，未被访问的大块数据既不会被解码，也不占用Python对象的内存。
+
+由于只有被访问的部分会被解析，结构扫描之外的语法错误在所在的对象或数组被解析时才会抛出（json.JSONDecodeError）。
+"""
+import json
+import re
+from json.decoder import JSONDecodeError, scanstring
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from dictquerier.executor.views import DictView, SequenceView
+
+# 默认情况下，长度（字符数）小于此值的对象和数组在父节点被访问时直接完整解码
+EAGER_THRESHOLD = 1024
+
+_BRACKETS = re.compile(r'[\[\]{}]')
+# 文本中有转义的引号时，需要逐个跳过字符串才能判断括号是否在字符串中
+_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.DOTALL)
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_WHITESPACE_CHARS = ' \t\n\r'
+_scan_once = json.JSONDecoder().scan_once
+
+
+class LazyJson:
+    """
+    JSON文本及其结构索引
+
+    Attributes:
+        text (str): JSON文本
+        ends (Dict[int, int]): 长度不小于eager_threshold的对象和数组的起始位置到结束位置（右括号）的映射
+    """
+    def __init__(self, text: str, eager_threshold: int = EAGER_THRESHOLD):
+        self.text = text
+        self.ends = _structure(text, eager_threshold)
+
+    def root(self) -> Any:
+        """文档根节点"""
+        text = self.text
+        pos = _skip(text, 0)
+        if pos == len(text):
+            raise JSONDecodeError("Expecting value", text, pos)
+        value, end = self.value_at(pos)
+        if _skip(text, end) != len(text):
+            raise JSONDecodeError("Extra data", text, end)
+        return value
+
+    def value_at(self, pos: int) -> Tuple[Any, int]:
+        """读取pos处的值，返回值和值之后的位置；较大的对象和数组返回视图"""
+        end = self.ends.get(pos)
+        if end is not None:
+            view = LazyJsonDict(self, pos) if self.text[pos] == '{' else LazyJsonList(self, pos)
+            return view, end + 1
+        try:
+            return _scan_once(self.text, pos)
+        except StopIteration:
+            raise JSONDecodeError("Expecting value", self.text, pos) from None
+
+    def decode(self, start: int) -> Any:
+        """完整解码从start开始的对象或数组"""
+        return _scan_once(self.text, start)[0]
+
+
+def _skip(text: str, pos: int) -> int:
+    """跳过空白字符"""
+    if pos < len(text) and text[pos] in _WHITESPACE_CHARS:
+        return _WHITESPACE.match(text, pos).end()
+    return pos
+
+
+def _structure(text: str, threshold: int) -> Dict[int, int]:
+    """扫描一遍文本，记录较大的对象和数组的起止位置"""
+    ends = {}
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for pos in _brackets(text):
+        char = text[pos]
+        if char == '{' or char == '[':
+            push(pos)
+            continue
+        if not stack:
+            raise JSONDecodeError("Unexpected closing bracket", text, pos)
+        start = pop()
+        if (text[start] == '{') != (char == '}'):
+            raise JSONDecodeError("Mismatched closing bracket", text, pos)
+        if pos - start >= threshold:
+            ends[start] = pos
+    if stack:
+        raise JSONDecodeError("Unterminated object or array", text, stack[-1])
+    return ends
+
+
+def _brackets(text: str) -> Iterator[int]:
+    """产出不在字符串中的括号位置"""
+    if '\\"' in text:
+        # 有转义的引号时逐个跳过字符串
+        for match in _TOKENS.finditer(text):
+            if text[match.start()] != '"':
+                yield match.start()
+        return
+
+    # 没有转义的引号时，括号之前的引号总数为奇数说明括号位于字符串中，只需统计相邻括号之间的引号数量
+    count = text.count
+    last = 0
+    in_string = False
+    for match in _BRACKETS.finditer(text):
+        pos = match.start()
+        if count('"', last, pos) & 1:
+            in_string = not in_string
+        last = pos
+        if not in_string:
+            yield pos
+
+
+class LazyJsonDict(DictView):
+    """JSON对象视图，第一次访问时解析直接成员"""
+    def __init__(self, document: LazyJson, start: int):
+        self._document = document
+        self._start = start
+        self._members = None
+
+    def _parse(self) -> Dict[str, Any]:
+        document = self._document
+        text = document.text
+        end = document.ends[self._start]
+        members = {}
+        pos = _skip(text, self._start + 1)
+        while pos < end:
+            if text[pos] != '"':
+                raise JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+            key, pos = scanstring(text, pos + 1)
+            pos = _skip(text, pos)
+            if text[pos] != ':':
+                raise JSONDecodeError("Expecting ':' delimiter", text, pos)
+            members[key], pos = document.value_at(_skip(text, pos + 1))
+            pos = _skip(text, pos)
+            if pos < end:
+                if text[pos] != ',':
+                    raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+                pos = _skip(text, pos + 1)
+                if pos == end:
+                    raise JSONDecodeError("Illegal trailing comma before end of object", text, pos)
+        if pos != end:
+            raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+        self._members = members
+        return members
+
+    def _parsed(self) -> Dict[str, Any]:
+        members = self._members
+        return members if members is not None else self._parse()
+
+    def __getitem__(self, key):
+        return self._parsed()[key]
+
+    def get(self, key, default=None):
+        return self._parsed().get(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._parsed()
+
+    def __len__(self) -> int:
+        return len(self._parsed())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parsed())
+
+    def keys(self):
+        return self._parsed().keys()
+
+    def values(self):
+        return self._parsed().values()
+
+    def items(self):
+        return self._parsed().items()
+
+    def to_python(self) -> Dict[str, Any]:
+        """完整解码为字典"""
+        return self._document.decode(self._start)
+
+
+class LazyJsonList(SequenceView):
+    """JSON数组视图，第一次访问时解析直接成员"""
+    def __init__(self, document: LazyJson, start: int):
+        self._document = document
+        self._start = start
+        self._items = None
+
+    def _parse(self) -> List[Any]:
+        document = self._document
+        text = document.text
+        end = document.ends[self._start]
+        items = []
+        pos = _skip(text, self._start + 1)
+        while pos < end:
+            value, pos = document.value_at(pos)
+            items.append(value)
+            pos = _skip(text, pos)
+            if pos < end:
+                if text[pos] != ',':
+                    raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+                pos = _skip(text, pos + 1)
+                if pos == end:
+                    raise JSONDecodeError("Illegal trailing comma before end of array", text, pos)
+        if pos != end:
+            raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+        self._items = items
+        return items
+
+    def _parsed(self) -> List[Any]:
+        items = self._items
+        return items if items is not None else self._parse()
+
+    def __len__(self) -> int:
+        return len(self._parsed())
+
+    def __getitem__(self, index):
+        return self._parsed()[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._parsed())
+
+    def to_python(self) -> List[Any]:
+        """完整解码为列表"""
+        return self._document.decode(self._start)
+
+
+def loads_lazy(raw: Union[str, bytes, bytearray], eager_threshold: int = EAGER_THRESHOLD) -> Any:
+    """
+    按需解码JSON文本
+
+    Args:
+        raw (Union[str, bytes, bytearray]): JSON文本，字节按UTF-8解码
+        eager_threshold (int, optional): 长度（字符数）小于此值的对象和数组直接完整解码，为0时所有对象和数组都以视图返回. Defaults to 1024.
+    Returns:
+        Any: 文档根节点，对象和数组以LazyJsonDict和LazyJsonList视图返回
+    Raises:
+        json.JSONDecodeError: 括号不匹配或根节点之后有多余内容
+    """
+    if not isinstance(raw, str):
+        raw = bytes(raw).decode('utf-8')
+    return LazyJson(raw, eager_threshold).root()
@@ -0,0 +1,512 @@
+"""
+直接在MessagePack编码上查询
+
+MsgpackDict和MsgpackList是MessagePack缓冲区上的只读视图，不需要先把整个文档解码为字典和列表：
+按键查找时逐个比较键的原始字节，不匹配的条目按长度前缀跳过；按下标访问时记录一次各元素的位置。
+只有查询访问到的标量会被解码，嵌套的映射和数组仍以视图的形式返回。
+
+同时提供纯Python实现的编码器和解码器（packb / unpackb），不依赖msgpack库；
+安装了msgpack库时，完整解码视图（to_python）使用其C实现。
+"""
+import struct
+from array import array
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from dictquerier.executor.views import DictView, SequenceView
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MsgpackFormatError(ValueError):
+    """缓冲区不是有效的MessagePack编码"""
+
+
+# 扩展类型，解码后保留类型码和原始数据
+ExtType = namedtuple('ExtType', ['code', 'data'])
+
+_U8 = struct.Struct('>B')
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+_U64 = struct.Struct('>Q')
+_I8 = struct.Struct('>b')
+_I16 = struct.Struct('>h')
+_I32 = struct.Struct('>i')
+_I64 = struct.Struct('>q')
+_F32 = struct.Struct('>f')
+_F64 = struct.Struct('>d')
+
+# 类型字节 -> 长度前缀的结构体，分别用于 str、bin、ext、array、map
+_STR_LENGTH = {0xd9: _U8, 0xda: _U16, 0xdb: _U32}
+_BIN_LENGTH = {0xc4: _U8, 0xc5: _U16, 0xc6: _U32}
+_EXT_LENGTH = {0xc7: _U8, 0xc8: _U16, 0xc9: _U32}
+_ARRAY_LENGTH = {0xdc: _U16, 0xdd: _U32}
+_MAP_LENGTH = {0xde: _U16, 0xdf: _U32}
+# 定长数值：类型字节 -> 结构体；定长扩展类型：类型字节 -> 数据长度
+_NUMBERS = {
+    0xca: _F32, 0xcb: _F64,
+    0xcc: _U8, 0xcd: _U16, 0xce: _U32, 0xcf: _U64,
+    0xd0: _I8, 0xd1: _I16, 0xd2: _I32, 0xd3: _I64,
+}
+_FIXEXT = {0xd4: 1, 0xd5: 2, 0xd6: 4, 0xd7: 8, 0xd8: 16}
+
+_ARRAY, _MAP = 1, 2
+
+
+def packb(value: Any) -> bytes:
+    """
+    将对象编码为MessagePack
+
+    Args:
+        value (Any): 由dict、list、tuple、str、bytes、int、float、bool、None和ExtType组成的对象
+    Returns:
+        bytes: 编码结果
+    """
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def _pack(value: Any, out: bytearray):
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(value)
+        elif -0x20 <= value < 0:
+            out += _I8.pack(value)
+        elif 0 <= value <= 0xffffffffffffffff:
+            for code, fmt in ((0xcc, _U8), (0xcd, _U16), (0xce, _U32), (0xcf, _U64)):
+                if value < 1 << (fmt.size * 8):
+                    out.append(code)
+                    out += fmt.pack(value)
+                    break
+        elif -(1 << 63) <= value < 0:
+            for code, fmt in ((0xd0, _I8), (0xd1, _I16), (0xd2, _I32), (0xd3, _I64)):
+                if value >= -(1 << (fmt.size * 8 - 1)):
+                    out.append(code)
+                    out += fmt.pack(value)
+                    break
+        else:
+            raise OverflowError(f"整数 {value} 超出MessagePack的表示范围")
+    elif isinstance(value, float):
+        out.append(0xcb)
+        out += _F64.pack(value)
+    elif isinstance(value, str):
+        raw = value.encode('utf-8')
+        _pack_length(len(raw), out, 0xa0, 32, (0xd9, _U8), (0xda, _U16), (0xdb, _U32))
+        out += raw
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        raw = bytes(value)
+        _pack_length(len(raw), out, None, 0, (0xc4, _U8), (0xc5, _U16), (0xc6, _U32))
+        out += raw
+    elif isinstance(value, ExtType):
+        # ExtType是元组的子类，需要在列表和元组之前判断
+        length = len(value.data)
+        fixed = {1: 0xd4, 2: 0xd5, 4: 0xd6, 8: 0xd7, 16: 0xd8}.get(length)
+        if fixed is not None:
+            out.append(fixed)
+        else:
+            _pack_length(length, out, None, 0, (0xc7, _U8), (0xc8, _U16), (0xc9, _U32))
+        out += _I8.pack(value.code)
+        out += value.data
+    elif isinstance(value, (list, tuple)):
+        _pack_length(len(value), out, 0x90, 16, (0xdc, _U16), (0xdd, _U32))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _pack_length(len(value), out, 0x80, 16, (0xde, _U16), (0xdf, _U32))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"无法编码 {type(value).__name__} 类型的值")
+
+
+def _pack_length(length: int, out: bytearray, fix_base: Optional[int], fix_limit: int, *formats):
+    """写入类型字节和长度前缀，长度较小时使用fix格式"""
+    if fix_base is not None and length < fix_limit:
+        out.append(fix_base | length)
+        return
+    for code, fmt in formats:
+        if length < 1 << (fmt.size * 8):
+            out.append(code)
+            out += fmt.pack(length)
+            return
+    raise OverflowError(f"长度 {length} 超出MessagePack的表示范围")
+
+
+class MsgpackBuffer:
+    """
+    MessagePack缓冲区，缓存已跳过的映射和数组的结束位置
+
+    Attributes:
+        buf: 缓冲区（bytes、bytearray或memoryview）
+    """
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview]):
+        self.buf = buffer
+        self._ends: Dict[int, int] = {}
+
+    def _check(self, end: int, pos: int) -> int:
+        if end > len(self.buf):
+            raise MsgpackFormatError(f"数据在偏移 {pos} 处被截断")
+        return end
+
+    def header(self, pos: int) -> Tuple[int, int, int]:
+        """
+        读取映射或数组的头部
+
+        Returns:
+            tuple: (_ARRAY / _MAP / 0, 元素数量, 第一个元素的位置)，不是映射或数组时第一项为0
+        """
+        buf = self.buf
+        try:
+            code = buf[pos]
+            if 0x90 <= code <= 0x9f:
+                return _ARRAY, code & 0x0f, pos + 1
+            if 0x80 <= code <= 0x8f:
+                return _MAP, code & 0x0f, pos + 1
+            fmt = _ARRAY_LENGTH.get(code)
+            if fmt is not None:
+                return _ARRAY, fmt.unpack_from(buf, pos + 1)[0], pos + 1 + fmt.size
+            fmt = _MAP_LENGTH.get(code)
+            if fmt is not None:
+                return _MAP, fmt.unpack_from(buf, pos + 1)[0], pos + 1 + fmt.size
+            return 0, 0, pos
+        except (IndexError, struct.error):
+            raise MsgpackFormatError(f"数据在偏移 {pos} 处被截断") from None
+
+    def string(self, pos: int) -> Tuple[int, int]:
+        """读取字符串的数据区间，不是字符串时返回 (-1, -1)"""
+        buf = self.buf
+        try:
+            code = buf[pos]
+            if 0xa0 <= code <= 0xbf:
+                return pos + 1, pos + 1 + (code & 0x1f)
+            fmt = _STR_LENGTH.get(code)
+            if fmt is not None:
+                start = pos + 1 + fmt.size
+                return start, start + fmt.unpack_from(buf, pos + 1)[0]
+            return -1, -1
+        except (IndexError, struct.error):
+            raise MsgpackFormatError(f"数据在偏移 {pos} 处被截断") from None
+
+    def skip(self, pos: int) -> int:
+        """返回pos处的值之后的位置，只读取长度前缀，不解码"""
+        buf = self.buf
+        try:
+            code = buf[pos]
+        except IndexError:
+            raise MsgpackFormatError(f"数据在偏移 {pos} 处被截断") from None
+        # 最常见的定长标量不需要进入循环
+        if code <= 0x7f or code >= 0xe0:
+            return pos + 1
+        if 0xa0 <= code <= 0xbf:
+            return self._check(pos + 1 + (code & 0x1f), pos)
+        fmt = _NUMBERS.get(code)
+        if fmt is not None:
+            return self._check(pos + 1 + fmt.size, pos)
+        ends = self._ends
+        end = ends.get(pos)
+        if end is not None:
+            return end
+        start = pos
+        pending = 1
+        # 只缓存映射和数组的结束位置
+        is_container = False
+        try:
+            while pending:
+                pending -= 1
+                code = buf[pos]
+                if code <= 0x7f or code >= 0xe0 or code == 0xc0 or code == 0xc2 or code == 0xc3:
+                    pos += 1
+                elif 0xa0 <= code <= 0xbf:
+                    pos += 1 + (code & 0x1f)
+                elif code <= 0x9f or code in _ARRAY_LENGTH or code in _MAP_LENGTH:
+                    kind, count, pos = self.header(pos)
+                    pending += count if kind == _ARRAY else 2 * count
+                    is_container = True
+                elif code in _NUMBERS:
+                    pos += 1 + _NUMBERS[code].size
+                elif code in _STR_LENGTH or code in _BIN_LENGTH:
+                    fmt = _STR_LENGTH.get(code) or _BIN_LENGTH[code]
+                    pos += 1 + fmt.size + fmt.unpack_from(buf, pos + 1)[0]
+                elif code in _FIXEXT:
+                    pos += 2 + _FIXEXT[code]
+                elif code in _EXT_LENGTH:
+                    fmt = _EXT_LENGTH[code]
+                    pos += 2 + fmt.size + fmt.unpack_from(buf, pos + 1)[0]
+                else:
+                    raise MsgpackFormatError(f"未知的类型字节 0x{code:02x}，位于偏移 {pos}")
+        except (IndexError, struct.error):
+            raise MsgpackFormatError(f"数据在偏移 {start} 之后被截断") from None
+        self._check(pos, start)
+        if is_container:
+            ends[start] = pos
+        return pos
+
+    def decode(self, pos: int) -> Any:
+        """解码pos处的值，映射和数组返回视图"""
+        kind, count, _ = self.header(pos)
+        if kind == _MAP:
+            return MsgpackDict(self, pos)
+        if kind == _ARRAY:
+            return MsgpackList(self, pos)
+        return self.scalar(pos)[0]
+
+    def scalar(self, pos: int) -> Tuple[Any, int]:
+        """解码pos处的标量，返回值和值之后的位置"""
+        buf = self.buf
+        try:
+            code = buf[pos]
+            if code <= 0x7f:
+                return code, pos + 1
+            if code >= 0xe0:
+                return code - 0x100, pos + 1
+            if 0xa0 <= code <= 0xbf:
+                end = self._check(pos + 1 + (code & 0x1f), pos)
+                return str(buf[pos + 1:end], 'utf-8'), end
+            if code == 0xc0:
+                return None, pos + 1
+            if code == 0xc2:
+                return False, pos + 1
+            if code == 0xc3:
+                return True, pos + 1
+            fmt = _NUMBERS.get(code)
+            if fmt is not None:
+                return fmt.unpack_from(buf, pos + 1)[0], pos + 1 + fmt.size
+            fmt = _STR_LENGTH.get(code)
+            if fmt is not None:
+                start = pos + 1 + fmt.size
+                end = self._check(start + fmt.unpack_from(buf, pos + 1)[0], pos)
+                return str(buf[start:end], 'utf-8'), end
+            fmt = _BIN_LENGTH.get(code)
+            if fmt is not None:
+                start = pos + 1 + fmt.size
+                end = self._check(start + fmt.unpack_from(buf, pos + 1)[0], pos)
+                return bytes(buf[start:end]), end
+            length = _FIXEXT.get(code)
+            if length is not None:
+                start = pos + 2
+            elif code in _EXT_LENGTH:
+                fmt = _EXT_LENGTH[code]
+                length = fmt.unpack_from(buf, pos + 1)[0]
+                start = pos + 2 + fmt.size
+            else:
+                raise MsgpackFormatError(f"未知的类型字节 0x{code:02x}，位于偏移 {pos}")
+            end = self._check(start + length, pos)
+            return ExtType(_I8.unpack_from(buf, start - 1)[0], bytes(buf[start:end])), end
+        except (IndexError, struct.error):
+            raise MsgpackFormatError(f"数据在偏移 {pos} 处被截断") from None
+        except UnicodeDecodeError as e:
+            raise MsgpackFormatError(f"偏移 {pos} 处的字符串不是有效的UTF-8: {e}") from None
+
+    def decode_full(self, pos: int) -> Tuple[Any, int]:
+        """完整解码pos处的值，返回值和值之后的位置"""
+        kind, count, child = self.header(pos)
+        if kind == _ARRAY:
+            items = []
+            for _ in range(count):
+                item, child = self.decode_full(child)
+                items.append(item)
+            return items, child
+        if kind == _MAP:
+            members = {}
+            for _ in range(count):
+                key, child = self.decode_full(child)
+                if isinstance(key, (list, dict)):
+                    raise MsgpackFormatError(f"偏移 {pos} 处的映射的键不能是映射或数组")
+                members[key], child = self.decode_full(child)
+            return members, child
+        return self.scalar(pos)
+
+    def to_python(self, pos: int) -> Any:
+        """完整解码pos处的值"""
+        if msgpack is not None:
+            data = bytes(self.buf[pos:self.skip(pos)])
+            return msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=ExtType, use_list=True)
+        return self.decode_full(pos)[0]
+
+
+class MsgpackDict(DictView):
+    """MessagePack映射视图，按键查找时跳过不匹配的条目，不解码它们"""
+    def __init__(self, buffer: MsgpackBuffer, pos: int):
+        self._buffer = buffer
+        self._pos = pos
+        _, self._count, self._first = buffer.header(pos)
+        # 最近一次查找的键和值的位置，执行器通常先判断键是否存在再取值
+        self._last = None
+
+    def _entries(self) -> Iterator[Tuple[int, int]]:
+        """产出每个条目的键和值的位置"""
+        skip = self._buffer.skip
+        pos = self._first
+        for _ in range(self._count):
+            value = skip(pos)
+            yield pos, value
+            pos = skip(value)
+
+    def _find(self, key: Any) -> Optional[int]:
+        """查找键对应的值的位置，不存在时返回None"""
+        last = self._last
+        if last is not None and last[0] is key:
+            return last[1]
+        buffer = self._buffer
+        skip = buffer.skip
+        found = None
+        if isinstance(key, str):
+            raw = key.encode('utf-8')
+            size = len(raw)
+            buf = buffer.buf
+            pos = self._first
+            for _ in range(self._count):
+                # 键通常是短字符串，只在长度相同时比较字节，不解码
+                code = buf[pos]
+                if 0xa0 <= code <= 0xbf:
+                    start, end = pos + 1, pos + 1 + (code & 0x1f)
+                else:
+                    start, end = buffer.string(pos)
+                    if start < 0:
+                        end = skip(pos)
+                if end - start == size and buf[start:end] == raw:
+                    found = end
+                    break
+                pos = skip(end)
+        else:
+            for key_pos, value_pos in self._entries():
+                kind, _, _ = buffer.header(key_pos)
+                if not kind and buffer.string(key_pos)[0] < 0 and buffer.scalar(key_pos)[0] == key:
+                    found = value_pos
+                    break
+        self._last = (key, found)
+        return found
+
+    def __getitem__(self, key):
+        pos = self._find(key)
+        if pos is None:
+            raise KeyError(key)
+        return self._buffer.decode(pos)
+
+    def get(self, key, default=None):
+        pos = self._find(key)
+        return default if pos is None else self._buffer.decode(pos)
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Any]:
+        decode = self._buffer.decode
+        for key_pos, _ in self._entries():
+            yield decode(key_pos)
+
+    def keys(self) -> List[Any]:
+        return list(self)
+
+    def values(self) -> List[Any]:
+        decode = self._buffer.decode
+        return [decode(value_pos) for _, value_pos in self._entries()]
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        decode = self._buffer.decode
+        return [(decode(key_pos), decode(value_pos)) for key_pos, value_pos in self._entries()]
+
+    def to_python(self) -> Dict[Any, Any]:
+        """完整解码为字典"""
+        return self._buffer.to_python(self._pos)
+
+
+class MsgpackList(SequenceView):
+    """MessagePack数组视图，第一次按下标访问时记录各元素的位置"""
+    def __init__(self, buffer: MsgpackBuffer, pos: int):
+        self._buffer = buffer
+        self._pos = pos
+        _, self._count, self._first = buffer.header(pos)
+        self._positions = None
+
+    def _element_positions(self) -> array:
+        positions = self._positions
+        if positions is None:
+            skip = self._buffer.skip
+            positions = array('Q')
+            pos = self._first
+            for _ in range(self._count):
+                positions.append(pos)
+                pos = skip(pos)
+            self._positions = positions
+        return positions
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            decode = self._buffer.decode
+            return [decode(pos) for pos in self._element_positions()[index]]
+        return self._buffer.decode(self._element_positions()[index])
+
+    def __iter__(self) -> Iterator[Any]:
+        decode = self._buffer.decode
+        if self._positions is not None:
+            for pos in self._positions:
+                yield decode(pos)
+            return
+        skip = self._buffer.skip
+        pos = self._first
+        for _ in range(self._count):
+            yield decode(pos)
+            pos = skip(pos)
+
+    def to_python(self) -> List[Any]:
+        """完整解码为列表"""
+        return self._buffer.to_python(self._pos)
+
+
+def loads_msgpack(buffer: Union[bytes, bytearray, memoryview]) -> Any:
+    """
+    读取MessagePack编码的根节点，不解码整个文档
+
+    Args:
+        buffer: MessagePack编码的数据
+    Returns:
+        Any: 根节点，映射和数组以MsgpackDict和MsgpackList视图返回
+    Raises:
+        MsgpackFormatError: 数据为空，或根节点是标量且之后有多余的数据；其余格式错误在访问到对应位置时抛出
+    """
+    if not len(buffer):
+        raise MsgpackFormatError("数据为空")
+    packed = MsgpackBuffer(buffer)
+    kind, _, _ = packed.header(0)
+    if kind:
+        return packed.decode(0)
+    # 根节点是标量时检查整个缓冲区只需读取一个值，容器则需要遍历整个文档，留到访问时检查
+    value, end = packed.scalar(0)
+    if end != len(buffer):
+        raise MsgpackFormatError("根节点之后有多余的数据")
+    return value
+
+
+def unpackb(buffer: Union[bytes, bytearray, memoryview]) -> Any:
+    """
+    完整解码MessagePack（纯Python实现）
+
+    Args:
+        buffer: MessagePack编码的数据
+    Returns:
+        Any: 解码结果
+    """
+    if not len(buffer):
+        raise MsgpackFormatError("数据为空")
+    value, end = MsgpackBuffer(buffer).decode_full(0)
+    if end != len(buffer):
+        raise MsgpackFormatError("根节点之后有多余的数据")
+    return value
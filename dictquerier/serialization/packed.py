@@ -0,0 +1,419 @@
+"""
+可随机访问的紧凑二进制编码
+
+列表和字典带有偏移量表，读取时不需要解码整个文档：PackedList和PackedDict是直接读取缓冲区的只读视图，
+访问元素时才解码对应的节点，子容器同样以视图的形式返回。适合放在共享内存中由多个进程同时读取。
+
+编码格式（小端序，偏移、长度和数量的宽度W为4字节，编码结果超过4GB时为8字节）：
+    头部: b'DQPK' | 版本(1字节) | W(1字节) | 保留(2字节) | 根节点偏移(8字节) | 键表偏移(8字节)
+    键: 长度(W) | UTF-8字节，文档中相同的键只存储一次
+    键表: 键数量(W) | 按UTF-8字节排序的键偏移(各W)
+    节点: 类型(1字节) | 数据
+        None / False / True: 无数据
+        INT32 / INT64: 4 / 8字节有符号整数；超出64位的整数为 BIGINT: 长度(W) | 十进制ASCII
+        FLOAT: 8字节浮点数
+        STR: 长度(W) | UTF-8字节
+        LIST: 元素数量(W) | 每个元素的节点偏移(各W)
+        DICT: 键数量(W) | 每个键的 (键偏移, 值节点偏移)(各W)
+        SORTED_DICT: 同DICT，之后附加按键偏移排列的条目序号表(各W)，键数量超过 SORTED_THRESHOLD 时使用
+
+按键查找时先在键表中找到键偏移（每个键只查找一次），之后只比较整数，不需要解码其他键。
+"""
+import bisect
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from dictquerier.executor.views import DictView, SequenceView, SliceView
+
+MAGIC = b'DQPK'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBB2xQQ')
+
+NONE, FALSE, TRUE, INT32, INT64, BIGINT, FLOAT, STR, LIST, DICT, SORTED_DICT = range(11)
+
+# 键数量超过此值的字典附加排序表，查找时二分查找
+SORTED_THRESHOLD = 8
+
+_I32 = struct.Struct('<i')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_INT32_MIN, _INT32_MAX = -(1 << 31), (1 << 31) - 1
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class PackedFormatError(ValueError):
+    """缓冲区不是有效的紧凑二进制编码"""
+
+
+class _Layout:
+    """偏移宽度对应的结构体"""
+    def __init__(self, width: int):
+        code = 'I' if width == 4 else 'Q'
+        self.width = width
+        self.word = struct.Struct('<' + code)
+        self.pair = struct.Struct('<' + code * 2)
+
+
+_LAYOUTS = {4: _Layout(4), 8: _Layout(8)}
+
+
+def pack(data: Any) -> bytearray:
+    """
+    将JSON兼容的对象编码为紧凑二进制格式
+
+    Args:
+        data (Any): 由dict、list、str、int、float、bool和None组成的对象，元组按列表编码
+    Returns:
+        bytearray: 编码结果
+    """
+    try:
+        return _Encoder(_LAYOUTS[4]).pack(data)
+    except struct.error:
+        # 偏移超出4字节的范围
+        return _Encoder(_LAYOUTS[8]).pack(data)
+
+
+class _Encoder:
+    def __init__(self, layout: _Layout):
+        self.layout = layout
+        self.out = bytearray(HEADER.size)
+        self.keys: Dict[str, int] = {}
+
+    def pack(self, data: Any) -> bytearray:
+        root = self.encode(data)
+        out = self.out
+        word = self.layout.word
+        # 键表按UTF-8字节排序，查找时二分查找
+        names = sorted(self.keys, key=lambda name: name.encode('utf-8'))
+        key_table = len(out)
+        out += word.pack(len(names))
+        for name in names:
+            out += word.pack(self.keys[name])
+        HEADER.pack_into(out, 0, MAGIC, FORMAT_VERSION, self.layout.width, root, key_table)
+        return out
+
+    def key(self, name: Any) -> int:
+        """写入键（只写入一次），返回键偏移"""
+        if not isinstance(name, str):
+            raise TypeError(f"字典的键必须为字符串，但得到了 {type(name).__name__}")
+        offset = self.keys.get(name)
+        if offset is None:
+            raw = name.encode('utf-8')
+            offset = self.keys[name] = len(self.out)
+            self.out += self.layout.word.pack(len(raw))
+            self.out += raw
+        return offset
+
+    def encode(self, value: Any) -> int:
+        """编码一个节点，返回节点偏移"""
+        out = self.out
+        word = self.layout.word
+        offset = len(out)
+        if value is None:
+            out.append(NONE)
+        elif value is True:
+            out.append(TRUE)
+        elif value is False:
+            out.append(FALSE)
+        elif isinstance(value, int):
+            if _INT32_MIN <= value <= _INT32_MAX:
+                out.append(INT32)
+                out += _I32.pack(value)
+            elif _INT64_MIN <= value <= _INT64_MAX:
+                out.append(INT64)
+                out += _I64.pack(value)
+            else:
+                digits = str(int(value)).encode('ascii')
+                out.append(BIGINT)
+                out += word.pack(len(digits))
+                out += digits
+        elif isinstance(value, float):
+            out.append(FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            raw = value.encode('utf-8')
+            out.append(STR)
+            out += word.pack(len(raw))
+            out += raw
+        elif isinstance(value, (list, tuple)):
+            width = self.layout.width
+            out.append(LIST)
+            out += word.pack(len(value))
+            table = len(out)
+            out += bytes(width * len(value))
+            for i, item in enumerate(value):
+                word.pack_into(out, table + width * i, self.encode(item))
+        elif isinstance(value, dict):
+            pair = self.layout.pair
+            count = len(value)
+            is_sorted = count > SORTED_THRESHOLD
+            out.append(SORTED_DICT if is_sorted else DICT)
+            out += word.pack(count)
+            table = len(out)
+            out += bytes(pair.size * count + (self.layout.width * count if is_sorted else 0))
+            key_offsets = []
+            for i, (name, item) in enumerate(value.items()):
+                key_offset = self.key(name)
+                key_offsets.append(key_offset)
+                pair.pack_into(out, table + pair.size * i, key_offset, self.encode(item))
+            if is_sorted:
+                index_table = table + pair.size * count
+                for position, i in enumerate(sorted(range(count), key=key_offsets.__getitem__)):
+                    word.pack_into(out, index_table + self.layout.width * position, i)
+        else:
+            raise TypeError(f"无法编码 {type(value).__name__} 类型的值")
+        return offset
+
+
+class PackedBuffer:
+    """
+    已编码的缓冲区，缓存按键查找时用到的键偏移和键名
+
+    Attributes:
+        buf (memoryview): 缓冲区
+    """
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview]):
+        buf = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+        if len(buf) < HEADER.size:
+            raise PackedFormatError("缓冲区长度不足")
+        magic, version, width, self.root_offset, self.key_table = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise PackedFormatError("缓冲区不是紧凑二进制编码")
+        if version != FORMAT_VERSION or width not in _LAYOUTS:
+            raise PackedFormatError(f"不支持的编码版本: {version}")
+        self.buf = buf
+        self.layout = _LAYOUTS[width]
+        self.key_count = self.layout.word.unpack_from(buf, self.key_table)[0]
+        # 键名 -> 键偏移（文档中不存在时为None），键偏移 -> 键名
+        self._offsets: Dict[str, Optional[int]] = {}
+        self._names: Dict[int, str] = {}
+
+    def root(self) -> Any:
+        """文档根节点"""
+        return self.decode(self.root_offset)
+
+    def key_offset(self, name: str) -> Optional[int]:
+        """查找键偏移，文档中没有该键时返回None"""
+        try:
+            return self._offsets[name]
+        except KeyError:
+            pass
+        raw = name.encode('utf-8')
+        word = self.layout.word
+        width = self.layout.width
+        table = self.key_table + width
+        low, high = 0, self.key_count
+        offset = None
+        while low < high:
+            middle = (low + high) // 2
+            candidate = word.unpack_from(self.buf, table + width * middle)[0]
+            current = bytes(self._key_bytes(candidate))
+            if current == raw:
+                offset = candidate
+                break
+            if current < raw:
+                low = middle + 1
+            else:
+                high = middle
+        self._offsets[name] = offset
+        return offset
+
+    def key_name(self, offset: int) -> str:
+        """读取键名"""
+        name = self._names.get(offset)
+        if name is None:
+            name = self._names[offset] = str(self._key_bytes(offset), 'utf-8')
+        return name
+
+    def _key_bytes(self, offset: int) -> memoryview:
+        length = self.layout.word.unpack_from(self.buf, offset)[0]
+        start = offset + self.layout.width
+        return self.buf[start:start + length]
+
+    def decode(self, offset: int) -> Any:
+        """解码一个节点，容器返回视图"""
+        buf = self.buf
+        tag = buf[offset]
+        if tag == STR:
+            word = self.layout.word
+            start = offset + 1 + word.size
+            return str(buf[start:start + word.unpack_from(buf, offset + 1)[0]], 'utf-8')
+        if tag == INT32:
+            return _I32.unpack_from(buf, offset + 1)[0]
+        if tag == DICT or tag == SORTED_DICT:
+            return PackedDict(self, offset)
+        if tag == LIST:
+            return PackedList(self, offset)
+        if tag == FLOAT:
+            return _F64.unpack_from(buf, offset + 1)[0]
+        if tag == NONE:
+            return None
+        if tag == TRUE:
+            return True
+        if tag == FALSE:
+            return False
+        if tag == INT64:
+            return _I64.unpack_from(buf, offset + 1)[0]
+        if tag == BIGINT:
+            word = self.layout.word
+            start = offset + 1 + word.size
+            return int(str(buf[start:start + word.unpack_from(buf, offset + 1)[0]], 'ascii'))
+        raise PackedFormatError(f"未知的节点类型 {tag}，位于偏移 {offset}")
+
+    def decode_full(self, offset: int) -> Any:
+        """完整解码一个节点及其所有后代"""
+        buf = self.buf
+        tag = buf[offset]
+        if tag == LIST:
+            word = self.layout.word
+            count = word.unpack_from(buf, offset + 1)[0]
+            table = offset + 1 + word.size
+            return [self.decode_full(child) for (child,) in word.iter_unpack(buf[table:table + word.size * count])]
+        if tag == DICT or tag == SORTED_DICT:
+            pair = self.layout.pair
+            count = self.layout.word.unpack_from(buf, offset + 1)[0]
+            table = offset + 1 + self.layout.width
+            key_name = self.key_name
+            return {
+                key_name(key): self.decode_full(child)
+                for key, child in pair.iter_unpack(buf[table:table + pair.size * count])
+            }
+        return self.decode(offset)
+
+    def release(self):
+        """释放对缓冲区的引用，之后不能再读取"""
+        self.buf.release()
+
+
+def root(buffer: Union[bytes, bytearray, memoryview]) -> Any:
+    """
+    读取编码结果的根节点
+
+    Args:
+        buffer: pack的编码结果，可以比编码结果长（如共享内存按页对齐的缓冲区）
+    Returns:
+        Any: 根节点，容器以PackedList或PackedDict视图返回
+    """
+    return PackedBuffer(buffer).root()
+
+
+class PackedList(SequenceView):
+    """紧凑二进制编码中的列表视图，访问元素时才解码"""
+    def __init__(self, packed: PackedBuffer, offset: int):
+        self._packed = packed
+        self._offset = offset
+        word = packed.layout.word
+        self._count = word.unpack_from(packed.buf, offset + 1)[0]
+        self._table = offset + 1 + word.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SliceView(self, range(self._count)[index])
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("列表索引超出范围")
+        packed = self._packed
+        word = packed.layout.word
+        return packed.decode(word.unpack_from(packed.buf, self._table + word.size * index)[0])
+
+    def __iter__(self) -> Iterator[Any]:
+        packed = self._packed
+        word = packed.layout.word
+        decode = packed.decode
+        for (child,) in word.iter_unpack(packed.buf[self._table:self._table + word.size * self._count]):
+            yield decode(child)
+
+    def to_python(self) -> List[Any]:
+        """完整解码为列表"""
+        return self._packed.decode_full(self._offset)
+
+
+class PackedDict(DictView):
+    """紧凑二进制编码中的字典视图，按键查找时不解码其他键和值"""
+    def __init__(self, packed: PackedBuffer, offset: int):
+        self._packed = packed
+        self._offset = offset
+        buf = packed.buf
+        word = packed.layout.word
+        self._count = word.unpack_from(buf, offset + 1)[0]
+        self._table = offset + 1 + word.size
+        self._sorted = buf[offset] == SORTED_DICT
+
+    def _find(self, key: Any) -> Optional[int]:
+        """查找键对应的值节点偏移，不存在时返回None"""
+        if not isinstance(key, str):
+            return None
+        packed = self._packed
+        key_offset = packed.key_offset(key)
+        if key_offset is None:
+            return None
+        buf = packed.buf
+        pair = packed.layout.pair
+        table = self._table
+        if not self._sorted:
+            for current, child in pair.iter_unpack(buf[table:table + pair.size * self._count]):
+                if current == key_offset:
+                    return child
+            return None
+
+        # 条目序号表按键偏移排列
+        word = packed.layout.word
+        index_table = table + pair.size * self._count
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            i = word.unpack_from(buf, index_table + word.size * middle)[0]
+            current, child = pair.unpack_from(buf, table + pair.size * i)
+            if current == key_offset:
+                return child
+            if current < key_offset:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __getitem__(self, key):
+        child = self._find(key)
+        if child is None:
+            raise KeyError(key)
+        return self._packed.decode(child)
+
+    def get(self, key, default=None):
+        child = self._find(key)
+        return default if child is None else self._packed.decode(child)
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entries(self):
+        pair = self._packed.layout.pair
+        return pair.iter_unpack(self._packed.buf[self._table:self._table + pair.size * self._count])
+
+    def __iter__(self) -> Iterator[str]:
+        key_name = self._packed.key_name
+        for key, _ in self._entries():
+            yield key_name(key)
+
+    def keys(self) -> List[str]:
+        return list(self)
+
+    def values(self) -> List[Any]:
+        decode = self._packed.decode
+        return [decode(child) for _, child in self._entries()]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        key_name = self._packed.key_name
+        decode = self._packed.decode
+        return [(key_name(key), decode(child)) for key, child in self._entries()]
+
+    def to_python(self) -> Dict[str, Any]:
+        """完整解码为字典"""
+        return self._packed.decode_full(self._offset)
+
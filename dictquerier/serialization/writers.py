@@ -0,0 +1,248 @@
+"""
+流式输出
+
+查询结果为列表时，元素在迭代流式结果的过程中逐个编码并写出，输出缓冲区只保存当前元素的编码结果。
+支持JSON数组（与一次性序列化完整结果的输出逐字节相同）、JSON Lines（每行一个元素）、CSV，
+以及安装了pyarrow时的Arrow IPC文件（按列收集后写出）。
+"""
+import csv
+import io
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+from dictquerier.core import query_stream
+from dictquerier.executor.streaming import ResultStream
+from dictquerier.serialization.backends import JsonBackend, get_backend
+from dictquerier.serialization.columnar import column_chunks, pyarrow, to_arrow, to_columns, write_arrow
+
+JSON, JSONL, CSV, ARROW = 'json', 'jsonl', 'csv', 'arrow'
+
+
+class ResultWriter:
+    """
+    结果写出器基类
+
+    Attributes:
+        name (str): 输出格式名称
+    """
+    name: str = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        """输出格式依赖的库是否已安装"""
+        return True
+
+    def __init__(self, out: BinaryIO, backend: Optional[JsonBackend] = None, indent: Optional[int] = None,
+                 convert: Optional[Callable[[Any], Any]] = None, columns: Optional[List[str]] = None):
+        """
+        Args:
+            out (BinaryIO): 以二进制方式打开的输出流
+            backend (JsonBackend, optional): 编码使用的JSON后端. Defaults to 自动选择.
+            indent (int, optional): JSON缩进空格数，为None时输出紧凑格式. Defaults to None.
+            convert (Callable, optional): 写出前对每个元素（或非列表结果）的转换，如将视图完整转换为列表和字典. Defaults to None.
+            columns (List[str], optional): 表格格式（CSV、Arrow）输出的列，即对象的键. Defaults to 第一个对象的键.
+        """
+        self.out = out
+        self.backend = backend or get_backend()
+        self.indent = indent
+        self.convert = convert
+        self.columns = columns
+
+    def write(self, result: Any):
+        """写出完整的结果，列表按元素写出"""
+        if isinstance(result, list):
+            self.write_items(iter(result), result)
+        else:
+            self.write_value(result)
+
+    def write_stream(self, stream: ResultStream):
+        """写出流式结果，元素在写出时才被求值"""
+        if stream.is_list:
+            self.write_items(iter(stream), stream.empty_value)
+        else:
+            self.write_value(stream.value)
+
+    def write_items(self, items: Iterator[Any], empty: Any):
+        """
+        逐个写出列表元素
+
+        Args:
+            items (Iterator[Any]): 元素迭代器
+            empty (Any): 没有元素时代替列表写出的值，可以是在迭代器耗尽后才调用的无参函数
+        """
+        raise NotImplementedError
+
+    def write_value(self, value: Any):
+        """写出不是列表的结果"""
+        raise NotImplementedError
+
+    def _converted(self, items: Iterable[Any]) -> Iterable[Any]:
+        convert = self.convert
+        return items if convert is None else map(convert, items)
+
+    def _value(self, value: Any) -> Any:
+        return value if self.convert is None else self.convert(value)
+
+
+def _resolve(empty: Any) -> Any:
+    return empty() if callable(empty) else empty
+
+
+class JsonWriter(ResultWriter):
+    """JSON数组，输出与后端一次性序列化完整结果相同"""
+    name = JSON
+
+    def write_items(self, items, empty):
+        out = self.out
+        dumpb = self.backend.dumpb
+        indent = self.indent
+        if indent is None:
+            separator = self.backend.separator.encode()
+            opening, closing = b'[', b']'
+        else:
+            # 元素的每一行再缩进一级，JSON字符串中的换行总是被转义，不会被误缩进
+            prefix = b'\n' + b' ' * indent
+            separator = b',' + prefix
+            opening, closing = b'[' + prefix, b'\n]'
+
+        first = True
+        for item in self._converted(items):
+            encoded = dumpb(item, indent)
+            if indent is not None:
+                encoded = encoded.replace(b'\n', prefix)
+            out.write(opening if first else separator)
+            out.write(encoded)
+            first = False
+        if first:
+            out.write(dumpb(_resolve(empty), indent))
+        else:
+            out.write(closing)
+
+    def write_value(self, value):
+        self.out.write(self.backend.dumpb(self._value(value), self.indent))
+
+
+class JsonLinesWriter(ResultWriter):
+    """JSON Lines，每个元素一行紧凑的JSON，不是列表的结果写为一行"""
+    name = JSONL
+
+    def write_items(self, items, empty):
+        out = self.out
+        dumpb = self.backend.dumpb
+        for item in self._converted(items):
+            out.write(dumpb(item) + b'\n')
+
+    def write_value(self, value):
+        self.out.write(self.backend.dumpb(self._value(value)) + b'\n')
+
+
+class CsvWriter(ResultWriter):
+    """
+    CSV，每个元素一行
+
+    列的规则同to_columns：以指定的列或第一个对象的键作为表头，缺少的键为空，多出的键被忽略，
+    元素不是对象时只有一列 'value'。字符串和数字原样写出（NaN和无穷大写为nan和inf），None为空，其余值写为紧凑的JSON。
+    对象按块取出表头中的键组成各列后再转置为行，不为每一行构造新的字典。
+    """
+    name = CSV
+
+    def write_items(self, items, empty):
+        columns, chunks = column_chunks(items, self.columns, self.convert)
+        # 按块写入字符串缓冲区后再编码写出，避免逐行经过文本包装层
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if columns:
+            writer.writerow(columns)
+        for values in chunks:
+            for position, column_values in enumerate(values):
+                if not _CSV_TYPES.issuperset(map(type, column_values)):
+                    values[position] = list(map(self._cell, column_values))
+            writer.writerows(zip(*values))
+            self._flush(buffer)
+        self._flush(buffer)
+
+    def write_value(self, value):
+        if value is not None:
+            self.write_items(iter((value,)), None)
+
+    def _flush(self, buffer: io.StringIO):
+        if buffer.tell():
+            self.out.write(buffer.getvalue().encode('utf-8'))
+            buffer.seek(0)
+            buffer.truncate()
+
+    def _cell(self, value: Any) -> Any:
+        return value if type(value) in _CSV_TYPES else self.backend.dumps(value)
+
+
+# csv模块可以直接写出的类型，浮点数的写法与repr相同，None写为空
+_CSV_TYPES = frozenset((str, int, float, type(None)))
+
+
+class ArrowWriter(ResultWriter):
+    """
+    Arrow IPC文件，依赖pyarrow
+
+    一遍遍历结果列表按列收集对象的值（见to_columns），再转换为Arrow表写出；
+    每列的类型由该列的全部值推断，因此需要在内存中保留所有列。
+    """
+    name = ARROW
+
+    @classmethod
+    def available(cls) -> bool:
+        return pyarrow is not None
+
+    def write_items(self, items, empty):
+        write_arrow(to_arrow(to_columns(items, self.columns, self.convert)), self.out)
+
+    def write_value(self, value):
+        self.write_items(iter(() if value is None else (value,)), None)
+
+
+_writers: Dict[str, type] = {writer.name: writer for writer in (JsonWriter, JsonLinesWriter, CsvWriter, ArrowWriter)}
+
+OUTPUT_FORMATS = tuple(_writers)
+
+
+def available_formats() -> List[str]:
+    """获取依赖的库已安装的输出格式"""
+    return [name for name, writer in _writers.items() if writer.available()]
+
+
+def get_writer(output_format: str, out: BinaryIO, backend: Optional[JsonBackend] = None, indent: Optional[int] = None,
+               convert: Optional[Callable[[Any], Any]] = None, columns: Optional[List[str]] = None) -> ResultWriter:
+    """
+    按输出格式创建结果写出器
+
+    Args:
+        output_format (str): 'json'、'jsonl'、'csv' 或 'arrow'
+        其余参数同ResultWriter
+    Returns:
+        ResultWriter: 结果写出器
+    Raises:
+        ValueError: 未知的输出格式，或输出格式依赖的库未安装
+    """
+    writer_class = _writers.get(output_format)
+    if writer_class is None:
+        raise ValueError(f"未知的输出格式 '{output_format}'，可用的格式: {', '.join(OUTPUT_FORMATS)}")
+    if not writer_class.available():
+        raise ValueError(f"输出格式 {output_format} 依赖的库未安装")
+    return writer_class(out, backend, indent, convert, columns)
+
+
+def export_columns(data: Any, path: str, out: BinaryIO, output_format: str = CSV, columns: Optional[List[str]] = None,
+                   convert: Optional[Callable[[Any], Any]] = None, **kwargs: Any):
+    """
+    查询对象列表并按列导出为CSV或Arrow IPC文件
+
+    查询结果以流的方式求值，对象按列取值后直接写出（CSV）或追加到列中（Arrow），不构造中间的结果列表和行字典。
+
+    Args:
+        data (Any): 需要查询的json结构
+        path (str): 查询路径语句，结果通常为对象列表，如 "users['active'==true]"
+        out (BinaryIO): 以二进制方式打开的输出流
+        output_format (str, optional): 'csv' 或 'arrow'. Defaults to 'csv'.
+        columns (List[str], optional): 导出的列. Defaults to 第一个对象的键.
+        convert (Callable, optional): 对每个单元格的转换，数据为视图时传入to_python. Defaults to None.
+        **kwargs: 传给query_stream的其他参数，如params
+    """
+    get_writer(output_format, out, convert=convert, columns=columns).write_stream(query_stream(data, path, **kwargs))
@@ -0,0 +1,11 @@
+"""
+查询服务模块
+
+常驻进程中预先加载文档并缓存编译后的查询，通过Unix套接字或本机HTTP以JSON协议响应查询请求
+"""
+
+from dictquerier.server.service import QueryService, ServedDocument
+from dictquerier.server.transport import HTTPQueryServer, UnixQueryServer, create_server
+from dictquerier.server.client import QueryClient
+
+__all__ = ['QueryService', 'ServedDocument', 'HTTPQueryServer', 'UnixQueryServer', 'create_server', 'QueryClient']
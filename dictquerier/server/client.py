@@ -0,0 +1,117 @@
+"""
+查询服务客户端
+"""
+import socket
+import threading
+import urllib.request
+from typing import Any, Dict, Optional
+
+from dictquerier.exceptions import RemoteQueryError
+from dictquerier.serialization import AUTO, get_backend
+from dictquerier.server.transport import DEFAULT_HOST, DEFAULT_PORT
+
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+
+class QueryClient:
+    """
+    查询服务客户端，通过Unix套接字连接时复用同一个连接
+
+    Args:
+        socket_path (str, optional): Unix套接字路径，指定时使用Unix套接字，否则使用HTTP. Defaults to None.
+        url (str, optional): HTTP服务地址. Defaults to 'http://127.0.0.1:8765'.
+        backend (str, optional): 编解码请求使用的JSON后端. Defaults to 'auto'.
+        timeout (float, optional): 超时时间（秒）. Defaults to None.
+    """
+    def __init__(self, socket_path: Optional[str] = None, url: str = DEFAULT_URL, backend: str = AUTO, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.url = url.rstrip('/')
+        self.backend = get_backend(backend)
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        发送请求并返回响应
+
+        Args:
+            request (dict): 请求，格式见 dictquerier.server.service
+        Returns:
+            dict: 响应
+        """
+        body = self.backend.dumpb(request)
+        if self.socket_path is None:
+            http_request = urllib.request.Request(self.url + '/', data=body, headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                return self.backend.loads(response.read())
+
+        with self._lock:
+            if self._file is None:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.settimeout(self.timeout)
+                self._socket.connect(self.socket_path)
+                self._file = self._socket.makefile('rwb')
+            self._file.write(body + b'\n')
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("查询服务关闭了连接")
+        return self.backend.loads(line)
+
+    def query(self, path: str, document: Optional[str] = None, file: Optional[str] = None,
+              params: Optional[Dict[str, Any]] = None, optimize: bool = False, adaptive: bool = False) -> Any:
+        """
+        在服务端的文档上执行查询
+
+        Args:
+            path (str): 查询路径语句
+            document (str, optional): 文档名称. Defaults to None.
+            file (str, optional): 文档的文件路径，未指定document时使用. Defaults to None.
+            params (Dict[str, Any], optional): 绑定参数的值. Defaults to None.
+            optimize (bool, optional): 是否重排过滤条件. Defaults to False.
+            adaptive (bool, optional): 是否自适应重排过滤条件. Defaults to False.
+        Returns:
+            Any: 查询结果
+        Raises:
+            RemoteQueryError: 服务端执行查询出错
+        """
+        request = {'op': 'query', 'path': path, 'optimize': optimize, 'adaptive': adaptive}
+        if document is not None:
+            request['document'] = document
+        if file is not None:
+            request['file'] = file
+        if params:
+            request['params'] = params
+        return self._result(self.request(request))
+
+    def documents(self):
+        """列出服务端已加载的文档"""
+        return self._result(self.request({'op': 'documents'}))
+
+    def reload(self, document: Optional[str] = None, file: Optional[str] = None) -> Dict[str, Any]:
+        """重新加载服务端的文档"""
+        return self._result(self.request({'op': 'reload', 'document': document, 'file': file}))
+
+    @staticmethod
+    def _result(response: Dict[str, Any]) -> Any:
+        if response.get('ok'):
+            return response.get('result')
+        error = response.get('error') or {}
+        raise RemoteQueryError(error.get('type', 'Exception'), error.get('message', ''))
+
+    def close(self):
+        """关闭Unix套接字连接"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._socket.close()
+                self._file = self._socket = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
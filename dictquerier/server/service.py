@@ -0,0 +1,199 @@
+"""
+查询服务
+
+常驻进程中预先加载的具名文档集合，按JSON请求执行查询。编译后的查询和查询结果由Document缓存，
+文件被修改后在下一次查询时自动重新加载。请求和响应的格式：
+
+    请求: {"op": "query", "document": "users", "path": "users['id'>1].name", "params": {...}, "optimize": false}
+    成功: {"ok": true, "result": ...}
+    失败: {"ok": false, "error": {"type": "SyntaxError", "message": "..."}}
+
+op 还可以是 "documents"（列出已加载的文档）、"reload"（重新加载文档）和 "ping"。
+查询请求可以用 "file" 代替 "document"，按文件路径选择文档。
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from dictquerier.document.handle import Document
+from dictquerier.serialization import AUTO, JsonBackend, get_backend
+
+
+class ServedDocument:
+    """
+    从文件加载的具名文档
+
+    Attributes:
+        name (str): 文档名称
+        path (str): 文件的绝对路径
+        document (Document): 文档句柄
+    """
+    def __init__(self, name: str, path: str, backend: JsonBackend, index: bool = False):
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self.document = Document(self._load(), index=index)
+
+    def _stat(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> Any:
+        with open(self.path, 'rb') as f:
+            return self.backend.loads(f.read())
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        文件被修改时重新加载文档，旧版本的缓存随之失效
+
+        Args:
+            force (bool, optional): 文件未修改时也重新加载. Defaults to False.
+        Returns:
+            bool: 是否重新加载了文档
+        """
+        signature = self._stat()
+        if not force and signature == self._signature:
+            return False
+        with self._lock:
+            # 等待锁期间其他线程可能已经完成了加载
+            signature = self._stat()
+            if not force and signature == self._signature:
+                return False
+            self.document.replace(self._load())
+            self._signature = signature
+            return True
+
+    def describe(self) -> Dict[str, Any]:
+        return {'name': self.name, 'path': self.path, 'version': self.document.version}
+
+
+class QueryService:
+    """
+    查询服务，线程安全，可以同时处理多个客户端的请求
+
+    Args:
+        backend (str, optional): 加载文档和编解码请求使用的JSON后端. Defaults to 'auto'.
+        load_on_demand (bool, optional): 是否允许请求按文件路径加载未预先加载的文档. Defaults to False.
+        index (bool, optional): 是否为文档维护键位置索引. Defaults to False.
+    """
+    def __init__(self, backend: str = AUTO, load_on_demand: bool = False, index: bool = False):
+        self.backend = get_backend(backend)
+        self.load_on_demand = load_on_demand
+        self.index = index
+        self._documents: Dict[str, ServedDocument] = {}
+        self._lock = threading.Lock()
+
+    def add(self, path: str, name: Optional[str] = None) -> ServedDocument:
+        """
+        加载文档
+
+        Args:
+            path (str): JSON文件路径
+            name (str, optional): 文档名称，默认为不带扩展名的文件名. Defaults to None.
+        Returns:
+            ServedDocument: 加载的文档
+        """
+        if name is None:
+            name = os.path.splitext(os.path.basename(path))[0]
+        served = ServedDocument(name, path, self.backend, self.index)
+        with self._lock:
+            self._documents[name] = served
+        return served
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """已加载的文档列表"""
+        return [served.describe() for served in list(self._documents.values())]
+
+    def handle(self, request: Any) -> Dict[str, Any]:
+        """
+        处理一个请求
+
+        Args:
+            request (Any): 已解码的请求
+        Returns:
+            dict: 响应
+        """
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是JSON对象")
+            op = request.get('op', 'query')
+            if op == 'query':
+                return {'ok': True, 'result': self._query(request)}
+            if op == 'documents':
+                return {'ok': True, 'result': self.documents()}
+            if op == 'reload':
+                served = self._resolve(request)
+                served.refresh(force=True)
+                return {'ok': True, 'result': served.describe()}
+            if op == 'ping':
+                return {'ok': True, 'result': 'pong'}
+            raise ValueError(f"未知的请求类型: {op}")
+        except Exception as e:
+            return error_response(e)
+
+    def handle_bytes(self, raw: bytes) -> bytes:
+        """
+        处理编码后的请求，返回编码后的响应，响应不含换行符
+
+        Args:
+            raw (bytes): JSON格式的请求
+        Returns:
+            bytes: JSON格式的响应
+        """
+        try:
+            request = self.backend.loads(raw)
+        except ValueError as e:
+            return self.backend.dumpb(error_response(e))
+        response = self.handle(request)
+        try:
+            return self.backend.dumpb(response)
+        except (TypeError, ValueError, OverflowError) as e:
+            # 查询结果中有无法序列化的值
+            return self.backend.dumpb(error_response(e))
+
+    def _query(self, request: Dict[str, Any]) -> Any:
+        path = request.get('path')
+        if not isinstance(path, str):
+            raise ValueError("查询请求必须包含字符串类型的path")
+        served = self._resolve(request)
+        served.refresh()
+        return served.document.query(
+            path,
+            optimize=bool(request.get('optimize', False)),
+            adaptive=bool(request.get('adaptive', False)),
+            params=request.get('params'),
+        )
+
+    def _resolve(self, request: Dict[str, Any]) -> ServedDocument:
+        """按名称或文件路径查找文档"""
+        name = request.get('document')
+        if name is not None:
+            served = self._documents.get(name)
+            if served is None:
+                raise LookupError(f"文档 {name!r} 未加载")
+            return served
+
+        file = request.get('file')
+        if file is None:
+            if len(self._documents) == 1:
+                return next(iter(self._documents.values()))
+            raise ValueError("请求必须通过document或file指定文档")
+        path = os.path.abspath(file)
+        for served in list(self._documents.values()):
+            if served.path == path:
+                return served
+        if not self.load_on_demand:
+            raise LookupError(f"文件 {file!r} 未加载")
+        with self._lock:
+            # 加载期间其他线程可能已经加载了同一个文件
+            served = self._documents.get(path)
+            if served is None:
+                served = self._documents[path] = ServedDocument(path, path, self.backend, self.index)
+        return served
+
+
+def error_response(error: Exception) -> Dict[str, Any]:
+    """由异常构造失败的响应"""
+    return {'ok': False, 'error': {'type': type(error).__name__, 'message': str(error)}}
@@ -0,0 +1,138 @@
+"""
+查询服务的传输层
+
+- Unix套接字：每行一个JSON请求，按顺序每行返回一个JSON响应，同一连接可以发送多个请求
+- 本机HTTP：POST任意路径，请求体为JSON请求，响应体为JSON响应；GET /documents 列出已加载的文档
+
+两种方式都为每个连接使用一个线程，可以同时服务多个客户端。
+"""
+import os
+import socket
+import socketserver
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from dictquerier.server.service import QueryService
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    """按行处理Unix套接字上的请求"""
+    def handle(self):
+        service: QueryService = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(service.handle_bytes(line) + b'\n')
+            self.wfile.flush()
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    """处理HTTP请求"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._respond(self.server.service.handle_bytes(self.rfile.read(length)))
+
+    def do_GET(self):
+        service: QueryService = self.server.service
+        if self.path.rstrip('/') == '/documents':
+            self._respond(service.backend.dumpb(service.handle({'op': 'documents'})))
+        else:
+            self.send_error(404)
+
+    def _respond(self, body: bytes):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不在每个请求上输出访问日志
+        pass
+
+
+def _is_stale_socket(path: str) -> bool:
+    """路径是否是已经没有服务器监听的套接字文件（上一次运行遗留的套接字），普通文件和正在使用的套接字都不是"""
+    try:
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            return False
+    except FileNotFoundError:
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return False
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class UnixQueryServer(socketserver.ThreadingUnixStreamServer):
+        """Unix套接字查询服务器"""
+        daemon_threads = True
+
+        def __init__(self, socket_path: str, service: QueryService):
+            self.service = service
+            # 上一次运行遗留的套接字文件会导致绑定失败；路径上的其他文件和正在服务的套接字保持不动，由绑定报错
+            if _is_stale_socket(socket_path):
+                os.unlink(socket_path)
+            # 绑定成功后记录套接字文件，绑定失败时server_close不删除任何文件
+            self._socket_id = None
+            super().__init__(socket_path, _LineHandler)
+
+        def server_bind(self):
+            super().server_bind()
+            info = os.lstat(self.server_address)
+            self._socket_id = (info.st_dev, info.st_ino)
+
+        def server_close(self):
+            super().server_close()
+            # 只删除本服务器创建的套接字文件，路径可能已被删除或被其他服务器重新绑定
+            if self._socket_id is None:
+                return
+            try:
+                info = os.lstat(self.server_address)
+            except FileNotFoundError:
+                return
+            if (info.st_dev, info.st_ino) == self._socket_id and _is_stale_socket(self.server_address):
+                os.unlink(self.server_address)
+else:
+    UnixQueryServer = None
+
+
+class HTTPQueryServer(ThreadingHTTPServer):
+    """本机HTTP查询服务器"""
+    daemon_threads = True
+
+    def __init__(self, service: QueryService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.service = service
+        super().__init__((host, port), _HTTPHandler)
+
+
+def create_server(service: QueryService, socket_path: Optional[str] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """
+    创建查询服务器，调用serve_forever开始服务
+
+    Args:
+        service (QueryService): 查询服务
+        socket_path (str, optional): Unix套接字路径，指定时使用Unix套接字，否则使用HTTP. Defaults to None.
+        host (str, optional): HTTP监听地址. Defaults to '127.0.0.1'.
+        port (int, optional): HTTP监听端口，为0时随机选择. Defaults to 8765.
+    Returns:
+        socketserver.BaseServer: 服务器实例
+    """
+    if socket_path is not None:
+        if UnixQueryServer is None:
+            raise OSError("当前平台不支持Unix套接字")
+        return UnixQueryServer(socket_path, service)
+    return HTTPQueryServer(service, host, port)
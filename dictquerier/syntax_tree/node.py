@@ -1,4 +1,4 @@
-from typing import Dict, Union, List, Optional
+from typing import Dict, FrozenSet, Pattern, Tuple, Union, List, Optional
 from dictquerier.tokenizer.enum import Operator
 
 class ASTNode:
@@ -16,7 +16,9 @@ class ASTNode:
         self.column: Optional[int] = column
 
     def __repr__(self) -> str:
-        return f"{self.type}({self.__dict__})"
+        # 下划线开头的属性是执行和优化时使用的缓存（如展开的路径步骤），不属于节点本身
+        fields = {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+        return f"{self.type}({fields})"
 
 class NameNode(ASTNode):
     """
@@ -94,6 +96,16 @@ class KeyNode(ASTNode):
         self.key: str = key
         self.is_wildcard: bool = is_wildcard
 
+class RecursiveKeyNode(ASTNode):
+    """
+    递归下降节点，获取对象及其所有后代中指定键的值
+    """
+    def __init__(self, obj: ASTNode, key: str, is_wildcard: bool = False, line: Optional[int] = None, column: Optional[int] = None) -> None:
+        super().__init__(self.__class__.__name__, line, column)
+        self.obj: ASTNode = obj
+        self.key: str = key
+        self.is_wildcard: bool = is_wildcard
+
 class IndexNode(ASTNode):
     """
     索引节点
@@ -113,3 +125,156 @@ class SliceNode(ASTNode):
         self.start: ASTNode = start
         self.end: ASTNode = end
         self.step: ASTNode = step
+
+class ParamNode(ASTNode):
+    """
+    绑定参数节点 :name，值在执行时绑定
+    """
+    def __init__(self, name: str, line: Optional[int] = None, column: Optional[int] = None) -> None:
+        super().__init__(self.__class__.__name__, line, column)
+        self.name: str = name
+
+class SetNode(ASTNode):
+    """
+    集合字面量节点，in 操作符右侧的 ['a', 'b', 1]，解析时即构造为frozenset
+    """
+    def __init__(self, values: FrozenSet, line: Optional[int] = None, column: Optional[int] = None) -> None:
+        super().__init__(self.__class__.__name__, line, column)
+        self.values: FrozenSet = values
+
+class PatternNode(ASTNode):
+    """
+    正则表达式节点，=~ 操作符右侧的字符串字面量，解析时编译
+    """
+    def __init__(self, pattern: str, compiled: Pattern, line: Optional[int] = None, column: Optional[int] = None) -> None:
+        super().__init__(self.__class__.__name__, line, column)
+        self.pattern: str = pattern
+        self.compiled: Pattern = compiled
+
+class AdaptiveLogicalNode(ASTNode):
+    """
+    自适应逻辑运算节点，由优化器生成
+
+    将连续的同类逻辑运算(&&或||)展开为操作数列表，执行时根据观测到的
+    选择率和耗时动态调整操作数的求值顺序
+    """
+    def __init__(self, op: Operator, operands: List[ASTNode], reorder_interval: int = 64, line: Optional[int] = None, column: Optional[int] = None,
+                 segments: Optional[List[List[int]]] = None) -> None:
+        """
+        Args:
+            segments (List[List[int]], optional): 允许相互交换顺序的操作数位置，按求值顺序分段，
+                只在段内重排. Defaults to 所有操作数为一段.
+        """
+        super().__init__(self.__class__.__name__, line, column)
+        self.op: Operator = op
+        self.operands: List[ASTNode] = operands
+        self.reorder_interval: int = reorder_interval
+        self._segments: List[List[int]] = [list(segment) for segment in segments] if segments else [list(range(len(operands)))]
+        # 运行时统计，按操作数在初始列表中的位置记录
+        self._order: List[int] = [index for segment in self._segments for index in segment]
+        self._calls: List[int] = [0] * len(operands)
+        self._passes: List[int] = [0] * len(operands)
+        self._elapsed: List[float] = [0.0] * len(operands)
+        self._evaluations: int = 0
+
+    def record(self, index: int, passed: bool, elapsed: float) -> None:
+        """记录一次操作数求值的结果和耗时"""
+        self._calls[index] += 1
+        if passed:
+            self._passes[index] += 1
+        self._elapsed[index] += elapsed
+
+    def finish(self) -> None:
+        """完成一次整体求值，必要时根据统计数据重排操作数"""
+        self._evaluations += 1
+        if self._evaluations % self.reorder_interval == 0:
+            for segment in self._segments:
+                segment.sort(key=self._rank)
+            self._order = [index for segment in self._segments for index in segment]
+
+    def _rank(self, index: int) -> float:
+        """
+        计算操作数的排序权重，越小越先求值
+
+        对于&&，优先求值代价低且容易为假的操作数；对于||，优先求值代价低且容易为真的操作数
+        """
+        calls = self._calls[index]
+        if not calls:
+            return 0.0
+        cost = self._elapsed[index] / calls
+        # 使用加一平滑，避免选择率为0或1时权重失真
+        pass_rate = (self._passes[index] + 1) / (calls + 2)
+        if self.op == Operator.LOGICAL_AND:
+            return cost / (1 - pass_rate)
+        return cost / pass_rate
+
+# 路径节点，每个节点作用于其obj的求值结果
+PATH_NODE_TYPES = (KeyNode, RecursiveKeyNode, IndexNode, SliceNode)
+
+def path_steps(node: ASTNode) -> Tuple[ASTNode, ...]:
+    """
+    将以node结尾的路径链展开为步骤序列
+
+    a.b[0][1:] 展开为 (.b, [0], [1:]) 三个节点，路径的起点为第一个步骤的obj。
+    解析器在构造完路径后即展开，结果缓存在node上；执行时按顺序对上一步的结果执行每一步，
+    路径再长也不需要沿obj逐层递归
+
+    Args:
+        node (ASTNode): 路径链最外层的节点
+    Returns:
+        Tuple[ASTNode, ...]: 从起点开始的各个步骤，最后一个为node本身
+    """
+    steps = node.__dict__.get('_steps')
+    if steps is None:
+        chain = []
+        current = node
+        while isinstance(current, PATH_NODE_TYPES):
+            cached = current.__dict__.get('_steps')
+            if cached is not None:
+                chain.extend(reversed(cached))
+                break
+            chain.append(current)
+            current = current.obj
+        steps = node._steps = tuple(reversed(chain))
+    return steps
+
+def iter_child_nodes(node: ASTNode):
+    """
+    按字段定义顺序遍历节点的直接子节点
+
+    Args:
+        node (ASTNode): 要遍历的节点
+    Yields:
+        ASTNode: 子节点
+    """
+    for value in node.__dict__.values():
+        if isinstance(value, ASTNode):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, ASTNode):
+                    yield item
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(key, ASTNode):
+                    yield key
+                if isinstance(item, ASTNode):
+                    yield item
+
+def collect_parameters(node: ASTNode) -> FrozenSet[str]:
+    """
+    收集AST中所有绑定参数的名称
+
+    Args:
+        node (ASTNode): AST根节点
+    Returns:
+        FrozenSet[str]: 参数名称集合
+    """
+    names = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, ParamNode):
+            names.add(current.name)
+        stack.extend(iter_child_nodes(current))
+    return frozenset(names)
@@ -1,15 +1,45 @@
+import re
 from typing import List, Optional, Iterator
 from dictquerier.tokenizer.token import Token
 from dictquerier.tokenizer.enum import TokenType, Operator
 from dictquerier.syntax_tree.node import (
     ASTNode, NameNode, NumberNode, StringNode, VarRefNode,
-    ScriptCallNode, BinaryOpNode, IndexNode, KeyNode, SliceNode
+    ScriptCallNode, BinaryOpNode, IndexNode, KeyNode, SliceNode, RecursiveKeyNode,
+    ParamNode, SetNode, PatternNode, PATH_NODE_TYPES, path_steps
 )
+from dictquerier.executor.patterns import compile_pattern
+
+
+# 二元运算符优先级表，数值越大结合越紧；&& 和 || 优先级相同，从左到右结合
+LOGICAL_PRECEDENCE = 10
+COMPARISON_PRECEDENCE = 20
+ADDITIVE_PRECEDENCE = 30
+MULTIPLICATIVE_PRECEDENCE = 40
+
+_INFIX = {
+    op.value: (op, precedence)
+    for precedence, ops in (
+        (LOGICAL_PRECEDENCE, (Operator.LOGICAL_OR, Operator.LOGICAL_AND)),
+        (COMPARISON_PRECEDENCE, (
+            Operator.GREATER_THAN, Operator.LESS_THAN, Operator.GREATER_EQUAL, Operator.LESS_EQUAL,
+            Operator.EQUAL, Operator.NOT_EQUAL, Operator.IN, Operator.MATCH,
+        )),
+        (ADDITIVE_PRECEDENCE, (Operator.PLUS, Operator.MINUS)),
+        (MULTIPLICATIVE_PRECEDENCE, (Operator.MULTIPLY, Operator.DIVIDE)),
+    )
+    for op in ops
+}
+
+# 运算符栈中的左括号标记
+_GROUP = None
 
 
 class Parser:
     """
-    递归下降解析器，将Token序列解析为抽象语法树
+    表驱动的运算符优先级解析器，将Token序列解析为抽象语法树
+
+    二元运算和括号由expr按优先级表在一个循环中解析，路径访问由_postfix在一个循环中解析；
+    只有索引、切片和脚本参数中的子表达式会递归调用expr。
     """
     def __init__(self, tokens: Iterator[Token]):
         self.tokens = [token for token in tokens if token.type != TokenType.WHITESPACE]  # 过滤掉所有空白符
@@ -60,6 +90,12 @@ class Parser:
             return True
         return False
 
+    def _is_keyword_argument(self) -> bool:
+        """脚本参数以 name= 开头时为关键词参数，否则为位置参数（如 users[*].score）"""
+        next_token = self.peek()
+        return (self.current_token is not None and self.current_token.type == TokenType.NAME
+                and next_token is not None and next_token.type == TokenType.ASSIGN)
+
     def expect(self, *types: TokenType) -> Token:
         """期望当前令牌是指定类型之一，否则报错"""
         if self.current_token and self.current_token.type in types:
@@ -71,83 +107,125 @@ class Parser:
         got = self.current_token.type.literal if self.current_token else "EOF"
         self.error(f"期望 {expected}，但得到了 {got}")
 
-    # 表达式解析的各个级别，按优先级从低到高排列
-
     def expr(self) -> ASTNode:
-        """解析逻辑表达式 (||, &&)"""
-        left = self.comparison()
-        
-        while (self.current_token and self.current_token.type == TokenType.OP and 
-               self.current_token.value in (Operator.LOGICAL_OR.value, Operator.LOGICAL_AND.value)):
-            # 将操作符字符串转换为Operator枚举
-            op_value = self.current_token.value
-            op = Operator.LOGICAL_OR if op_value == Operator.LOGICAL_OR.value else Operator.LOGICAL_AND
-            line, column = self.current_token.line, self.current_token.column
-            self.advance()
-            right = self.comparison()
-            left = BinaryOpNode(left, op, right, line, column)
-            
-        return left
+        """
+        解析完整表达式（二元运算和括号）
 
-    def comparison(self) -> ASTNode:
-        """解析比较表达式 (>, <, >=, <=, ==, !=)"""
-        left = self.addition()
+        按运算符优先级表（_INFIX）逐个令牌处理，操作数和尚未归约的运算符、左括号分别保存在显式的栈中：
+        遇到运算符时先归约栈顶优先级不低于它的运算符（左结合），遇到右括号时归约到对应的左括号。
+        长的 && / || 条件链和深层嵌套的括号都在同一个循环中处理，不消耗Python调用栈。
+        """
+        operands: List[ASTNode] = []
+        # 元素为 (运算符, 优先级, 行, 列)，左括号为 _GROUP
+        operators: list = []
+        groups = 0
+        need_operand = True
+        # 集合和正则字面量位于比较运算的右侧，之后只能跟比较或逻辑运算符
+        after_literal = False
         
-        while (self.current_token and self.current_token.type == TokenType.OP and 
-               self.current_token.value in (
-                   Operator.GREATER_THAN.value, 
-                   Operator.LESS_THAN.value, 
-                   Operator.GREATER_EQUAL.value, 
-                   Operator.LESS_EQUAL.value, 
-                   Operator.EQUAL.value, 
-                   Operator.NOT_EQUAL.value
-               )):
-            # 将操作符字符串转换为Operator枚举
-            op_value = self.current_token.value
-            op = next(op for op in Operator if op.value == op_value)
-            line, column = self.current_token.line, self.current_token.column
-            self.advance()
-            right = self.addition()
-            left = BinaryOpNode(left, op, right, line, column)
+        while True:
+            if need_operand:
+                # 左括号入栈，否则解析一个路径表达式作为操作数
+                if self.current_token and self.current_token.type == TokenType.LPAREN:
+                    operators.append(_GROUP)
+                    groups += 1
+                    self.advance()
+                    continue
+                operands.append(self.path())
+                need_operand = False
             
-        return left
-
-    def addition(self) -> ASTNode:
-        """解析加减法表达式 (+, -)"""
-        left = self.multiplication()
-        
-        while (self.current_token and self.current_token.type == TokenType.OP and 
-               self.current_token.value in (Operator.PLUS.value, Operator.MINUS.value)):
-            # 将操作符字符串转换为Operator枚举
-            op_value = self.current_token.value
-            op = Operator.PLUS if op_value == Operator.PLUS.value else Operator.MINUS
-            line, column = self.current_token.line, self.current_token.column
-            self.advance()
-            right = self.multiplication()
-            left = BinaryOpNode(left, op, right, line, column)
+            token = self.current_token
+            infix = self._infix(token)
+            if infix is not None and after_literal and infix[1] > COMPARISON_PRECEDENCE:
+                infix = None
+            if infix is None:
+                if groups and token and token.type == TokenType.RPAREN:
+                    # 括号表达式: (expr)，归约到左括号后作为操作数，后面可以继续跟路径访问
+                    self.advance()
+                    while operators[-1] is not _GROUP:
+                        self._reduce(operands, operators)
+                    operators.pop()
+                    groups -= 1
+                    operands.append(self._postfix(operands.pop()))
+                    after_literal = False
+                    continue
+                # 表达式结束，未闭合的括号按期望右括号报错
+                if groups:
+                    self.expect(TokenType.RPAREN)
+                while operators:
+                    self._reduce(operands, operators)
+                return operands[0]
             
-        return left
-
-    def multiplication(self) -> ASTNode:
-        """解析乘除法表达式 (*, /)"""
-        left = self.path()
-        
-        while (self.current_token and self.current_token.type == TokenType.OP and 
-               self.current_token.value in (Operator.MULTIPLY.value, Operator.DIVIDE.value)):
-            # 将操作符字符串转换为Operator枚举
-            op_value = self.current_token.value
-            op = Operator.MULTIPLY if op_value == Operator.MULTIPLY.value else Operator.DIVIDE
-            line, column = self.current_token.line, self.current_token.column
+            # 先归约栈顶优先级不低于当前运算符的运算符，使同级运算符左结合
+            op, precedence = infix
+            while operators and operators[-1] is not _GROUP and operators[-1][1] >= precedence:
+                self._reduce(operands, operators)
+            operators.append((op, precedence, token.line, token.column))
             self.advance()
-            right = self.path()
-            left = BinaryOpNode(left, op, right, line, column)
             
-        return left
+            # 集合成员和正则匹配的右侧可以是字面量: 'status' in ['a', 'b']，'name' =~ '^a.*'
+            token = self.current_token
+            if op is Operator.IN and token and token.type == TokenType.LBRACK:
+                operands.append(self.set_literal())
+                after_literal = True
+            elif op is Operator.MATCH and token and token.type == TokenType.STRING:
+                operands.append(self.pattern_literal())
+                after_literal = True
+            else:
+                need_operand = True
+                after_literal = False
+
+    @staticmethod
+    def _infix(token: Optional[Token]) -> Optional[tuple]:
+        """当前令牌作为二元运算符时的 (运算符, 优先级)，否则为None"""
+        if token is None:
+            return None
+        if token.type == TokenType.OP:
+            return _INFIX.get(token.value)
+        if token.type == TokenType.NAME and token.value == Operator.IN.value:
+            return _INFIX[Operator.IN.value]
+        return None
+
+    @staticmethod
+    def _reduce(operands: List[ASTNode], operators: list):
+        """用栈顶的运算符归约栈顶的两个操作数"""
+        op, _, line, column = operators.pop()
+        right = operands.pop()
+        left = operands.pop()
+        operands.append(BinaryOpNode(left, op, right, line, column))
+
+    def set_literal(self) -> SetNode:
+        """解析 in 操作符右侧的集合字面量 [值, 值, ...]，元素只能是字符串或数字"""
+        line, column = self.current_token.line, self.current_token.column
+        self.expect(TokenType.LBRACK)
+        values = []
+        while self.current_token and self.current_token.type != TokenType.RBRACK:
+            element = self.primary()
+            if not isinstance(element, (StringNode, NumberNode)):
+                self.error("集合中的元素只能是字符串或数字")
+            values.append(element.value)
+            if not self.match(TokenType.COMMA):
+                break
+        self.expect(TokenType.RBRACK)
+        return SetNode(frozenset(values), line, column)
+
+    def pattern_literal(self) -> PatternNode:
+        """解析 =~ 操作符右侧的正则表达式字面量并编译"""
+        token = self.current_token
+        pattern = self._parse_string_literal(token.value)
+        try:
+            compiled = compile_pattern(pattern)
+        except re.error as e:
+            self.error(f"无效的正则表达式 {pattern!r}: {e}")
+        self.advance()
+        return PatternNode(pattern, compiled, token.line, token.column)
 
     def path(self) -> ASTNode:
-        """解析路径表达式 (obj.key 或 obj[index])"""
-        left = self.primary()
-        
+        """解析路径表达式 (obj.key、obj..key 或 obj[index])"""
+        return self._postfix(self.primary())
+
+    def _postfix(self, left: ASTNode) -> ASTNode:
+        """在已解析的表达式之后循环解析路径访问，路径再长也不增加调用深度"""
         def _parse_slice_parts() -> tuple:
             """
             解析切片的end和step部分
@@ -199,6 +277,31 @@ class Parser:
                 else:
                     self.error(f"键访问后期望标识符或字符串，但得到了 {self.current_token.type.literal}")
             
+            elif self.current_token.type == TokenType.DOTDOT:
+                # 递归下降: obj..key, obj..'key', obj..['key'], obj..*
+                line, column = self.current_token.line, self.current_token.column
+                self.advance()
+                
+                if self.current_token and self.current_token.type == TokenType.OP and self.current_token.value == '*':
+                    self.advance()
+                    left = RecursiveKeyNode(left, '*', is_wildcard=True, line=line, column=column)
+                elif self.current_token and self.current_token.type == TokenType.NAME:
+                    key_name = self.current_token.value
+                    self.advance()
+                    left = RecursiveKeyNode(left, key_name, line=line, column=column)
+                elif self.current_token and self.current_token.type == TokenType.STRING:
+                    key_name = self._parse_string_literal(self.current_token.value)
+                    self.advance()
+                    left = RecursiveKeyNode(left, key_name, line=line, column=column)
+                elif self.current_token and self.current_token.type == TokenType.LBRACK:
+                    self.advance()
+                    key_token = self.expect(TokenType.STRING)
+                    self.expect(TokenType.RBRACK)
+                    left = RecursiveKeyNode(left, self._parse_string_literal(key_token.value), line=line, column=column)
+                else:
+                    got = self.current_token.type.literal if self.current_token else "EOF"
+                    self.error(f"递归下降后期望标识符、字符串或通配符，但得到了 {got}")
+            
             elif self.current_token.type == TokenType.LBRACK:
                 # 索引访问: obj[index]
                 line, column = self.current_token.line, self.current_token.column
@@ -242,7 +345,10 @@ class Parser:
             else:
                 # 不是路径访问操作，跳出循环
                 break
-                
+        
+        # 路径链在解析时展开为步骤序列，执行器按顺序循环求值
+        if isinstance(left, PATH_NODE_TYPES):
+            path_steps(left)
         return left
 
     def primary(self) -> ASTNode:
@@ -320,7 +426,7 @@ class Parser:
                 # 解析参数
                 if self.current_token and self.current_token.type != TokenType.RPAREN:
                     # 解析第一个参数
-                    if self.current_token and self.current_token.type == TokenType.NAME:
+                    if self._is_keyword_argument():
                         # 关键词参数
                         key_node = self.expr()
                         self.expect(TokenType.ASSIGN)
@@ -332,7 +438,7 @@ class Parser:
                     # 解析逗号分隔的后续参数
                     while self.current_token and self.current_token.type == TokenType.COMMA:
                         self.advance()
-                        if self.current_token and self.current_token.type == TokenType.NAME:
+                        if self._is_keyword_argument():
                             # 关键词参数
                             key_node = self.expr()
                             self.expect(TokenType.ASSIGN)
@@ -353,6 +459,12 @@ class Parser:
             self.advance()
             return NameNode(name, line, column)
             
+        elif token.type == TokenType.PARAM:
+            # 绑定参数: :name
+            line, column = token.line, token.column
+            self.advance()
+            return ParamNode(token.value[1:], line, column)
+            
         elif token.type == TokenType.NUMBER:
             # 数字字面量: 123, 45.67
             value = token.value
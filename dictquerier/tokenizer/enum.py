@@ -7,9 +7,10 @@ class TokenType(Enum):
     """
     VARSIGN    = ("$", r"\$")                           # 变量符号，这个符号一般来说后面只能跟NAME
     SCRIPTSIGN = ("@", r"@")                            # 脚本符号，这个符号一般来说后面只能跟NAME
+    DOTDOT     = ("..", r"\.\.")                        # 递归下降 ..，需要位于DOT之前以优先匹配
     DOT        = (".", r"\.")                           # .
     WHITESPACE = ("whitespace", r"\s+")                 # 空白符，暂时没用，因为在解析时会跳过
-    OP         = ("op", r"==|!=|>=|<=|>|<|&&|\|\||[+\-*/<>]")    # 操作符，比如 ==, >, <, *, &&, ||等
+    OP         = ("op", r"=~|==|!=|>=|<=|>|<|&&|\|\||[+\-*/<>]")    # 操作符，比如 ==, >, <, *, &&, ||, =~等
     NAME       = ("name", r"[a-zA-Z_][a-zA-Z0-9_]*")    # 标识符
     NUMBER     = ("number", r"\d+(\.\d+)?([eE][+-]?\d+)?")        # 整数或浮点
     STRING     = ("string", r""""(?:\\.|[^"\\])*"|'(?:\\.|[^\\'])*'""") # 引号字符串
@@ -18,6 +19,7 @@ class TokenType(Enum):
     LPAREN     = ("(", r"\(")                           # (
     RPAREN     = (")", r"\)")                           # )
     ASSIGN     = ("=", r"=")                            # =
+    PARAM      = (":name", r":[a-zA-Z_][a-zA-Z0-9_]*")  # 绑定参数 :name，需要位于COLON之前以优先匹配
     COLON      = (":", r":")                            # :
     COMMA      = (",", r",")                            # ,
     END        = ("EOF", r"$^")                         # 结束
@@ -57,6 +59,8 @@ class Operator(Enum):
     MULTIPLY = "*"
     DIVIDE = "/"
     SLICE = "slice"
+    IN = "in"
+    MATCH = "=~"
 
     def __str__(self):
         return self.value 
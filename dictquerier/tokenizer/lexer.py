@@ -1,6 +1,9 @@
 import re
 from dictquerier.tokenizer.token import Token
-from dictquerier.tokenizer.enum import TokenType
+from dictquerier.tokenizer.enum import TokenType, Operator
+
+# 以这些令牌结尾时前面是一个完整的值，其后的 :name 只能是切片的冒号和键名
+_VALUE_END = (TokenType.NAME, TokenType.NUMBER, TokenType.STRING, TokenType.RBRACK, TokenType.RPAREN, TokenType.PARAM)
 
 
 class Lexer:
@@ -22,7 +25,8 @@ class Lexer:
 
     def _preprocess_text(self, text):
         """预处理文本，转换特殊语法形式"""
-        return re.sub(r'\.(?=\[)', r'.*', text)
+        # 递归下降 ..[key] 中的点不做转换
+        return re.sub(r'(?<!\.)\.(?=\[)', r'.*', text)
 
     def tokenize(self):
         # 如果以点开头，在开头插入一个*通配符
@@ -30,6 +34,8 @@ class Lexer:
             # 创建一个人工的通配符Token
             yield Token(TokenType.OP, '*', column=0, line=1)
         
+        previous = None
+        spaced = False
         for m in self.master_pattern.finditer(self.text):
             kind = m.lastgroup
             value = m.group(kind)
@@ -39,6 +45,7 @@ class Lexer:
             
             # 跳过空白符
             if kind == 'WHITESPACE':
+                spaced = True
                 continue
             
             # 未知字符时报错
@@ -46,12 +53,33 @@ class Lexer:
                 raise SyntaxError(f"非法字符 {value!r} 在行 {self.line}, 列 {self.column}")
 
             tok_type = TokenType[kind]
-            yield Token(tok_type, value, column=self.column, line=self.line)
+            if tok_type == TokenType.PARAM and self._is_slice_key(previous, spaced):
+                # 切片中的 :name 为冒号和键名，如 [0:n]、[a:b]、[:n]、[::n]
+                yield Token(TokenType.COLON, ':', column=self.column - len(value) + 1, line=self.line)
+                tok_type, value = TokenType.NAME, value[1:]
+            previous = Token(tok_type, value, column=self.column, line=self.line)
+            spaced = False
+            yield previous
 
         # 扫描结束后，附加 END token
         self.column += 1
         yield Token(TokenType.END, TokenType.END.literal, column=self.column, line=self.line)
 
+    @staticmethod
+    def _is_slice_key(previous, spaced):
+        """
+        判断 :name 是否为切片的冒号和键名而不是绑定参数
+
+        前一个令牌是完整的值时只能是切片；紧跟在 [ 或冒号之后时按切片处理，
+        与空白分隔时为绑定参数，如 [ :i]、[0: :n]
+        """
+        if previous is None:
+            return False
+        if previous.type in _VALUE_END:
+            # in 是运算符，其后为运算数
+            return not (previous.type == TokenType.NAME and previous.value == Operator.IN.value)
+        return previous.type in (TokenType.LBRACK, TokenType.COLON) and not spaced
+
     def _update_position(self, text):
         """
         根据文本内容更新行号和列号
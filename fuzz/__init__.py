@@ -0,0 +1,9 @@
+"""
+dictquerier 差分模糊测试
+
+随机生成合法的查询路径和文档，在所有已注册的查询引擎上执行，
+与参考实现Evaluator的结果和异常类型进行比对，并输出最小化后的不一致用例。
+
+用法:
+    python -m fuzz --iterations 2000 --seed 0
+"""
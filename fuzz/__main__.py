@@ -0,0 +1,73 @@
+"""
+差分模糊测试命令行入口
+"""
+import argparse
+import json
+import sys
+
+from fuzz.differential import DifferentialRunner
+from fuzz.engines import available_engines
+from fuzz.incremental import run_incremental
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(prog="python -m fuzz", description="dictquerier 查询引擎差分模糊测试")
+    parser.add_argument("-n", "--iterations", type=int, default=2000, help="生成的路径总数")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("-e", "--engines", help=f"参与比对的引擎，逗号分隔，可选: {','.join(available_engines())}")
+    parser.add_argument("--max-mismatches", type=int, default=10, help="收集到多少个不一致用例后停止")
+    parser.add_argument("--no-minimize", action="store_true", help="不最小化不一致用例")
+    parser.add_argument("--incremental", action="store_true", help="测试常驻查询的增量重算，此时iterations为随机文档数量")
+    parser.add_argument("-o", "--output", help="不一致用例输出JSON文件路径")
+    return parser.parse_args()
+
+
+def main():
+    """主入口函数"""
+    args = parse_args()
+    if args.incremental:
+        mismatches = run_incremental(args.iterations, args.seed)
+        print(f"文档: {args.iterations}，不一致: {len(mismatches)}")
+        for i, mismatch in enumerate(mismatches[:args.max_mismatches], 1):
+            print(f"\n{i}. {mismatch['path']}")
+            print(f"   修改前文档: {json.dumps(mismatch['document_before'], ensure_ascii=False)}")
+            print(f"   修改: {mismatch['mutation']!r}")
+            print(f"   期望结果: {mismatch['expected']}")
+            print(f"   常驻结果: {mismatch['actual']}")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(mismatches, f, ensure_ascii=False, indent=2, default=repr)
+        sys.exit(1 if mismatches else 0)
+
+    engines = args.engines.split(",") if args.engines else None
+    try:
+        runner = DifferentialRunner(engines, args.seed)
+    except ValueError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    mismatches = runner.run(args.iterations, not args.no_minimize, args.max_mismatches)
+    stats = runner.stats
+    rate = stats['cases'] / stats['elapsed'] if stats['elapsed'] else 0
+    print(f"引擎: {', '.join(engine.name for engine in runner.engines)}")
+    print(f"用例: {stats['cases']}，参考引擎报错: {stats['reference_errors']}，"
+          f"不一致: {stats['mismatches']}，速度: {rate:.0f} 用例/秒")
+
+    for i, mismatch in enumerate(mismatches, 1):
+        print(f"\n{i}. [{mismatch.engine}] {mismatch.path}")
+        print(f"   文档: {json.dumps(mismatch.document, ensure_ascii=False)}")
+        print(f"   参考结果: {mismatch.expected!r}")
+        print(f"   引擎结果: {mismatch.actual!r}")
+        print(f"   原始路径: {mismatch.original_path}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([mismatch.to_dict() for mismatch in mismatches], f, ensure_ascii=False, indent=2)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
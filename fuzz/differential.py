@@ -0,0 +1,199 @@
+"""
+差分执行与不一致用例最小化
+"""
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fuzz.documents import random_document, shrink_candidates
+from fuzz.engines import QueryEngine, available_engines, get_engine
+from fuzz.paths import PathGenerator, PathSpec, setup_scripts
+
+REFERENCE = 'reference'
+
+
+def canonical(value: Any) -> Any:
+    """
+    将查询结果转换为可严格比较的形式
+
+    Python中 True == 1 且 1 == 1.0，直接比较会掩盖类型差异，因此为标量附加类型名。
+    属性访问可能得到绑定方法，绑定方法只在所属对象相同时相等，因此只比较方法名
+    """
+    if callable(value):
+        return ('callable', getattr(value, '__name__', None))
+    if isinstance(value, list):
+        return ('list', tuple(canonical(item) for item in value))
+    if isinstance(value, tuple):
+        return ('tuple', tuple(canonical(item) for item in value))
+    if isinstance(value, dict):
+        return ('dict', tuple((key, canonical(item)) for key, item in value.items()))
+    return (type(value).__name__, value)
+
+
+def outcome(engine: QueryEngine, data: Any, path: str) -> Tuple[str, Any]:
+    """
+    执行查询并返回结果
+
+    Returns:
+        tuple: ('ok', 规范化结果) 或 ('error', 异常类型名称)
+    """
+    try:
+        return 'ok', canonical(engine.query(data, path))
+    except RecursionError:
+        raise
+    except Exception as e:
+        return 'error', type(e).__name__
+
+
+def is_mismatch(engine: QueryEngine, expected: Tuple[str, Any], actual: Tuple[str, Any]) -> bool:
+    """判断引擎结果与参考结果是否不一致"""
+    if engine.exact_errors:
+        return expected != actual
+    # 不保证异常一致的引擎，只比较双方都成功时的结果
+    if expected[0] == 'ok' and actual[0] == 'ok':
+        return expected != actual
+    return False
+
+
+class Mismatch:
+    """
+    不一致用例
+
+    Attributes:
+        engine (str): 引擎名称
+        path (str): 最小化后的查询路径
+        document: 最小化后的文档
+        expected: 参考引擎的结果
+        actual: 对比引擎的结果
+        original_path (str): 最小化前的查询路径
+    """
+    def __init__(self, engine: str, path: str, document: Any, expected, actual, original_path: str):
+        self.engine = engine
+        self.path = path
+        self.document = document
+        self.expected = expected
+        self.actual = actual
+        self.original_path = original_path
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'engine': self.engine,
+            'path': self.path,
+            'document': self.document,
+            'expected': repr(self.expected),
+            'actual': repr(self.actual),
+            'original_path': self.original_path,
+        }
+
+
+def minimize(engine: QueryEngine, spec: PathSpec, document: Any, max_attempts: int = 2000) -> Tuple[PathSpec, Any]:
+    """
+    贪心地缩小路径和文档，直到任何进一步的缩小都会使不一致消失
+
+    Args:
+        engine (QueryEngine): 出现不一致的引擎
+        spec (PathSpec): 原始路径
+        document: 原始文档
+        max_attempts (int, optional): 最多尝试的候选数量. Defaults to 2000.
+    Returns:
+        tuple: (最小化后的路径, 最小化后的文档)
+    """
+    reference = get_engine(REFERENCE)
+    attempts = 0
+
+    def still_fails(candidate_spec: PathSpec, candidate_document: Any) -> bool:
+        path = candidate_spec.render()
+        return is_mismatch(engine, outcome(reference, candidate_document, path), outcome(engine, candidate_document, path))
+
+    progress = True
+    while progress and attempts < max_attempts:
+        progress = False
+        for candidate in spec.shrink():
+            attempts += 1
+            if still_fails(candidate, document):
+                spec, progress = candidate, True
+                break
+        if progress:
+            continue
+        for candidate in shrink_candidates(document):
+            attempts += 1
+            if attempts >= max_attempts:
+                break
+            if still_fails(spec, candidate):
+                document, progress = candidate, True
+                break
+    return spec, document
+
+
+class DifferentialRunner:
+    """
+    差分模糊测试执行器
+
+    Args:
+        engines (Sequence[str], optional): 参与比对的引擎名称，默认为除参考引擎外的所有已注册引擎
+        seed (int, optional): 随机种子. Defaults to 0.
+        paths_per_document (int, optional): 每个随机文档上生成的路径数量. Defaults to 20.
+    """
+    def __init__(self, engines: Optional[Sequence[str]] = None, seed: int = 0, paths_per_document: int = 20):
+        setup_scripts()
+        names = engines or [name for name in available_engines() if name != REFERENCE]
+        self.reference = get_engine(REFERENCE)
+        self.engines = [get_engine(name) for name in names if name != REFERENCE]
+        self.rng = random.Random(seed)
+        self.generator = PathGenerator(self.rng)
+        self.paths_per_document = paths_per_document
+        self.stats = {'cases': 0, 'reference_errors': 0, 'mismatches': 0, 'elapsed': 0.0}
+
+    def run(self, iterations: int, minimize_mismatches: bool = True, max_mismatches: int = 10,
+            progress: Optional[Callable[[int], None]] = None) -> List[Mismatch]:
+        """
+        执行差分测试
+
+        Args:
+            iterations (int): 生成的路径总数
+            minimize_mismatches (bool, optional): 是否最小化不一致用例. Defaults to True.
+            max_mismatches (int, optional): 收集到多少个不一致用例后提前停止. Defaults to 10.
+            progress (Callable, optional): 进度回调，参数为已执行的用例数
+        Returns:
+            List[Mismatch]: 不一致用例
+        """
+        mismatches = []
+        seen = set()
+        start = time.perf_counter()
+        document = None
+        for i in range(iterations):
+            if i % self.paths_per_document == 0:
+                document = random_document(self.rng)
+            spec = self.generator.generate(document)
+            path = spec.render()
+            expected = outcome(self.reference, document, path)
+            self.stats['cases'] += 1
+            if expected[0] == 'error':
+                self.stats['reference_errors'] += 1
+
+            for engine in self.engines:
+                actual = outcome(engine, document, path)
+                if not is_mismatch(engine, expected, actual):
+                    continue
+                self.stats['mismatches'] += 1
+                small_spec, small_document = spec, document
+                if minimize_mismatches:
+                    small_spec, small_document = minimize(engine, spec, document)
+                small_path = small_spec.render()
+                # 相同引擎上最小化后相同的路径只报告一次
+                if (engine.name, small_path) in seen:
+                    continue
+                seen.add((engine.name, small_path))
+                mismatches.append(Mismatch(
+                    engine.name, small_path, small_document,
+                    outcome(self.reference, small_document, small_path),
+                    outcome(engine, small_document, small_path),
+                    path,
+                ))
+
+            if progress:
+                progress(i + 1)
+            if len(mismatches) >= max_mismatches:
+                break
+        self.stats['elapsed'] += time.perf_counter() - start
+        return mismatches
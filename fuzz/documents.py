@@ -0,0 +1,97 @@
+"""
+随机文档生成器
+
+键名取自固定的小词表，保证随机生成的路径能以较高概率命中实际数据
+"""
+import random
+from typing import Any, Dict, List
+
+KEYS = ['id', 'name', 'value', 'items', 'tags', 'meta', 'data', 'sub']
+RECORD_KEYS = ['id', 'name', 'value', 'score', 'flag']
+STRINGS = ['a', 'b', 'c', 'A', 'B', '', 'key.01', '中文']
+
+
+def random_scalar(rng: random.Random) -> Any:
+    """生成随机标量值"""
+    choice = rng.random()
+    if choice < 0.45:
+        return rng.randint(-5, 10)
+    if choice < 0.6:
+        return round(rng.uniform(-5, 10), 2)
+    if choice < 0.8:
+        return rng.choice(STRINGS)
+    if choice < 0.92:
+        return rng.random() < 0.5
+    return None
+
+
+def random_record(rng: random.Random) -> Dict[str, Any]:
+    """生成列表中的记录，记录之间共享键名以便条件过滤命中"""
+    record = {}
+    for key in RECORD_KEYS:
+        if rng.random() < 0.8:
+            # 同一个键大多数情况下是数字，偶尔出现其他类型以覆盖类型错误
+            record[key] = rng.randint(0, 5) if rng.random() < 0.85 else random_scalar(rng)
+    if rng.random() < 0.3:
+        record['items'] = [rng.randint(0, 9) for _ in range(rng.randint(0, 4))]
+    return record
+
+
+def random_value(rng: random.Random, depth: int) -> Any:
+    """生成随机值，depth为剩余的嵌套深度"""
+    if depth <= 0:
+        return random_scalar(rng)
+    choice = rng.random()
+    if choice < 0.3:
+        return random_scalar(rng)
+    if choice < 0.55:
+        return [random_record(rng) for _ in range(rng.randint(0, 6))]
+    if choice < 0.7:
+        return [random_scalar(rng) for _ in range(rng.randint(0, 8))]
+    if choice < 0.8:
+        return [random_value(rng, depth - 1) for _ in range(rng.randint(0, 3))]
+    return random_dict(rng, depth - 1)
+
+
+def random_dict(rng: random.Random, depth: int) -> Dict[str, Any]:
+    """生成随机字典"""
+    keys = rng.sample(KEYS, rng.randint(1, len(KEYS)))
+    return {key: random_value(rng, depth) for key in keys}
+
+
+def random_document(rng: random.Random, depth: int = 3) -> Dict[str, Any]:
+    """
+    生成随机文档，根节点总是字典
+
+    Args:
+        rng (random.Random): 随机数生成器
+        depth (int, optional): 最大嵌套深度. Defaults to 3.
+    Returns:
+        dict: 随机文档
+    """
+    return random_dict(rng, depth)
+
+
+def shrink_candidates(value: Any) -> List[Any]:
+    """
+    生成比value更小的候选文档，用于最小化不一致用例
+
+    Returns:
+        list: 删除一个键、一个元素或将子节点替换为更小候选后的文档列表
+    """
+    candidates = []
+    if isinstance(value, dict):
+        for key in value:
+            candidates.append({k: v for k, v in value.items() if k != key})
+        for key, child in value.items():
+            for smaller in shrink_candidates(child):
+                candidate = dict(value)
+                candidate[key] = smaller
+                candidates.append(candidate)
+    elif isinstance(value, list):
+        for i in range(len(value)):
+            candidates.append(value[:i] + value[i + 1:])
+        for i, child in enumerate(value):
+            for smaller in shrink_candidates(child):
+                candidates.append(value[:i] + [smaller] + value[i + 1:])
+    return candidates
@@ -0,0 +1,236 @@
+"""
+差分测试使用的可插拔查询引擎
+
+每个引擎负责把查询路径语句转换为结果，可以使用不同的解析和执行策略。
+Evaluator是参考实现，其余引擎的结果应与其保持一致，由差分模糊测试验证。
+"""
+import json
+from typing import Any, Dict, List
+
+from dictquerier.tokenizer.lexer import Lexer
+from dictquerier.syntax_tree.parser import Parser
+from dictquerier.syntax_tree.node import ASTNode, BinaryOpNode, NumberNode, ParamNode, iter_child_nodes
+from dictquerier.executor.evaluator import Evaluator
+from dictquerier.executor.profiler import ProfilingEvaluator
+from dictquerier.executor.status import StatusEvaluator
+from dictquerier.executor.streaming import StreamingEvaluator
+from dictquerier.executor.index import KeyIndex
+from dictquerier.executor.views import materialize, to_python
+from dictquerier.optimizer.reorder import reorder_predicates
+from dictquerier.document.handle import Document
+from dictquerier.serialization.lazy import loads_lazy
+from dictquerier.serialization.messagepack import loads_msgpack, packb
+from dictquerier.serialization.packed import pack, root
+
+
+class QueryEngine:
+    """
+    查询引擎基类
+
+    Attributes:
+        name (str): 引擎名称，用于注册和选择引擎
+        exact_errors (bool): 是否在与参考实现相同的输入上抛出相同类型的异常。
+            改变求值顺序的执行方式（如流式求值）在多处会出错时可能先抛出不同的异常，此时设置为False，
+            差分测试只比较双方都成功时的结果
+    """
+    name: str = None
+    exact_errors: bool = True
+
+    def query(self, data: Any, path: str) -> Any:
+        """
+        执行查询
+
+        Args:
+            data: 需要查询的json结构
+            path (str): 查询路径语句
+        Returns:
+            Any: 查询结果
+        """
+        raise NotImplementedError(f"引擎 {self.__class__.__name__} 未实现query方法")
+
+    @staticmethod
+    def parse(path: str) -> ASTNode:
+        """使用默认的词法和语法分析器解析查询路径"""
+        return Parser(Lexer(path).tokenize()).parse()
+
+
+class ReferenceEngine(QueryEngine):
+    """参考引擎，直接使用Evaluator执行"""
+    name = 'reference'
+
+    def query(self, data: Any, path: str) -> Any:
+        return Evaluator(data).query(self.parse(path))
+
+
+class OptimizedEngine(QueryEngine):
+    """按估算代价和选择率重排过滤条件后执行"""
+    name = 'optimized'
+
+    def query(self, data: Any, path: str) -> Any:
+        return Evaluator(data).query(reorder_predicates(self.parse(path)))
+
+
+class AdaptiveEngine(QueryEngine):
+    """执行时根据观测到的选择率动态调整过滤条件顺序"""
+    name = 'adaptive'
+
+    def query(self, data: Any, path: str) -> Any:
+        # 使用较小的重排间隔，使小文档上也能触发自适应重排
+        return Evaluator(data).query(reorder_predicates(self.parse(path), adaptive=True, reorder_interval=4))
+
+
+class ProfilingEngine(QueryEngine):
+    """带性能统计的执行器"""
+    name = 'profiling'
+    # 内置函数的参数按列表方式逐级求值，多个过滤条件都会报错时抛出的异常可能与流式求值不同
+    exact_errors = False
+
+    def query(self, data: Any, path: str) -> Any:
+        return ProfilingEvaluator(data).query(self.parse(path))
+
+
+class IndexedEngine(QueryEngine):
+    """使用键位置索引执行递归下降查询"""
+    name = 'indexed'
+
+    def query(self, data: Any, path: str) -> Any:
+        return Evaluator(data, KeyIndex(data)).query(self.parse(path))
+
+
+class CachedEngine(QueryEngine):
+    """通过带结果缓存的文档句柄执行，返回第二次（命中缓存时）的查询结果"""
+    name = 'cached'
+
+    def query(self, data: Any, path: str) -> Any:
+        document = Document(data)
+        document.query(path)
+        return document.query(path)
+
+
+class ViewEngine(QueryEngine):
+    """切片和列表投影返回零拷贝视图，结果在返回前转换为列表"""
+    name = 'views'
+
+    def query(self, data: Any, path: str) -> Any:
+        return materialize(Evaluator(data, views=True).query(self.parse(path)))
+
+
+class PackedEngine(QueryEngine):
+    """在紧凑二进制编码的只读视图上查询，结果在返回前完整解码"""
+    name = 'packed'
+    exact_errors = False
+
+    def query(self, data: Any, path: str) -> Any:
+        return to_python(Evaluator(root(pack(data))).query(self.parse(path)))
+
+
+class LazyEngine(QueryEngine):
+    """在按需解码的JSON文档上查询，所有对象和数组都以视图返回，结果在返回前完整解码"""
+    name = 'lazy'
+    exact_errors = False
+
+    def query(self, data: Any, path: str) -> Any:
+        return to_python(Evaluator(loads_lazy(json.dumps(data), eager_threshold=0)).query(self.parse(path)))
+
+
+class MsgpackEngine(QueryEngine):
+    """直接在MessagePack编码上查询，结果在返回前完整解码"""
+    name = 'msgpack'
+    exact_errors = False
+
+    def query(self, data: Any, path: str) -> Any:
+        return to_python(Evaluator(loads_msgpack(packb(data))).query(self.parse(path)))
+
+
+class BoundEngine(QueryEngine):
+    """把比较和运算中的数字字面量替换为绑定参数，执行时再按参数传入"""
+    name = 'bound'
+
+    def query(self, data: Any, path: str) -> Any:
+        ast = self.parse(path)
+        params = {}
+        stack = [ast]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, BinaryOpNode):
+                for side in ('left', 'right'):
+                    operand = getattr(node, side)
+                    if isinstance(operand, NumberNode):
+                        name = f"p{len(params)}"
+                        params[name] = operand.value
+                        setattr(node, side, ParamNode(name, operand.line, operand.column))
+            stack.extend(iter_child_nodes(node))
+        return Evaluator(data, params=params).query(ast)
+
+
+class StreamingEngine(QueryEngine):
+    """以流的方式执行，迭代结果元素后还原为列表；多个过滤条件逐个元素交替求值，最先抛出的错误可能不同"""
+    name = 'streaming'
+    exact_errors = False
+
+    def query(self, data: Any, path: str) -> Any:
+        stream = StreamingEvaluator(data).query_stream(self.parse(path))
+        if not stream.is_list:
+            return stream.value
+        return list(stream) or stream.empty_value()
+
+
+class StatusEngine(QueryEngine):
+    """以结果状态模式执行，再按抛出异常模式还原错误"""
+    name = 'status'
+
+    def query(self, data: Any, path: str) -> Any:
+        return StatusEvaluator(data).query_status(self.parse(path)).raise_for_status()
+
+
+_engines: Dict[str, QueryEngine] = {}
+
+
+def register_engine(engine: QueryEngine) -> QueryEngine:
+    """
+    注册查询引擎，同名引擎会被覆盖
+
+    Args:
+        engine (QueryEngine): 引擎实例
+    Returns:
+        QueryEngine: 注册的引擎实例
+    """
+    if not engine.name:
+        raise ValueError("引擎必须指定名称")
+    _engines[engine.name] = engine
+    return engine
+
+
+def unregister_engine(name: str) -> bool:
+    """
+    卸载查询引擎
+
+    Args:
+        name (str): 引擎名称
+    Returns:
+        bool: 卸载是否成功
+    """
+    return _engines.pop(name, None) is not None
+
+
+def get_engine(name: str) -> QueryEngine:
+    """
+    获取查询引擎
+
+    Args:
+        name (str): 引擎名称
+    Returns:
+        QueryEngine: 引擎实例
+    """
+    if name not in _engines:
+        raise ValueError(f"未知的查询引擎: {name}，可选: {', '.join(_engines)}")
+    return _engines[name]
+
+
+def available_engines() -> List[str]:
+    """获取所有已注册的引擎名称"""
+    return list(_engines)
+
+
+for _engine_class in (ReferenceEngine, OptimizedEngine, AdaptiveEngine, ProfilingEngine, IndexedEngine, CachedEngine, ViewEngine, PackedEngine, LazyEngine, MsgpackEngine, BoundEngine, StreamingEngine, StatusEngine):
+    register_engine(_engine_class())
@@ -0,0 +1,103 @@
+"""
+常驻查询增量重算的随机测试
+
+在随机文档上注册随机常驻查询，随机执行修改后，
+将每个常驻查询复用或重新计算的结果与在修改后的文档上重新执行的结果比对。
+"""
+import copy
+import random
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from dictquerier.document.tracked import TrackedDocument
+
+from fuzz.differential import canonical, outcome
+from fuzz.documents import random_scalar, random_value
+from fuzz.engines import get_engine
+from fuzz.paths import PathGenerator, setup_scripts
+
+
+def _random_location(rng: random.Random, data: Any) -> List[Union[str, int]]:
+    """随机选择文档中一个容器内的位置，返回键序列"""
+    keys = []
+    current = data
+    while True:
+        if isinstance(current, dict) and current:
+            key = rng.choice(list(current))
+        elif isinstance(current, list) and current:
+            key = rng.randrange(len(current))
+        else:
+            return keys
+        child = current[key]
+        keys.append(key)
+        if not isinstance(child, (dict, list)) or rng.random() < 0.3:
+            return keys
+        current = child
+
+
+def _random_mutation(rng: random.Random, document: TrackedDocument):
+    """对文档执行一次随机修改，返回修改描述"""
+    keys = _random_location(rng, document.data)
+    choice = rng.random()
+    if not keys:
+        return None
+    parent = document.get(keys[:-1])
+    if choice < 0.5:
+        value = random_scalar(rng) if rng.random() < 0.7 else random_value(rng, 1)
+        document.set(keys, value)
+        return ('set', keys, value)
+    if choice < 0.75:
+        if isinstance(parent, list):
+            value = random_value(rng, 1)
+            document.append(keys[:-1], value)
+            return ('append', keys[:-1], value)
+        document.set(keys[:-1] + ['new_key'], random_scalar(rng))
+        return ('set', keys[:-1] + ['new_key'], None)
+    document.delete(keys)
+    return ('delete', keys, None)
+
+
+def run_incremental(iterations: int, seed: int = 0, queries: int = 10, mutations: int = 10) -> List[Dict[str, Any]]:
+    """
+    执行增量重算随机测试
+
+    Args:
+        iterations (int): 随机文档数量
+        seed (int, optional): 随机种子. Defaults to 0.
+        queries (int, optional): 每个文档上的常驻查询数量. Defaults to 10.
+        mutations (int, optional): 每个文档上的修改次数. Defaults to 10.
+    Returns:
+        list: 不一致用例
+    """
+    setup_scripts()
+    rng = random.Random(seed)
+    generator = PathGenerator(rng)
+    reference = get_engine('reference')
+    mismatches = []
+    for _ in range(iterations):
+        data = random_value(rng, 3)
+        if not isinstance(data, dict):
+            data = {'items': data}
+        document = TrackedDocument(data)
+        for _ in range(queries):
+            document.watch(generator.generate(document.data).render())
+
+        history = []
+        for _ in range(mutations):
+            before = copy.deepcopy(document.data)
+            mutation = _random_mutation(rng, document)
+            if mutation is None:
+                continue
+            history.append(mutation)
+            for path, standing in document.standing.items():
+                expected = outcome(reference, document.data, path)
+                actual = ('error', type(standing.error).__name__) if standing.error else ('ok', canonical(standing.result))
+                # 常驻查询按列表方式求值内置函数的参数，多处报错时异常类型可能与流式求值不同
+                if expected != actual and not (expected[0] == actual[0] == 'error'):
+                    mismatches.append({
+                        'path': path,
+                        'document_before': before,
+                        'mutation': mutation,
+                        'expected': repr(expected),
+                        'actual': repr(actual),
+                    })
+    return mismatches
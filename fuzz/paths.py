@@ -0,0 +1,293 @@
+"""
+随机查询路径生成器
+
+按照 syntax_tree/parser.py 中的语法生成合法的查询路径：
+根节点（名称、根通配符、以点开头）后接 .key / ..key / ['key'] / [index] / [*] / .* / 切片 / 条件过滤，
+条件过滤由比较、集合成员、正则匹配、逻辑、算术运算、脚本调用和变量引用组合而成，整个路径偶尔被内置函数（聚合、排序、截取、连接）包裹。
+生成时参考文档结构选择键名和索引，使路径以较高概率命中实际数据。
+"""
+import random
+from typing import Any, List, Optional, Tuple
+
+from dictquerier.script.manager import script_manager
+from dictquerier.executor.index import walk_recursive
+
+from fuzz.documents import KEYS, RECORD_KEYS, STRINGS
+
+COMPARISON_OPS = ['==', '!=', '>', '<', '>=', '<=']
+ARITHMETIC_OPS = ['+', '-', '*', '/']
+LOGICAL_OPS = ['&&', '||']
+AGGREGATIONS = ['sum', 'count', 'min', 'max', 'avg', 'distinct']
+DIRECTIONS = ['asc', 'desc']
+PATTERNS = ['^a', 'e', '[0-9]', '^$', '(?i)B', '.']
+
+VARIABLE_NAME = 'fz_limit'
+
+
+def setup_scripts():
+    """注册路径中使用的脚本和变量"""
+    script_manager.register('fz_len', pure=True)(lambda value: len(value) if isinstance(value, (str, list, dict)) else -1)
+    script_manager.register('fz_double', pure=True)(lambda value: value * 2)
+    script_manager.define(VARIABLE_NAME, 3)
+
+
+def quote(value: str) -> str:
+    """将字符串转换为查询语句中的字符串字面量"""
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+class Expr:
+    """条件表达式"""
+    def render(self) -> str:
+        raise NotImplementedError
+
+    def shrink(self) -> List['Expr']:
+        """更简单的候选表达式"""
+        return []
+
+
+class Atom(Expr):
+    """不可再分的表达式片段，如键引用、字面量、脚本调用"""
+    def __init__(self, text: str):
+        self.text = text
+
+    def render(self) -> str:
+        return self.text
+
+
+class Binary(Expr):
+    """二元运算表达式"""
+    def __init__(self, left: Expr, op: str, right: Expr, parens: bool = False):
+        self.left = left
+        self.op = op
+        self.right = right
+        self.parens = parens
+
+    def render(self) -> str:
+        text = f"{self.left.render()}{self.op}{self.right.render()}"
+        return f"({text})" if self.parens else text
+
+    def shrink(self) -> List[Expr]:
+        candidates = []
+        if self.op in LOGICAL_OPS:
+            candidates.extend([self.left, self.right])
+        if self.parens:
+            candidates.append(Binary(self.left, self.op, self.right))
+        for smaller in self.left.shrink():
+            candidates.append(Binary(smaller, self.op, self.right, self.parens))
+        for smaller in self.right.shrink():
+            candidates.append(Binary(self.left, self.op, smaller, self.parens))
+        return candidates
+
+
+class Step:
+    """路径中的一个访问步骤"""
+    def __init__(self, text: str, expr: Optional[Expr] = None):
+        self.text = text
+        self.expr = expr
+
+    def render(self) -> str:
+        if self.expr is not None:
+            return f"[{self.expr.render()}]"
+        return self.text
+
+    def shrink(self) -> List['Step']:
+        if self.expr is None:
+            return []
+        return [Step(self.text, smaller) for smaller in self.expr.shrink()]
+
+
+class PathSpec:
+    """
+    结构化的查询路径，可渲染为字符串，也可生成更简单的候选路径用于最小化
+
+    Attributes:
+        root (str): 根节点文本
+        steps (List[Step]): 访问步骤
+        suffix (str): 追加在路径之后的算术运算，如 " + 1"
+        function (str): 包裹整个路径的内置函数调用前缀和选项，如 ("order_by", ", 'id', 'desc'")
+    """
+    def __init__(self, root: str, steps: List[Step], suffix: str = '', function: Tuple[str, str] = None):
+        self.root = root
+        self.steps = steps
+        self.suffix = suffix
+        self.function = function
+
+    def render(self) -> str:
+        path = self.root + ''.join(step.render() for step in self.steps)
+        if self.function:
+            name, options = self.function
+            path = f"@{name}({path}{options})"
+        return path + self.suffix
+
+    def shrink(self) -> List['PathSpec']:
+        candidates = []
+        if self.suffix:
+            candidates.append(PathSpec(self.root, self.steps, function=self.function))
+        if self.function:
+            candidates.append(PathSpec(self.root, self.steps, self.suffix))
+        for i in range(len(self.steps)):
+            candidates.append(PathSpec(self.root, self.steps[:i] + self.steps[i + 1:], self.suffix, self.function))
+        for i, step in enumerate(self.steps):
+            for smaller in step.shrink():
+                candidates.append(PathSpec(self.root, self.steps[:i] + [smaller] + self.steps[i + 1:], self.suffix, self.function))
+        return candidates
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+class PathGenerator:
+    """
+    随机查询路径生成器
+
+    Args:
+        rng (random.Random): 随机数生成器
+        max_steps (int, optional): 最大访问步骤数. Defaults to 6.
+        max_depth (int, optional): 条件表达式最大嵌套深度. Defaults to 3.
+    """
+    def __init__(self, rng: random.Random, max_steps: int = 6, max_depth: int = 3):
+        self.rng = rng
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+
+    def generate(self, document: Any) -> PathSpec:
+        """根据文档结构生成一条随机路径"""
+        rng = self.rng
+        keys = list(document) if isinstance(document, dict) and document else KEYS
+        choice = rng.random()
+        if choice < 0.1:
+            root, current = '*', document
+        elif choice < 0.2:
+            key = self._pick_key(keys)
+            root, current = '.' + key, self._get(document, key)
+        else:
+            key = self._pick_key(keys)
+            root, current = key, self._get(document, key)
+
+        steps = []
+        for _ in range(rng.randint(0, self.max_steps)):
+            step, current = self._step(current)
+            steps.append(step)
+
+        # 以点开头的根节点不能出现在脚本参数中
+        function = self._function(keys) if not root.startswith('.') and rng.random() < 0.15 else None
+        suffix = ''
+        if rng.random() < 0.05:
+            suffix = f" {rng.choice(ARITHMETIC_OPS)} {rng.randint(1, 3)}"
+        return PathSpec(root, steps, suffix, function)
+
+    def _function(self, keys: List[str]) -> Tuple[str, str]:
+        """随机选择包裹路径的内置函数及其选项"""
+        rng = self.rng
+        choice = rng.random()
+        if choice < 0.5:
+            return rng.choice(AGGREGATIONS), ''
+        if choice < 0.65:
+            return 'limit', f", {rng.randint(0, 4)}"
+        if choice < 0.8:
+            # 与文档根部的另一个列表连接
+            options = f", {self._pick_key(keys)}, {quote(rng.choice(RECORD_KEYS + ['*']))}"
+            if rng.random() < 0.5:
+                options += f", {quote(rng.choice(RECORD_KEYS))}"
+                if rng.random() < 0.5:
+                    options += f", {quote(rng.choice(['inner', 'left']))}"
+            return 'join', options
+        options = f", {quote(rng.choice(RECORD_KEYS + ['*']))}"
+        if rng.random() < 0.7:
+            options += f", {quote(rng.choice(DIRECTIONS))}"
+            if rng.random() < 0.6:
+                options += f", {rng.randint(0, 4)}"
+        return 'order_by', options
+
+    def _pick_key(self, keys: List[str]) -> str:
+        # 偶尔使用不存在的键，覆盖路径不存在的情况
+        if self.rng.random() < 0.1:
+            return self.rng.choice(KEYS + ['missing'])
+        return self.rng.choice(keys)
+
+    @staticmethod
+    def _get(value: Any, key: str) -> Any:
+        if isinstance(value, dict):
+            return value.get(key)
+        if isinstance(value, list):
+            return [item[key] for item in value if isinstance(item, dict) and key in item]
+        return None
+
+    def _step(self, current: Any):
+        """生成一个访问步骤，并近似计算访问后的值以指导后续步骤"""
+        rng = self.rng
+        if isinstance(current, (dict, list)) and rng.random() < 0.08:
+            key = rng.choice(KEYS + RECORD_KEYS)
+            text = rng.choice([f"..{key}", f"..[{quote(key)}]", "..*"])
+            return Step(text), walk_recursive(current, key, text == "..*")
+        if isinstance(current, dict) and current and rng.random() < 0.8:
+            key = self._pick_key(list(current))
+            if rng.random() < 0.7:
+                return Step('.' + key), current.get(key)
+            return Step(f"[{quote(key)}]"), current.get(key)
+
+        if isinstance(current, list) and rng.random() < 0.85:
+            choice = rng.random()
+            if choice < 0.2:
+                index = rng.randint(-1, len(current))
+                return Step(f"[{index}]"), current[index] if 0 <= index < len(current) else None
+            if choice < 0.3:
+                return Step(rng.choice(['[*]', '.*'])), current
+            if choice < 0.45:
+                return self._slice(), current
+            if choice < 0.75:
+                return Step('', self._condition(self.max_depth)), current
+            record_keys = [key for item in current if isinstance(item, dict) for key in item] or RECORD_KEYS
+            key = self._pick_key(record_keys)
+            return Step('.' + key), self._get(current, key)
+
+        key = self._pick_key(KEYS)
+        return Step('.' + key), self._get(current, key)
+
+    def _slice(self) -> Step:
+        rng = self.rng
+
+        def part():
+            return str(rng.randint(-4, 6)) if rng.random() < 0.6 else ''
+
+        step = ''
+        if rng.random() < 0.5:
+            # 偶尔生成步长为0的非法切片，覆盖异常路径
+            step = ':' + str(rng.choice([-2, -1, 1, 2, 3, 0] if rng.random() < 0.1 else [-2, -1, 1, 2, 3]))
+        return Step(f"[{part()}:{part()}{step}]")
+
+    def _operand(self) -> Expr:
+        rng = self.rng
+        choice = rng.random()
+        if choice < 0.45:
+            return Atom(quote(rng.choice(RECORD_KEYS)))
+        if choice < 0.7:
+            return Atom(str(rng.randint(-2, 6)))
+        if choice < 0.78:
+            return Atom(quote(rng.choice(STRINGS)))
+        if choice < 0.84:
+            name = rng.choice(['fz_len', 'fz_double'] + AGGREGATIONS[:2])
+            return Atom(f"@{name}({quote(rng.choice(RECORD_KEYS + ['items']))})")
+        if choice < 0.9:
+            return Atom(f"${VARIABLE_NAME}")
+        if choice < 0.97:
+            return Binary(Atom(quote(rng.choice(RECORD_KEYS))), rng.choice(ARITHMETIC_OPS[:3]), Atom(str(rng.randint(1, 3))))
+        # 裸名称在条件过滤中会抛出NameError
+        return Atom(rng.choice(RECORD_KEYS))
+
+    def _condition(self, depth: int) -> Expr:
+        rng = self.rng
+        if depth > 1 and rng.random() < 0.4:
+            return Binary(self._condition(depth - 1), rng.choice(LOGICAL_OPS), self._condition(depth - 1), parens=rng.random() < 0.3)
+        if rng.random() < 0.1:
+            # 单独的键引用，按值的真假过滤
+            return Atom(quote(rng.choice(RECORD_KEYS)))
+        if rng.random() < 0.1:
+            # 集合成员
+            values = [quote(rng.choice(STRINGS)) if rng.random() < 0.5 else str(rng.randint(-2, 6)) for _ in range(rng.randint(0, 4))]
+            return Binary(self._operand(), ' in ', Atom(f"[{', '.join(values)}]"))
+        if rng.random() < 0.08:
+            # 正则匹配
+            return Binary(self._operand(), '=~', Atom(quote(rng.choice(PATTERNS))))
+        return Binary(self._operand(), rng.choice(COMPARISON_OPS), self._operand())
@@ -1,4 +1,25 @@
-from dictquerier import query_json, flatten_list, script_manager
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from dictquerier import query_json, query_status, query_stream, explain, flatten_list, script_manager, ParameterError, SharedDocument, loads_lazy, loads_msgpack, instrumentation, LatencyAggregator, KeyIndex, Document, TrackedDocument, compile_query
+from dictquerier.document import estimate_size
+from dictquerier.batch import expand_files, query_paths, run_batch
+from dictquerier.cli import main as cli_main
+from dictquerier.exceptions import RemoteQueryError
+from dictquerier.server import QueryService, QueryClient, create_server
+from dictquerier.serialization import (
+    available_backends, get_backend, get_writer, pack, root, to_python, packb, unpackb, MsgpackFormatError,
+    ArrowWriter, column_chunks, export_columns, to_columns,
+)
+from benchmarks import runner as benchmark_runner
+from benchmarks.corpus import CORPUS
+from fuzz.differential import REFERENCE, is_mismatch, outcome
+from fuzz.engines import QueryEngine, available_engines, get_engine, register_engine, unregister_engine
 
 def main():
     # 生成用于测试的示例JSON数据
@@ -91,6 +112,58 @@ def main():
         ("root.number_list[5:2:-1]", [6, 5, 4]),  # 反向步长切片
         ("root.number_list[2:5:0]", ValueError),  # 步长为0（非法）
         ("root.number_list[2:5:1.5]", ValueError),  # 非整数步长（非法）
+        
+        # 递归下降
+        ("root.data..id", [1, 2, 3]),
+        ("root.info..details", ["detail_value"]),
+        ("root.list..sub_id", ["A", "A", "B", "B"]),
+        ("root.dictionary..['key']", ["value"]),
+        ("..details", ["detail_value"]),  # 以递归下降开头
+        ("root.list['id'==2]..name", ["value2", "value4"]),
+        ("root.empty..id", []),
+        
+        # 内置聚合
+        ("@sum(root.items[*].value)", 60),
+        ("@count(root.list['sub_id'=='A'])", 2),
+        ("@avg(root.number_list[2:5])", 4.0),
+        ("@max(root.list[*].id)", 3),
+        ("@min(root.empty)", ValueError),
+        ("@max(root.list['id'>9].id)", TypeError),  # 空投影的结果为None，与内置函数一致
+        ("@distinct(root.list[*].sub_id)", ["A", "B"]),
+        ("root.list[@sum('sub_list') > 20].name", ["value1", "value3", "value4"]),
+        
+        # 排序和截取
+        ("@order_by(root.list, 'name', 'desc').id", [2, 3, 2, 1]),
+        ("@order_by(root.list['sub_id'=='A'], 'id', 'desc', 1).name", ["value2"]),
+        ("@limit(@order_by(root.number_list, '*', 'desc'), 3)", [9, 8, 7]),
+        ("@limit(root.data[*].id, 2)", [1, 2]),
+        ("@order_by(root.list, 'id', 'up')", ValueError),  # 非法排序方向
+        
+        # 哈希连接
+        ("@join(root.data, root.list, 'id').right.name", ["value1", "value2", "value4", "value3"]),
+        ("@join(root.list, root.data, 'id')[*].left.sub_id", ["A", "A", "B", "B"]),
+        ("@count(@join(root.items, root.data, 'value', 'id', 'left'))", 3),
+        ("@join(root.number_list, root.data[*].id, '*').left", [1, 2, 3]),
+        
+        # 集合成员和正则匹配
+        ("root.list['name' in ['value1', 'value3']].id", [1, 3]),
+        ("root.list['id' in [2, 3] && 'sub_id' in ['B']].name", ["value3", "value4"]),
+        ("root.list['sub_list' in [5]].id", None),  # 列表值不在集合中
+        ("root.list['name' =~ '[24]$'].id", [2, 2]),
+        ("root.list['name' =~ '('].id", SyntaxError),  # 非法正则表达式
+        ("root.list['id' in [name]].id", SyntaxError),  # 集合元素只能是字面量
+
+        # 绑定参数
+        ("root.list['id' == :uid].name", ParameterError),  # 参数未绑定
+        ("root.list[0:a]", ValueError),  # 紧跟在切片冒号之后的 :a 是冒号和键名，不是绑定参数
+        ("root.list[a:b]", ValueError),
+        ("root.list[::a]", ValueError),
+        ("root.list[0: :n]", ParameterError),  # 与冒号之间有空格时为绑定参数
+
+        # 机器生成的长运算链，求值不随链长增加调用深度
+        ("root.list[" + " || ".join(["'id'==9"] * 1000 + ["'id'==3"]) + "].name", ["value3"]),
+        ("root.list[" + " && ".join(["'id'>1"] * 1000) + "].name", ["value2", "value3", "value4"]),
+        ("root.list['id'" + " + 1" * 1000 + " == 1003].name", ["value3"]),
     ]
     # 统计变量
     total = len(test_cases)
@@ -160,6 +233,662 @@ def main():
             print(f"   期望结果: {expected}")
     print("------------------------------\n")
 
+    # 测试查询以外的功能：(说明, 无参调用, 期望结果或异常类型)
+    print("功能测试:")
+    all_paths = [path for path, _ in test_cases] + OPTIMIZER_PATHS
+    feature_cases = [
+        # 过滤条件重排：只在不会抛出异常的操作数之间交换顺序，结果和异常与不重排时相同
+        ("重排后结果和异常不变", lambda: _outcomes(test_data, all_paths, optimize=True) == _outcomes(test_data, all_paths), True),
+        ("自适应重排后结果和异常不变", lambda: all(_outcomes(test_data, all_paths, adaptive=True) == _outcomes(test_data, all_paths)
+                                          for _ in range(3)), True),
+        ("重排不越过可能抛出异常的条件", lambda: query_json(test_data, "root.list['name' > 1 && 'id'==9].id", optimize=True),
+         TypeError),
+
+        # 与Python内置函数同名的聚合，参数不是列表时结果与内置函数一致
+        ("@max 字符串", lambda: query_json(AGGREGATE_DATA, "@max(s)"), "c"),
+        ("@min 字符串", lambda: query_json(AGGREGATE_DATA, "@min(s)"), "a"),
+        ("@max 元组", lambda: query_json(AGGREGATE_DATA, "@max(t)"), 5),
+        ("@sum 元组", lambda: query_json(AGGREGATE_DATA, "@sum(t)"), 8),
+        ("@max 集合", lambda: query_json(AGGREGATE_DATA, "@max(r)"), 9),
+        ("@sum range", lambda: query_json(AGGREGATE_DATA, "@sum(@range(4))"), 6),
+        ("@sum None", lambda: query_json(AGGREGATE_DATA, "@sum(missing)"), TypeError),
+        ("@sum 空投影", lambda: query_json(AGGREGATE_DATA, "@sum(l[*].missing)"), TypeError),
+        ("@count 元组", lambda: query_json(AGGREGATE_DATA, "@count(t)"), 3),
+        ("@count 字符串", lambda: query_json(AGGREGATE_DATA, "@count(s)"), 1),
+
+        # 键位置索引：递归下降查询与完整遍历的结果一致，修改文档后重建索引
+        ("键位置索引与完整遍历一致", lambda: _indexed_outcomes(INDEX_DATA, INDEX_PATHS) == _outcomes(INDEX_DATA, INDEX_PATHS), True),
+        ("键位置索引 共享引用", lambda: query_json(INDEX_DATA, "p..k", key_index=KeyIndex(INDEX_DATA)), [5, 5]),
+        ("键位置索引 示例数据", lambda: _indexed_outcomes(test_data, ["..id", "root..name", "root.list[1]..id", "..sub_list[0]"])
+         == _outcomes(test_data, ["..id", "root..name", "root.list[1]..id", "..sub_list[0]"]), True),
+        ("键位置索引 重建后", lambda: _rebuilt_index_query(), ([1, 2, [3, {"k": 4}], 4, 9], [1, 2, [3, {"k": 4}], 4, 9])),
+
+        # 文档句柄结果缓存：命中缓存、修改后失效、非纯函数脚本不缓存
+        ("文档缓存命中与版本失效", lambda: _document_cache(), ([["b"], ["b"], ["a", "b"]], 1, 2)),
+        ("文档缓存 非纯函数脚本每次执行", lambda: _document_script_calls(pure=False), (2, 2)),
+        ("文档缓存 纯函数脚本命中缓存", lambda: _document_script_calls(pure=True), (1, 0)),
+        ("文档缓存 注册脚本后失效", lambda: _document_script_reregistered(), (1, 2)),
+        ("文档缓存 超出字节预算不缓存", lambda: _document_rejected(), (1, 0)),
+        ("结果大小估算抽样", lambda: 0.9 < estimate_size([{"id": i, "tags": [i, "x" * (i % 7)]} for i in range(10000)])
+         / _exact_size([{"id": i, "tags": [i, "x" * (i % 7)]} for i in range(10000)]) < 1.1, True),
+
+        # 常驻查询：只有读取过被修改位置的查询会被重新执行并通知，结果与重新查询一致
+        ("常驻查询只通知受影响的查询", lambda: _tracked_notifications()[0], [
+            ["cfg.t"],
+            ["users['id'==:uid].name", "users[1].id"],
+            ["users[0:1].name"],
+            ["log[1]"],
+            [],
+            ["users['id'==:uid].name", "users[0:1].name", "users[1].id"],
+            [],
+        ]),
+        ("常驻查询结果与重新查询一致", lambda: _tracked_notifications()[1], True),
+        ("常驻查询 参数未绑定", lambda: TrackedDocument({"id": 1}).watch("id==:uid"), ParameterError),
+        ("常驻查询 参数不存在", lambda: TrackedDocument({"id": 1}).watch("id", uid=1), ParameterError),
+
+        # 零拷贝视图：转换为列表后与复制的结果一致
+        ("视图与复制结果一致", lambda: _view_outcomes(test_data, all_paths) == _outcomes(test_data, all_paths), True),
+        ("视图与复制结果一致 切片和投影", lambda: _view_outcomes(VIEW_DATA, VIEW_PATHS) == _outcomes(VIEW_DATA, VIEW_PATHS), True),
+        ("切片和投影返回视图", lambda: [type(query_json(VIEW_DATA, path, views=True)).__name__ for path in VIEW_PATHS[:3]],
+         ["ProjectionView", "SliceView", "SliceView"]),
+        ("视图反映底层数据的修改", lambda: _view_after_update(), [99, 1, 2]),
+
+        # 查询计划分析：每个节点的调用次数、扫描和匹配数量
+        ("查询计划分析统计", lambda: _plan_summary(explain(test_data, "root.list['id'>1 && @len('sub_list') > 3].name")),
+         (["value2", "value3", "value4"], 3, [(".name", 1, 3, 0), ("[filter]", 1, 4, 3), (".list", 1, 0, 0)])),
+        ("查询计划渲染", lambda: "scanned=4  matched=3" in explain(test_data, "root.list['id'>1].name").render(), True),
+
+        # 查询计划分析与查询使用相同的循环求值，很深的路径和很长的运算链不会超出递归深度
+        ("查询计划分析很深的路径", lambda: _explain_deep_path(3000), (1, 3002)),
+        ("查询计划分析很长的运算链", lambda: explain(test_data, "root.list[" + " || ".join(["'id'==9"] * 3000 + ["'id'==3"]) + "].name").result,
+         ["value3"]),
+
+        # 性能埋点：各阶段依次调用after钩子，脚本调用关联到所属查询路径
+        ("埋点事件", lambda: _instrumented({"l": [{"a": [1]}, {"a": []}]}, "l[@len('a')>0].a"),
+         [("lex", None, None), ("parse", None, None), ("script", "len", None), ("script", "len", None),
+          ("evaluate", None, None), ("query", None, None)]),
+        ("埋点事件记录异常类型", lambda: _instrumented(test_data, "1/0"),
+         [("lex", None, None), ("parse", None, None), ("evaluate", None, "ZeroDivisionError"), ("query", None, "ZeroDivisionError")]),
+        ("延迟直方图按路径和阶段聚合", lambda: _aggregated(test_data, ["root.list.id", "root.list.id", "@len('root')", "1/0"]),
+         {"root.list.id": {"query": (2, 0, 8)}, "@len('root')": {"query": (1, 0, 1), "script:len": (1, 0, 1)}, "1/0": {"query": (1, 1, 0)}}),
+        ("卸载钩子后不再启用埋点", lambda: _instrumented(test_data, "root.list.id") and instrumentation.enabled, False),
+
+        # 查询引擎：所有已注册引擎与参考引擎的结果和异常类型一致
+        ("所有引擎结果一致", lambda: _engine_mismatches(test_data, all_paths), []),
+        ("所有引擎结果一致 聚合", lambda: _engine_mismatches(AGGREGATE_DATA, ["@sum(t)", "@min(s)", "@max(r)", "@count(l)", "@sum(l.a)"]), []),
+        ("结果不一致的引擎会被发现", lambda: _broken_engine_mismatches(test_data, ["root.list.id", "1/0"]),
+         [("broken", "root.list.id"), ("broken", "1/0")]),
+
+        # 绑定参数只出现在运算数的位置，切片中紧跟冒号的 :name 仍是冒号和键名
+        ("切片中的键名不是绑定参数", lambda: [sorted(compile_query(path).parameters) for path in
+                                   ["l[0:a]", "l[a:b]", "l[:a]", "l[::a]", "l[:a:b]", "l[a :b]", "l[0: :n]", "l[ :i]", "l['x' in :s]"]],
+         [[], [], [], [], [], [], ["n"], ["i"], ["s"]]),
+        ("绑定参数用作切片边界", lambda: query_json(test_data, "root.list[0: :n].id", params={"n": 2}), [1, 2]),
+        ("绑定参数用作索引", lambda: query_json(test_data, "root.list[ :i].name", params={"i": 2}), "value3"),
+
+        # 基准测试：语料中的所有用例都能在小规模文档上执行，比较结果只标记变慢超过阈值的阶段
+        ("基准测试执行全部用例", lambda: [(entry["size"], entry["case"]) for entry in _benchmark_report()["results"]],
+         [("small", case) for case, _ in CORPUS]),
+        ("基准测试比较结果", lambda: _benchmark_regressions({"evaluate": 1.5, "parse": 1.05}, threshold=0.1),
+         [("small", "key", "evaluate")]),
+        ("基准测试比较结果 阈值", lambda: _benchmark_regressions({"evaluate": 1.5}, threshold=0.6), []),
+
+        # 很深的路径和很长的运算链在默认递归深度限制下执行
+        ("很深的路径", lambda: query_json(DEEP_DATA, DEEP_PATH), 1),
+        ("很深的路径 方括号键", lambda: query_json(DEEP_DATA, "k" + "['k']" * (DEEP_DEPTH - 1) + "['a']"), 1),
+        ("很深的路径 列表索引", lambda: query_json({"l": _nested_lists(DEEP_DEPTH)}, "l" + "[0]" * DEEP_DEPTH), [7]),
+        ("很深的路径 递归下降使用索引", lambda: query_json(DEEP_DATA, "k" + ".k" * (DEEP_DEPTH - 2) + "..a", key_index=KeyIndex(DEEP_DATA)), [1]),
+        ("很深的路径 各执行方式", lambda: (query_status(DEEP_DATA, DEEP_PATH).value, query_stream(DEEP_DATA, DEEP_PATH).value,
+                                   query_json(DEEP_DATA, DEEP_PATH, views=True), TrackedDocument(DEEP_DATA).watch(DEEP_PATH).result), (1, 1, 1, 1)),
+        ("很长的算术运算链", lambda: (query_json({}, "+".join(["1"] * DEEP_DEPTH)), query_json({}, " - ".join(["1"] * DEEP_DEPTH))),
+         (DEEP_DEPTH, 2 - DEEP_DEPTH)),
+        ("很长的逻辑运算链", lambda: [query_json(test_data, "root.list[" + " || ".join(["'id'==9"] * DEEP_DEPTH + ["'id'==3"]) + "].name", optimize=optimize)
+                               for optimize in (False, True)], [["value3"], ["value3"]]),
+        ("很长的逻辑与运算链", lambda: query_json(test_data, "root.list[" + " && ".join(["'id'>1"] * DEEP_DEPTH) + "].id"), [2, 3, 2]),
+
+        # 结果状态模式
+        ("query_status 成功", lambda: _status(query_status(test_data, "root.data[*].id")), ("ok", [1, 2, 3], None)),
+        ("query_status 路径缺失", lambda: _status(query_status(test_data, "root.missing")), ("missing", None, None)),
+        ("query_status 除零", lambda: _status(query_status(test_data, "root.number_list[0] / 0")),
+         ("zero_division", None, "ZeroDivisionError")),
+        ("query_status 类型不匹配", lambda: _status(query_status(test_data, "root.list['name' > 1].id")),
+         ("type_mismatch", None, "TypeError")),
+        ("query_status 语法错误", lambda: _status(query_status(test_data, "root.list[")), ("error", None, "SyntaxError")),
+        ("raise_for_status 抛出异常", lambda: query_status(test_data, "root.number_list[0] / 0").raise_for_status(),
+         ZeroDivisionError),
+
+        # JSON后端：所有已安装的后端解码结果一致，第三方库不支持的输入回退到标准库
+        ("JSON后端编解码一致", lambda: {get_backend(name).loads(get_backend(name).dumpb(test_data)) == test_data
+                                   for name in available_backends()}, {True}),
+        ("JSON后端超出64位的整数", lambda: {repr(get_backend(name).loads(b"[18446744073709551616, 1.5]"))
+                                     for name in available_backends()}, {"[18446744073709551616, 1.5]"}),
+        ("JSON后端无效输入", lambda: get_backend().loads(b"[1, "), json.JSONDecodeError),
+        ("命令行默认输出格式", lambda: _cli_output("-i", '{"a": [1, 2]}', "-p", "a", "-c"), "[1, 2]"),
+        ("命令行指定JSON后端", lambda: _cli_output("-i", '{"a": [1, 2]}', "-p", "a", "-c", "--json-backend", "json"), "[1, 2]"),
+
+        # 查询服务
+        ("查询服务 HTTP", lambda: _serve_query(test_data, "root.data[*].id"), [1, 2, 3]),
+        ("查询服务 Unix套接字，关闭后删除套接字文件", lambda: _serve_query(test_data, "root.data[*].id", unix=True),
+         ([1, 2, 3], False)),
+        ("查询服务 错误响应", lambda: _serve_query(test_data, "root.list["), RemoteQueryError),
+        ("查询服务 不删除套接字路径上的普通文件", _bind_over_file, "keep"),
+
+        # 共享内存文档
+        ("紧凑二进制编码完整解码", lambda: to_python(root(pack(test_data))) == test_data, True),
+        ("共享内存文档查询", lambda: _shared_query(test_data, "root.list['id'==2].name"), ["value2", "value4"]),
+        ("共享内存文档在工作进程中查询", lambda: _shared_query(test_data, "root.items[*].value", workers=1), [10, 20, 30]),
+        ("共享内存文档释放后无法连接", lambda: SharedDocument.attach(_released_shared_name()), FileNotFoundError),
+
+        # 按需解码
+        ("按需解码查询结果一致", lambda: _lazy_query(json.dumps(test_data), DOCUMENT_PATHS) == [query_json(test_data, path) for path in DOCUMENT_PATHS],
+         True),
+        ("按需解码未访问部分的语法错误", lambda: _lazy_query('{"a": [1, 2], "b": [1 2]}', ["a"]),
+         [[1, 2]]),
+        ("按需解码访问到语法错误", lambda: _lazy_query('{"a": [1, 2], "b": [1 2]}', ["b"]), json.JSONDecodeError),
+        ("按需解码括号不匹配", lambda: loads_lazy('{"a": [1, 2}'), json.JSONDecodeError),
+        ("命令行按需解码", lambda: _cli_output("-i", '{"a": {"b": [1, 2]}}', "-p", "a.b[*]", "-c", "--lazy"), "[1, 2]"),
+
+        # MessagePack
+        ("MessagePack编解码", lambda: unpackb(packb(test_data)) == test_data, True),
+        ("MessagePack查询结果一致", lambda: [to_python(query_json(loads_msgpack(packb(test_data)), path)) for path in DOCUMENT_PATHS]
+         == [query_json(test_data, path) for path in DOCUMENT_PATHS], True),
+        ("MessagePack未访问部分被截断", lambda: query_json(loads_msgpack(packb({"a": [1, 2], "b": "x"})[:-1]), "a[1]"), 2),
+        ("MessagePack访问到截断的数据", lambda: query_json(loads_msgpack(packb({"a": [1, 2], "b": "x"})[:-1]), "b"),
+         MsgpackFormatError),
+        ("MessagePack根节点之后有多余的数据", lambda: loads_msgpack(packb(1) + b"\x00"), MsgpackFormatError),
+        ("命令行查询MessagePack文件", lambda: _cli_output("-p", "a.b[*]", "-c", "--input-format", "msgpack",
+                                                  input_file=packb({"a": {"b": [1, "中"]}})), '[1, "中"]'),
+
+        # 多个路径和多个文件
+        ("多个路径查询", lambda: query_paths(test_data, ["root.data[*].id", "root.root_key"]),
+         {"root.data[*].id": [1, 2, 3], "root.root_key": "root_value"}),
+        ("多个文件并行查询，按文件顺序输出", lambda: _batch(BATCH_FILES, ["id"], workers=2), BATCH_RESULTS),
+        ("多个文件在当前进程中查询", lambda: _batch(BATCH_FILES, ["id"], workers=1), BATCH_RESULTS),
+        ("多个文件查询路径语法错误", lambda: _batch(BATCH_FILES, ["id["], workers=2), SyntaxError),
+        ("命令行多个查询路径", lambda: _cli_output("-i", '{"a": 1, "b": [2]}', "-p", "a", "-p", "b[0]", "-c"),
+         '{"a": 1, "b[0]": 2}'),
+
+        # 流式输出：逐个元素写出的JSON与一次性序列化完整结果相同
+        ("流式JSON输出与一次性序列化相同", lambda: {_write_stream("json", test_data, path, get_backend(name), indent)
+                                         == get_backend(name).dumpb(query_json(test_data, path), indent)
+                                         for path in DOCUMENT_PATHS + ["root.empty[*]", "root.missing"]
+                                         for name in available_backends() for indent in (None, 2)}, {True}),
+        ("流式JSON Lines输出", lambda: _write_stream("jsonl", test_data, "root.data[*].id"), b"1\n2\n3\n"),
+        ("流式CSV输出", lambda: _write_stream("csv", test_data, "root.list['sub_id'=='B']", columns=["id", "name", "sub_list"]),
+         b'id,name,sub_list\r\n3,value3,"[9, 10, 11, 12]"\r\n2,value4,"[5, 6, 7, 8]"\r\n'),
+        ("流式输出在写出时抛出求值错误", lambda: _write_stream("json", test_data, "root.list['name' > 1].id"), TypeError),
+        ("命令行JSON Lines输出", lambda: _cli_output("-i", '{"a": [{"b": 1}, {"b": "中"}]}', "-p", "a[*]", "--output-format", "jsonl"),
+         '{"b": 1}\n{"b": "中"}\n'),
+
+        # 列式导出
+        ("按列收集指定的列", lambda: to_columns(query_json(test_data, "root.list['sub_id'=='A']"), ["id", "key"]),
+         {"id": [1, 2], "key": [None, None]}),
+        ("按列收集以第一个对象的键为列", lambda: to_columns(query_json(test_data, "root.items[*]")),
+         {"value": [10, 20, 30], "sub_value": [100, 200, 300]}),
+        ("按列收集不是对象的元素", lambda: to_columns(query_json(test_data, "root.data[*].id")), {"value": [1, 2, 3]}),
+        ("按块按列收集", lambda: list(column_chunks(query_json(test_data, "root.list[*]"), ["id"], chunk_rows=3)[1]),
+         [[[1, 2, 3]], [[2]]]),
+        ("按列收集按需解码的对象", lambda: to_columns(query_json(loads_lazy(json.dumps(test_data), 0), "root.list['id'==2]"),
+                                           ["name", "sub_list"], to_python),
+         {"name": ["value2", "value4"], "sub_list": [[1, 2, 3, 4], [5, 6, 7, 8]]}),
+        ("按列导出CSV", lambda: _export_columns("csv", test_data, "root.list['id'>2]", ["name", "id"]), b"name,id\r\nvalue3,3\r\n"),
+        ("按列导出Arrow", lambda: _export_columns("arrow", test_data, "root.list['sub_id'=='B']", ["id", "name"]),
+         {"id": [3, 2], "name": ["value3", "value4"]} if ArrowWriter.available() else ValueError),
+        ("命令行按列导出CSV", lambda: _cli_output("-i", '{"a": [{"x": 1, "y": 2}, {"y": 3}]}', "-p", "a", "--output-format", "csv",
+                                         "--columns", "y,x"), "y,x\n2,1\n3,\n"),
+        ("命令行 --format 与 --output-format 相同", lambda: _cli_output("-i", '{"a": [{"x": 1}]}', "-p", "a", "--format", "csv"), "x\n1\n"),
+    ]
+    feature_total = len(feature_cases)
+    feature_success = 0
+    feature_fail_cases = []
+    for name, func, expected in feature_cases:
+        try:
+            result = func()
+            if isinstance(expected, type) and issubclass(expected, Exception):
+                print(f"功能测试失败: {name} 未抛出预期异常 {expected.__name__}")
+                feature_fail_cases.append((name, f"未抛出预期异常 {expected.__name__}", None))
+            elif result == expected:
+                print(f"功能测试通过: {name} -> {result!r}")
+                feature_success += 1
+            else:
+                print(f"功能测试失败: {name} -> {result!r}, 期望: {expected!r}")
+                feature_fail_cases.append((name, result, expected))
+        except Exception as e:
+            if isinstance(expected, type) and isinstance(e, expected):
+                print(f"功能测试通过: {name} -> 抛出预期异常 {e}")
+                feature_success += 1
+            else:
+                print(f"功能测试失败: {name} -> 抛出异常 {e!r}, 期望: {expected!r}")
+                feature_fail_cases.append((name, f"抛出异常 {e!r}", expected))
+    print("\n------------------------------")
+    print(f"功能测试总数: {feature_total}，通过数: {feature_success}，失败数: {feature_total - feature_success}")
+    print(f"功能测试成功率: {feature_success / feature_total * 100:.2f}%")
+    if feature_fail_cases:
+        print("\n以下为所有功能测试失败的用例：")
+        for idx, (name, got, expected) in enumerate(feature_fail_cases, 1):
+            print(f"{idx}. 功能: {name}")
+            print(f"   实际结果: {got!r}")
+            print(f"   期望结果: {expected!r}")
+    print("------------------------------\n")
+
+
+# 重排测试的查询路径：可能抛出异常的条件与不会抛出异常的条件交错
+OPTIMIZER_PATHS = [
+    "root.list['name' > 1 && 'id'==9].id",
+    "root.list['id'==9 && 'name' > 1].id",
+    "root.list['id'==2 || 'name' > 1].id",
+    "root.list['sub_id'!='B' && 'id'==2 && 'name' =~ '2$'].name",
+    "root.list[('id'==1 || 'id'==3) && 'sub_id'=='B' && 'sub_list' != 1].name",
+    "root.list['sub_id'=='B' && 'id' + 'name' == 1 && 'id'==9].id",
+]
+
+
+def _outcomes(data, paths, **kwargs):
+    """依次执行查询，返回每个查询的结果或抛出的异常类型名称"""
+    outcomes = []
+    for path in paths:
+        try:
+            outcomes.append(query_json(data, path, **kwargs))
+        except Exception as e:
+            outcomes.append(type(e).__name__)
+    return outcomes
+
+
+# 聚合测试数据，包含JSON中没有的元组和集合
+AGGREGATE_DATA = {"s": "abc", "t": (1, 5, 2), "r": {9, 3}, "l": [{"a": 1}, {"a": 2}]}
+
+
+def _engine_mismatches(data, paths):
+    """在所有已注册引擎上执行查询，返回与参考引擎不一致的 (引擎名称, 查询路径)"""
+    mismatches = []
+    reference = get_engine(REFERENCE)
+    for path in paths:
+        expected = outcome(reference, data, path)
+        for name in available_engines():
+            engine = get_engine(name)
+            if is_mismatch(engine, expected, outcome(engine, data, path)):
+                mismatches.append((name, path))
+    return mismatches
+
+
+class _BrokenEngine(QueryEngine):
+    """总是返回None的引擎，用于确认差分比对能发现不一致"""
+    name = "broken"
+
+    def query(self, data, path):
+        return None
+
+
+def _broken_engine_mismatches(data, paths):
+    """临时注册结果错误的引擎，返回被发现的不一致"""
+    register_engine(_BrokenEngine())
+    try:
+        return [mismatch for mismatch in _engine_mismatches(data, paths) if mismatch[0] == "broken"]
+    finally:
+        unregister_engine("broken")
+
+
+# 键位置索引测试数据，同一个字典在列表中出现两次
+_SHARED = {"k": 5}
+INDEX_DATA = {"k": 0, "a": {"k": 1, "b": [{"k": 2}, {"c": {"k": [3, {"k": 4}]}}]}, "p": [_SHARED, _SHARED]}
+INDEX_PATHS = ["..k", "a..k", "a.b..k", "a.b[1]..k", "..missing", "p..k", "a.b..k[0]", "..k.k", "a.b[*]..k", "..c..k"]
+
+
+def _indexed_outcomes(data, paths):
+    """使用键位置索引依次执行查询，返回每个查询的结果或抛出的异常类型名称"""
+    return _outcomes(data, paths, key_index=KeyIndex(data))
+
+
+def _rebuilt_index_query():
+    """修改文档并重建索引后，比较索引查询和完整遍历的结果"""
+    data = json.loads(json.dumps(INDEX_DATA))
+    key_index = KeyIndex(data)
+    data["a"]["b"].append({"k": 9})
+    key_index.rebuild()
+    return query_json(data, "a..k", key_index=key_index), query_json(data, "a..k")
+
+
+def _document_cache():
+    """重复查询、修改文档后再次查询，返回 (结果, 命中次数, 未命中次数)"""
+    document = Document({"users": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]})
+    path = "users['id'>1].name"
+    results = [document.query(path), document.query(path)]
+    document.set(["users", 0, "id"], 5)
+    results.append(document.query(path))
+    stats = document.get_stats()
+    return results, stats["hits"], stats["misses"]
+
+
+def _document_script_calls(pure):
+    """同一个脚本查询执行两次，返回 (脚本调用次数, 不可缓存的查询次数)"""
+    calls = []
+    script_manager.register("_main_tick", pure=pure)(lambda value: calls.append(value) or value)
+    try:
+        document = Document({"id": 7})
+        document.query("@_main_tick(id)")
+        document.query("@_main_tick(id)")
+        return len(calls), document.get_stats()["uncacheable"]
+    finally:
+        script_manager.unregister("_main_tick")
+
+
+def _document_script_reregistered():
+    """注册脚本前后各查询一次，返回 (命中次数, 未命中次数)"""
+    script_manager.register("_main_double", pure=True)(lambda value: value * 2)
+    try:
+        document = Document({"id": 7})
+        document.query("@_main_double(id)")
+        document.query("@_main_double(id)")
+        script_manager.register("_main_double", pure=True)(lambda value: value * 3)
+        assert document.query("@_main_double(id)") == 21
+        stats = document.get_stats()
+        return stats["hits"], stats["misses"]
+    finally:
+        script_manager.unregister("_main_double")
+
+
+def _document_rejected():
+    """结果超过字节预算时不写入缓存，返回 (拒绝次数, 缓存条目数)"""
+    document = Document({"items": list(range(1000))}, cache_bytes=1024)
+    document.query("items[*]")
+    stats = document.get_stats()
+    return stats["rejected"], stats["entries"]
+
+
+def _exact_size(value):
+    """完整遍历计算对象及所有嵌套对象占用的字节数，同一个对象只计算一次"""
+    total = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            stack.extend(current)
+    return total
+
+
+def _tracked_notifications():
+    """依次修改文档，返回每次修改后被通知的常驻查询路径，以及最终结果是否与重新查询一致"""
+    document = TrackedDocument({"users": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}], "cfg": {"t": 1}, "log": ["x"]})
+    notified = []
+    document.watch("users['id'==:uid].name", callback=lambda standing: notified.append(standing.path), uid=2)
+    for path in ["cfg.t", "log[1]", "users[1].id", "users[0:1].name"]:
+        document.watch(path, callback=lambda standing: notified.append(standing.path))
+    changes = [
+        (document.set, ["cfg", "t"], 5),
+        (document.set, ["users", 1, "id"], 7),
+        (document.set, ["users", 0, "name"], "x"),
+        (document.append, ["log"], "e"),
+        (document.set, ["log", 0], "y"),
+        (document.delete, ["users", 0]),
+        (document.set, ["cfg", "u"], 1),
+    ]
+    history = []
+    for change, *args in changes:
+        notified.clear()
+        change(*args)
+        history.append(sorted(notified))
+    consistent = all(
+        standing.result == query_json(document.data, path, params=standing.params)
+        for path, standing in document.standing.items()
+    )
+    return history, consistent
+
+
+# 零拷贝视图测试数据和查询路径
+VIEW_DATA = {"items": [{"value": i, "tags": [i, i + 1]} for i in range(20)]}
+VIEW_PATHS = [
+    "items[2:15:3].value", "items[::-2].value[1:3]", "items.value[5:]", "items[3:8].tags", "items[1:4]",
+    "items[2:10].value[::3]", "items[0:4].tags[1]", "@sum(items[0:5].value)", "items[5:2]", "items[0:3].missing",
+    "items[0:6]['value'>2].tags[0]", "items[::4].value + items[1::4].value",
+]
+
+
+def _view_outcomes(data, paths):
+    """以视图方式依次执行查询，返回完整转换为列表后的结果或抛出的异常类型名称"""
+    return [to_python(outcome) for outcome in _outcomes(data, paths, views=True)]
+
+
+def _view_after_update():
+    """先查询得到视图再修改文档，返回视图中的值"""
+    data = json.loads(json.dumps(VIEW_DATA))
+    view = query_json(data, "items[0:3].value", views=True)
+    data["items"][0]["value"] = 99
+    return list(view)
+
+
+def _plan_summary(plan):
+    """查询计划的结果、脚本调用次数，以及路径节点按先序排列的 (描述, 调用次数, 扫描数量, 匹配数量)"""
+    steps = []
+    stack = [plan.to_dict()]
+    while stack:
+        entry = stack.pop()
+        if entry["node"] in ("KeyNode", "IndexNode", "SliceNode", "RecursiveKeyNode"):
+            steps.append((entry["label"], entry["calls"], entry["scanned"], entry["matched"]))
+        stack.extend(reversed(entry.get("children", [])))
+    return plan.result, plan.script_calls, steps
+
+
+def _instrumented(data, path):
+    """执行查询，返回after钩子收到的 (阶段, 名称, 异常类型) 列表，事件路径均应为查询路径"""
+    events = []
+    hook_id = instrumentation.register(after=events.append)
+    try:
+        query_json(data, path)
+    except Exception:
+        pass
+    finally:
+        instrumentation.unregister(hook_id)
+    assert all(event.path == path for event in events)
+    return [(event.stage, event.name, event.error_type) for event in events]
+
+
+def _aggregated(data, paths):
+    """使用延迟直方图聚合多次查询，返回 {路径: {阶段: (次数, 异常次数, 结果元素数)}}，只保留query和脚本阶段"""
+    aggregator = LatencyAggregator()
+    hook_id = instrumentation.register(after=aggregator)
+    try:
+        for path in paths:
+            try:
+                query_json(data, path)
+            except Exception:
+                pass
+    finally:
+        instrumentation.unregister(hook_id)
+    return {
+        path: {
+            stage: (stats["count"], stats["errors"], stats["result_items"])
+            for stage, stats in stages.items() if stage == "query" or stage.startswith("script:")
+        }
+        for path, stages in aggregator.dump().items()
+    }
+
+
+def _benchmark_report():
+    """在小规模文档上把语料中的每个用例执行一次，并经过JSON文件保存和读取"""
+    report = benchmark_runner.run(["small"], repeat=1)
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "result.json")
+        benchmark_runner.save(report, output)
+        return benchmark_runner.load(output)
+
+
+def _benchmark_regressions(slowdown, threshold):
+    """把key用例的指定阶段按倍数变慢后与原结果比较，返回被判定为回退的 (规模, 用例, 阶段)"""
+    base = benchmark_runner.run(["small"], repeat=1, cases=["key", "index"])
+    head = json.loads(json.dumps(base))
+    for stage, factor in slowdown.items():
+        head["results"][0][stage]["median_ms"] = base["results"][0][stage]["median_ms"] * factor
+    rows = benchmark_runner.compare(base, head, threshold)
+    return [(row["size"], row["case"], row["stage"]) for row in rows if row["regression"]]
+
+
+# 远超默认递归深度限制的嵌套层数和运算链长度
+DEEP_DEPTH = 5000
+DEEP_PATH = "k." * DEEP_DEPTH + "a"
+
+
+def _nested_dicts(depth):
+    """嵌套depth层的字典，最内层为 {"a": 1}"""
+    data = {"a": 1}
+    for _ in range(depth):
+        data = {"k": data}
+    return data
+
+
+def _nested_lists(depth):
+    """嵌套depth层的列表，最内层为 [7]"""
+    data = [7]
+    for _ in range(depth):
+        data = [data]
+    return data
+
+
+DEEP_DATA = _nested_dicts(DEEP_DEPTH)
+
+
+def _explain_deep_path(depth):
+    """分析嵌套depth层的路径，返回查询结果和渲染的行数"""
+    plan = explain(_nested_dicts(depth), "k." * depth + "a")
+    return plan.result, len(plan.render().splitlines())
+
+
+def _status(result):
+    """结果状态模式的结果转换为 (状态, 值, 异常类型名称)"""
+    return result.status, result.value, result.error_type
+
+
+def _write_json(directory, name, value):
+    """把数据写入目录中的JSON文件，返回文件路径"""
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(value, f)
+    return path
+
+
+def _serve_query(data, path, unix=False):
+    """启动查询服务并通过客户端执行一次查询，Unix套接字时同时返回关闭服务后套接字文件是否存在"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        service = QueryService()
+        service.add(_write_json(tmpdir, "data.json", data))
+        socket_path = os.path.join(tmpdir, "query.sock") if unix else None
+        server = create_server(service, socket_path, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = "" if unix else "http://%s:%d" % server.server_address[:2]
+            with QueryClient(socket_path, url) as client:
+                result = client.query(path, document="data")
+        finally:
+            server.shutdown()
+            server.server_close()
+        if unix:
+            return result, os.path.exists(socket_path)
+        return result
+
+
+def _bind_over_file():
+    """在已有普通文件的路径上启动Unix套接字服务，返回文件内容"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "query.sock")
+        with open(path, "w") as f:
+            f.write("keep")
+        try:
+            create_server(QueryService(), path).server_close()
+        except OSError:
+            pass
+        with open(path) as f:
+            return f.read()
+
+
+def _shared_query(data, path, workers=None):
+    """发布共享内存文档并执行查询，指定workers时在进程池中查询"""
+    with SharedDocument.publish(data) as document:
+        if workers is None:
+            return document.query(path)
+        with ProcessPoolExecutor(workers) as pool:
+            return pool.submit(_query_document, document, path).result()
+
+
+def _query_document(document, path):
+    return document.query(path)
+
+
+def _released_shared_name():
+    """发布并释放一个共享内存文档，返回其名称"""
+    with SharedDocument.publish([1]) as document:
+        return document.name
+
+
+# 按需解码和MessagePack测试的查询路径
+DOCUMENT_PATHS = ["root.list['id'==2].name", "root.items[*].value", "root.child[1][0]", "root.dictionary", "root..id", "root.number_list[2:5]"]
+
+
+def _lazy_query(raw, paths):
+    """按需解码JSON文本，所有对象和数组都以视图返回，对每个路径查询并完整解码结果"""
+    document = loads_lazy(raw, 0)
+    return [to_python(query_json(document, path)) for path in paths]
+
+
+# 多个文件查询的测试文件：目录展开时只包含.json文件，解析失败的文件不影响其余文件
+BATCH_FILES = {
+    "a.json": b'{"id": 1}',
+    "b.json": b'{"id": ',
+    "c.json": b'{"id": 3}',
+    "notes.txt": b'{"id": 4}',
+}
+BATCH_RESULTS = [("a.json", 1), ("b.json", "JSONDecodeError"), ("c.json", 3)]
+
+
+def _batch(files, paths, workers):
+    """把文件写入临时目录，按目录展开后查询，返回 (文件名, 结果或异常类型) 列表"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, content in files.items():
+            with open(os.path.join(tmpdir, name), "wb") as f:
+                f.write(content)
+        outcomes = run_batch(expand_files([tmpdir]), paths, workers)
+        return [(os.path.basename(outcome["file"]), outcome["result"] if "result" in outcome else outcome["error"]["type"])
+                for outcome in outcomes]
+
+
+def _write_stream(output_format, data, path, backend=None, indent=None, columns=None):
+    """以流的方式查询并写出，返回写出的字节"""
+    out = io.BytesIO()
+    backend = backend or get_backend("json")
+    get_writer(output_format, out, backend, indent, columns=columns).write_stream(query_stream(data, path))
+    return out.getvalue()
+
+
+def _export_columns(output_format, data, path, columns):
+    """按列导出，返回CSV的字节或Arrow表转换成的字典"""
+    out = io.BytesIO()
+    export_columns(data, path, out, output_format, columns)
+    if output_format == "arrow":
+        import pyarrow.ipc
+        return pyarrow.ipc.open_file(io.BytesIO(out.getvalue())).read_all().to_pydict()
+    return out.getvalue()
+
+
+def _cli_output(*argv, input_file=None):
+    """执行命令行并返回写入输出文件的文本，指定input_file时把其内容写入文件并通过-f传入"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        argv = list(argv)
+        if input_file is not None:
+            path = os.path.join(tmpdir, "input")
+            with open(path, "wb") as f:
+                f.write(input_file)
+            argv += ["-f", path]
+        output = os.path.join(tmpdir, "output.json")
+        cli_main(argv + ["-o", output])
+        with open(output, encoding="utf-8") as f:
+            return f.read()
+
 
 if __name__ == "__main__":
     main()
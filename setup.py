@@ -23,8 +23,13 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    packages=find_packages(),
-    python_requires=">=3.6",
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*", "fuzz", "fuzz.*"]),
+    python_requires=">=3.8",
+    extras_require={
+        "fast-json": ["orjson"],
+        "msgpack": ["msgpack"],
+        "arrow": ["pyarrow"],
+    },
     keywords="json, query, path, jsonpath, json-path",
     entry_points={
         'console_scripts': [